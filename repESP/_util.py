@@ -1,5 +1,11 @@
+from repESP.exceptions import InputFormatError
+from repESP.util import FileOrPath, open_file
+
+from contextlib import contextmanager
 from enum import Enum
-from typing import Collection, Iterable, TextIO, Tuple, TypeVar
+import numpy as np
+import os
+from typing import Collection, Iterable, Iterator, TextIO, Tuple, TypeVar
 
 
 # As per Python docs
@@ -55,3 +61,27 @@ def zip_exact(first: Collection[T], second: Collection[U]) -> Iterable[Tuple[T,
 
 def get_line(f: TextIO) -> str:
     return f.readline().rstrip('\n')
+
+
+def read_float_array(f: TextIO) -> np.ndarray:
+    # Reads the remainder of the file as whitespace-separated floats in bulk.
+    return parse_float_array(f.read())
+
+
+def parse_float_array(text: str) -> np.ndarray:
+    # Exponents in the Fortran double precision notation (`D`) are accepted.
+    try:
+        return np.array(text.replace('D', 'E').split(), dtype=float)
+    except ValueError as e:
+        raise InputFormatError(f"Failed to parse numeric values: {e}") from e
+
+
+@contextmanager
+def open_if_path(f: FileOrPath, mode: str="r") -> Iterator[TextIO]:
+    # Paths are opened (and afterwards closed) with `open_file`, while file
+    # objects are passed through and remain open.
+    if isinstance(f, (str, os.PathLike)):
+        with open_file(f, mode) as opened:
+            yield opened
+    else:
+        yield f
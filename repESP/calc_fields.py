@@ -4,13 +4,17 @@ Attributes
 ----------
 """
 
-from repESP.fields import Esp, Field, AbstractMesh
+from repESP.fields import ArrayMesh, Ed, Esp, Field, AbstractMesh
 from repESP.charges import AtomWithCoordsAndCharge
 from repESP.types import AtomWithCoords, Coords, Dist, Molecule
+from repESP.wavefunction import Wavefunction
 
 from scipy.spatial.distance import euclidean  # type: ignore
+from scipy.sparse import coo_matrix  # type: ignore
+from scipy.sparse.csgraph import connected_components  # type: ignore
+from scipy.special import gamma, gammainc  # type: ignore
 import numpy as np
-from typing import Callable, cast, Collection, List, Optional, Tuple, TypeVar
+from typing import Callable, cast, Collection, Dict, List, Optional, Tuple, TypeVar
 
 
 def esp_from_charges(mesh: AbstractMesh, molecule: Molecule[AtomWithCoordsAndCharge]) -> Field[Esp]:
@@ -40,6 +44,295 @@ def esp_from_charges(mesh: AbstractMesh, molecule: Molecule[AtomWithCoordsAndCha
     )
 
 
+def ed_from_wavefunction(
+    mesh: AbstractMesh,
+    wavefunction: Wavefunction,
+    cutoff: float=1e-12,
+    chunk_size: int=1024
+) -> Field[Ed]:
+    """Calculate electron density at specified points from a wavefunction
+
+    The density is evaluated for chunks of points at a time. For each chunk,
+    primitives which contribute less than `cutoff` to the value of any orbital
+    at every point of the chunk are skipped, which greatly reduces the cost
+    of evaluation far from most atoms. Meshes which iterate over nearby points
+    consecutively, like `GridMesh`, benefit the most from this screening.
+
+    Parameters
+    ----------
+    mesh : AbstractMesh
+        The points at which the electron density is to be calculated.
+    wavefunction : Wavefunction
+        The wavefunction, e.g. parsed from a .wfx file with `parse_wfx`.
+    cutoff : float, optional
+        The magnitude of the contribution of a primitive to the value of an
+        orbital below which the primitive is neglected. Defaults to 1e-12.
+    chunk_size : int, optional
+        The number of points evaluated at once, which determines the memory
+        requirements. Defaults to 1024.
+
+    Returns
+    -------
+    Field[Ed]
+        The electron density at the specified points. The values are stored
+        in a numpy array.
+    """
+    points = mesh.as_array()
+    centers = wavefunction.primitive_coordinates
+    exponents = wavefunction.primitive_exponents
+    powers = wavefunction.primitive_powers
+    angular_momenta = powers.sum(axis=1)
+    # The logarithm of the largest coefficient of each primitive in any orbital
+    with np.errstate(divide="ignore"):
+        log_max_coefficients = np.log(np.abs(wavefunction.coefficients).max(axis=0, initial=0))
+        log_cutoff = np.log(cutoff)
+
+    values = np.empty(len(points))
+    for start in range(0, len(points), chunk_size):
+        chunk = points[start:start + chunk_size]
+
+        # The magnitude of a primitive at distance r from its center is bound
+        # by r^L exp(-a r^2), which decreases with r beyond sqrt(L/(2a)).
+        nearest = np.clip(centers, chunk.min(axis=0), chunk.max(axis=0))
+        min_dist_sq = np.sum((centers - nearest)**2, axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_bound = (
+                log_max_coefficients +
+                0.5*angular_momenta*np.log(min_dist_sq) -
+                exponents*min_dist_sq
+            )
+        # Undefined bounds (NaN) for primitives centered in the chunk compare
+        # as False and thus such primitives are kept.
+        negligible = (min_dist_sq*2*exponents >= angular_momenta) & (log_bound < log_cutoff)
+        kept = np.flatnonzero(~negligible)
+
+        displacements = chunk[:, np.newaxis, :] - centers[np.newaxis, kept, :]
+        primitives = np.exp(
+            -exponents[kept]*np.sum(displacements**2, axis=2)
+        )*np.prod(displacements**powers[kept], axis=2)
+        orbitals = primitives @ wavefunction.coefficients[:, kept].T
+        values[start:start + chunk_size] = orbitals**2 @ wavefunction.occupations
+
+    return Field(mesh, values)
+
+
+def _boys(max_order: int, x: np.ndarray) -> List[np.ndarray]:
+    # Boys functions F_n(x) for n up to max_order. The highest order is
+    # calculated from the incomplete gamma function and the lower orders by
+    # the (stable) downward recursion. For large x, the incomplete gamma
+    # function equals the complete one to machine precision, which avoids the
+    # costly evaluation for points far from the Hermite Gaussians.
+    n = max_order + 0.5
+    top = gamma(n)/(2*np.maximum(x, 1e-12)**n)
+    not_large = np.flatnonzero(x < 36 + 2*max_order)
+    x_not_large = x.flat[not_large]
+    top.flat[not_large] = np.where(
+        x_not_large < 1e-12,
+        1/(2*max_order + 1) - x_not_large/(2*max_order + 3),
+        top.flat[not_large]*gammainc(n, x_not_large)
+    )
+    exp_x = np.exp(-x)
+    result = [top]
+    for order in range(max_order - 1, -1, -1):
+        result.append((2*x*result[-1] + exp_x)/(2*order + 1))
+    return result[::-1]
+
+
+def _hermite_indices(max_order: int) -> List[Tuple[int, int, int]]:
+    # Indices (t, u, v) of the Hermite Gaussians with t + u + v <= max_order
+    return [
+        (t, u, total - t - u)
+        for total in range(max_order + 1)
+        for t in range(total, -1, -1)
+        for u in range(total - t, -1, -1)
+    ]
+
+
+def _hermite_expansion_coefficients(
+    max_power: int,
+    p: np.ndarray,
+    pa: np.ndarray,
+    pb: np.ndarray
+) -> np.ndarray:
+    # Coefficients E^{ij}_t of the expansion of the product of two Cartesian
+    # Gaussians in one dimension into Hermite Gaussians (McMurchie-Davidson),
+    # excluding the exponential prefactor. The arguments are arrays over
+    # primitive pairs of the total exponent and the displacements of the
+    # product center from the two centers. Returns an array of shape
+    # (max_power+1, max_power+1, 2*max_power+1, pair count).
+    result = np.zeros((max_power + 1, max_power + 1, 2*max_power + 2, len(p)))
+    result[0, 0, 0] = 1
+    half_inv_p = 0.5/p
+    for i in range(max_power + 1):
+        for j in range(max_power + 1):
+            if i == 0 and j == 0:
+                continue
+            if i > 0:
+                previous, displacement = result[i - 1, j], pa
+            else:
+                previous, displacement = result[i, j - 1], pb
+            result[i, j, 0] = displacement*previous[0] + previous[1]
+            for t in range(1, i + j + 1):
+                result[i, j, t] = half_inv_p*previous[t - 1] + displacement*previous[t] + (t + 1)*previous[t + 1]
+    return result[:, :, :-1]
+
+
+def _hermite_coulomb_integrals(
+    max_order: int,
+    p: np.ndarray,
+    pc: np.ndarray
+) -> Dict[Tuple[int, int, int], np.ndarray]:
+    # Hermite Coulomb integrals R_{tuv} for t + u + v <= max_order, for
+    # arrays of the exponents p of shape (n, 1) and of the displacements
+    # of the points from the Hermite Gaussian centers of shape (n, m, 3).
+    boys = _boys(max_order, p*(pc[:, :, 0]**2 + pc[:, :, 1]**2 + pc[:, :, 2]**2))
+    previous: Dict[Tuple[int, int, int], np.ndarray] = {}
+    for n in range(max_order, -1, -1):
+        current = {(0, 0, 0): (-2*p)**n*boys[n]}
+        for t, u, v in _hermite_indices(max_order - n)[1:]:
+            if t > 0:
+                axis, lower, lowest = 0, (t - 1, u, v), (t - 2, u, v)
+            elif u > 0:
+                axis, lower, lowest = 1, (t, u - 1, v), (t, u - 2, v)
+            else:
+                axis, lower, lowest = 2, (t, u, v - 1), (t, u, v - 2)
+            value = pc[:, :, axis]*previous[lower]
+            if lowest in previous:
+                value += lower[axis]*previous[lowest]
+            current[(t, u, v)] = value
+        previous = current
+    return previous
+
+
+def esp_from_wavefunction(
+    mesh: AbstractMesh,
+    wavefunction: Wavefunction,
+    cutoff: float=1e-10,
+    chunk_size: int=64
+) -> Field[Esp]:
+    """Calculate ESP value at specified points from a wavefunction
+
+    The ESP is the sum of the potential due to the nuclei and that due to
+    the electron density. The latter is calculated analytically from the
+    nuclear attraction integrals of pairs of primitives, using the
+    McMurchie-Davidson expansion of their products into Hermite Gaussians.
+    Primitives sharing a center and an exponent form a shell and the
+    contributions of all pairs of primitives in a pair of shells are
+    combined, so that the costly part of the calculation scales with the
+    number of shell pairs. Shell pairs whose electron density is negligible,
+    as determined by `cutoff`, are skipped.
+
+    Parameters
+    ----------
+    mesh : AbstractMesh
+        The points at which the ESP values are to be calculated.
+    wavefunction : Wavefunction
+        The wavefunction, e.g. parsed from a .wfx file with `parse_wfx`.
+    cutoff : float, optional
+        The magnitude of the sum of the Hermite expansion coefficients of a
+        shell pair, scaled by the integral of its Gaussian, below which the
+        shell pair is neglected. Defaults to 1e-10.
+    chunk_size : int, optional
+        The number of points evaluated at once, which determines the memory
+        requirements. Defaults to 64.
+
+    Returns
+    -------
+    Field[Esp]
+        The ESP field at the specified points. The values are stored in a
+        numpy array.
+    """
+    points = mesh.as_array()
+    molecule_coords = np.array(
+        [tuple(atom.coords) for atom in wavefunction.molecule.atoms], dtype=float
+    ).reshape(-1, 3)
+    nuclear_charges = np.array(
+        [atom.atomic_number for atom in wavefunction.molecule.atoms], dtype=float
+    )
+
+    # Shells, i.e. primitives sharing a center and an exponent
+    _, shells = np.unique(
+        np.stack([wavefunction.primitive_centers, wavefunction.primitive_exponents], axis=1),
+        axis=0,
+        return_inverse=True
+    )
+    shells = shells.ravel()
+
+    # Primitive pairs in the density matrix, with the off-diagonal pairs
+    # appearing once with a double weight.
+    density_matrix = (wavefunction.coefficients.T*wavefunction.occupations) @ wavefunction.coefficients
+    first, second = np.triu_indices(len(density_matrix))
+    weights = density_matrix[first, second]*np.where(first == second, 1, 2)
+
+    centers = wavefunction.primitive_coordinates
+    exponents = wavefunction.primitive_exponents
+    powers = wavefunction.primitive_powers
+    a, b = exponents[first], exponents[second]
+    p = a + b
+    p_centers = (a[:, np.newaxis]*centers[first] + b[:, np.newaxis]*centers[second])/p[:, np.newaxis]
+    weights = weights*np.exp(-a*b/p*np.sum((centers[first] - centers[second])**2, axis=1))
+
+    # Hermite expansion coefficients of the primitive pairs, summed over the
+    # shell pairs
+    max_power = int(powers.max(initial=0))
+    hermite_indices = _hermite_indices(2*max_power)
+    expansions = [
+        _hermite_expansion_coefficients(
+            max_power,
+            p,
+            p_centers[:, axis] - centers[first, axis],
+            p_centers[:, axis] - centers[second, axis]
+        )[powers[first, axis], powers[second, axis], :, np.arange(len(p))]
+        for axis in range(3)
+    ]
+    shell_pairs, shell_pair_indices = np.unique(
+        np.stack([np.minimum(shells[first], shells[second]), np.maximum(shells[first], shells[second])], axis=1),
+        axis=0,
+        return_inverse=True
+    )
+    shell_pair_indices = shell_pair_indices.ravel()
+    coefficients = np.zeros((len(shell_pairs), len(hermite_indices)))
+    for k, (t, u, v) in enumerate(hermite_indices):
+        np.add.at(
+            coefficients[:, k],
+            shell_pair_indices,
+            weights*expansions[0][:, t]*expansions[1][:, u]*expansions[2][:, v]
+        )
+
+    shell_pair_p = np.zeros(len(shell_pairs))
+    shell_pair_p[shell_pair_indices] = p
+    shell_pair_centers = np.zeros((len(shell_pairs), 3))
+    shell_pair_centers[shell_pair_indices] = p_centers
+    shell_pair_orders = np.zeros(len(shell_pairs), dtype=int)
+    np.maximum.at(shell_pair_orders, shell_pair_indices, np.sum(powers[first] + powers[second], axis=1))
+
+    significant = np.sum(np.abs(coefficients), axis=1)*(np.pi/shell_pair_p)**1.5 >= cutoff
+
+    values = np.empty(len(points))
+    for start in range(0, len(points), chunk_size):
+        chunk = points[start:start + chunk_size]
+        distances = np.linalg.norm(chunk[:, np.newaxis, :] - molecule_coords[np.newaxis, :, :], axis=2)
+        chunk_values = np.sum(nuclear_charges/distances, axis=1)
+
+        # Shell pairs are evaluated in groups of the same maximum order of
+        # the Hermite Gaussians.
+        for order in np.unique(shell_pair_orders[significant]):
+            selected = np.flatnonzero(significant & (shell_pair_orders == order))
+            selected_p = shell_pair_p[selected, np.newaxis]
+            integrals = _hermite_coulomb_integrals(
+                int(order),
+                selected_p,
+                shell_pair_centers[selected, np.newaxis, :] - chunk[np.newaxis, :, :]
+            )
+            scaled_coefficients = coefficients[selected]*(2*np.pi/selected_p)
+            for k, index in enumerate(hermite_indices[:len(integrals)]):
+                chunk_values -= scaled_coefficients[:, k] @ integrals[index]
+
+        values[start:start + chunk_size] = chunk_values
+
+    return Field(mesh, values)
+
+
 def voronoi(mesh: AbstractMesh, molecule: Molecule[AtomWithCoords]) -> Field[Tuple[Optional[int], Dist]]:
     """Find the atom closest to each point and its distance
 
@@ -90,6 +383,117 @@ def voronoi(mesh: AbstractMesh, molecule: Molecule[AtomWithCoords]) -> Field[Tup
     )
 
 
+def group_close_points(mesh: AbstractMesh, tolerance: float) -> np.ndarray:
+    """Group points of a mesh lying within a tolerance of each other
+
+    Two points belong to the same group if they are no farther apart than
+    `tolerance` or are linked by a chain of such points. The pairs of close
+    points are found with the `AbstractMesh.spatial_index` of the mesh, so
+    the cost scales as O(N log N) in the number of points.
+
+    Parameters
+    ----------
+    mesh : AbstractMesh
+        The mesh, e.g. combined from fitting points generated in several
+        molecular orientations.
+    tolerance : float
+        The maximum distance between points considered duplicates.
+
+    Returns
+    -------
+    np.ndarray
+        Array of the group of each of the points. The groups are numbered
+        from zero in the order of their first point.
+    """
+    point_count = len(mesh)
+    pairs = mesh.spatial_index.pairs(tolerance)
+    _, components = connected_components(
+        coo_matrix(
+            (np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])),
+            shape=(point_count, point_count)
+        ),
+        directed=False
+    )
+    _, first_points, inverse = np.unique(components, return_index=True, return_inverse=True)
+    ranks = np.empty(len(first_points), dtype=int)
+    ranks[np.argsort(first_points)] = np.arange(len(first_points))
+    result: np.ndarray = ranks[inverse.ravel()]
+    return result
+
+
+def _merge_groups(groups: np.ndarray, values: np.ndarray, average: bool) -> np.ndarray:
+    group_count = int(groups.max(initial=-1)) + 1
+    if not average:
+        return values[np.unique(groups, return_index=True)[1]]
+    sums = np.zeros((group_count,) + values.shape[1:])
+    np.add.at(sums, groups, values)
+    counts = np.bincount(groups, minlength=group_count)
+    return sums/counts.reshape((-1,) + (1,)*(values.ndim - 1))
+
+
+def merge_close_points(mesh: AbstractMesh, tolerance: float, average: bool=False) -> ArrayMesh:
+    """Merge points of a mesh lying within a tolerance of each other
+
+    Parameters
+    ----------
+    mesh : AbstractMesh
+        The mesh containing near-duplicate points.
+    tolerance : float
+        The maximum distance between points considered duplicates. See
+        `group_close_points` for details.
+    average : bool, optional
+        Whether each group of duplicate points should be replaced by their
+        average position. Defaults to False, in which case the first point of
+        each group is kept.
+
+    Returns
+    -------
+    ArrayMesh
+        The mesh with a single point for each group of duplicate points, in
+        the order of their first occurrence.
+    """
+    groups = group_close_points(mesh, tolerance)
+    return ArrayMesh(_merge_groups(groups, mesh.as_array(), average))
+
+
+def merge_close_field_points(
+    field: Field[Field.NumericValue],
+    tolerance: float,
+    average: bool=False
+) -> Field[Field.NumericValue]:
+    """Merge points of a field's mesh lying within a tolerance of each other
+
+    Duplicate fitting points, e.g. from fitting points combined from several
+    molecular orientations, increase the cost of the fitting and bias it
+    towards the regions in which they occur.
+
+    Parameters
+    ----------
+    field : Field[Field.NumericValue]
+        The field, e.g. the ESP field of `EspData`, at a mesh containing
+        near-duplicate points.
+    tolerance : float
+        The maximum distance between points considered duplicates. See
+        `group_close_points` for details.
+    average : bool, optional
+        Whether each group of duplicate points should be replaced by their
+        average position and the average of their values. Defaults to False,
+        in which case the first point of each group and its value are kept.
+
+    Returns
+    -------
+    Field[Field.NumericValue]
+        The field with a single point for each group of duplicate points, in
+        the order of their first occurrence. The values are stored in a
+        numpy array.
+    """
+    groups = group_close_points(field.mesh, tolerance)
+    return Field(
+        ArrayMesh(_merge_groups(groups, field.mesh.as_array(), average)),
+        _merge_groups(groups, np.asarray(field.values, dtype=float), average)
+    )
+
+
 # Meant to mirror fields.Field.NumericValue, and similarly the bound should be
 # numbers.Number but mypy throws errors.
 NumericValue = TypeVar('NumericValue', bound=float)
@@ -0,0 +1,656 @@
+"""Persistent catalogue of data parsed from many calculation files
+
+Pipelines processing a project of many calculations often need the same
+information, e.g. the charges from Gaussian output, every time they are run.
+The `Catalogue` stores the parsed data in an SQLite database and, when
+updated, only parses the files which changed since they were last parsed.
+Queries return the same dataclasses as the corresponding parsers.
+
+The supported files are Gaussian output (.log and .out), .esp files in the
+Gaussian format and "respin" files (.respin, .respin1, .respin2 etc.). The
+files may be compressed with gzip, bzip2 or xz, e.g. "job.log.gz" (see
+`repESP.util.open_file`).
+"""
+
+from repESP.charges import AtomWithCoordsAndCharge, Charge
+from repESP.equivalence import Equivalence
+from repESP.esp_util import parse_gaussian_esp
+from repESP.exceptions import InputFormatError
+from repESP.fields import Esp
+from repESP.gaussian_format import ChargesSectionData, EspChargesSectionData
+from repESP.gaussian_format import EspChargesSectionParser, get_charges_sections_from_log
+from repESP.log_ingestion import charge_type_parsers
+from repESP.respin_format import get_equivalence_from_two_stage_resp_ivary, parse_respin, Respin
+from repESP.types import Atom, Coords, Molecule
+from repESP.util import open_file, _strip_compressed_extension
+
+from dataclasses import asdict
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from typing import Any, cast, Dict, Iterable, List, Optional, Tuple
+
+
+_SCHEMA = """
+CREATE TABLE files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    kind TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    error TEXT
+);
+CREATE TABLE charges (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    charge_type TEXT NOT NULL,
+    occurrence INTEGER NOT NULL,
+    atom_index INTEGER NOT NULL,
+    charge REAL NOT NULL,
+    PRIMARY KEY (file_id, charge_type, occurrence, atom_index)
+);
+CREATE TABLE esp_fit_stats (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    charge_type TEXT NOT NULL,
+    occurrence INTEGER NOT NULL,
+    rms REAL NOT NULL,
+    rrms REAL NOT NULL,
+    PRIMARY KEY (file_id, charge_type, occurrence)
+);
+CREATE TABLE atoms (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    atom_index INTEGER NOT NULL,
+    atomic_number INTEGER NOT NULL,
+    x REAL,
+    y REAL,
+    z REAL,
+    charge REAL,
+    PRIMARY KEY (file_id, atom_index)
+);
+CREATE TABLE respins (
+    file_id INTEGER PRIMARY KEY REFERENCES files(id) ON DELETE CASCADE,
+    respin TEXT NOT NULL
+);
+"""
+
+_TABLES = set(re.findall(r"^CREATE TABLE (\w+)", _SCHEMA, re.MULTILINE))
+
+
+def _get_kind(path: str) -> Optional[str]:
+    path = _strip_compressed_extension(path)
+    if path.endswith((".log", ".out")):
+        return "log"
+    if path.endswith(".esp"):
+        return "esp"
+    if re.search(r"\.respin\d*$", path):
+        return "respin"
+    return None
+
+
+def _hash_file(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024**2), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _dump_respin(respin: Respin) -> str:
+    return json.dumps({
+        "title": respin.title,
+        "cntrl": asdict(respin.cntrl),
+        "structures": [
+            {
+                "subtitle": structure.subtitle,
+                "charge": structure.charge,
+                "atomic_numbers": [atom.atomic_number for atom in structure.molecule.atoms],
+                "ivary": structure.ivary.values,
+                "wtmol": structure.wtmol,
+            }
+            for structure in respin.structures
+        ],
+        "structure_equivalence": respin.structure_equivalence,
+    })
+
+
+def _load_respin(dumped: str) -> Respin:
+    data = json.loads(dumped)
+    structures = [
+        Respin.Structure(
+            structure["subtitle"],
+            structure["charge"],
+            Molecule([Atom(atomic_number) for atomic_number in structure["atomic_numbers"]]),
+            Respin.Ivary(structure["ivary"]),
+            structure["wtmol"]
+        )
+        for structure in data["structures"]
+    ]
+    first_structure, *additional_structures = structures
+    return Respin(
+        data["title"],
+        Respin.Cntrl(**data["cntrl"]),
+        first_structure.subtitle,
+        first_structure.charge,
+        first_structure.molecule,
+        first_structure.ivary,
+        first_structure.wtmol,
+        additional_structures,
+        [[(structure, atom) for structure, atom in group] for group in data["structure_equivalence"]]
+    )
+
+
+class Catalogue:
+    """Persistent catalogue of data parsed from calculation files
+
+    The catalogue stores, for every added file:
+
+    * Gaussian output: all the occurrences of the charges of the types
+      supported by `repESP.log_ingestion.charge_type_parsers` and, for ESP
+      charges, the fit statistics.
+    * Gaussian .esp files: the molecule, i.e. the identities, coordinates and
+      charges of the atoms.
+    * "respin" files: the complete ``resp`` instructions, including the
+      molecule and the "ivary" values which describe the atom equivalence.
+
+    A file is parsed again when it is updated only if its size or modification
+    time changed and, additionally, its SHA-256 hash is different from the one
+    recorded when the file was last parsed. Errors encountered in parsing a
+    file are recorded and raised when its data is queried.
+
+    The catalogue can be used as a context manager, which closes the
+    database connection on exit.
+
+    Parameters
+    ----------
+    path : str
+        Path to the SQLite database file. It will be created if it does not
+        exist. An existing catalogue created with an incompatible version of
+        this class is emptied, while any other existing database is left
+        untouched.
+
+    Raises
+    ------
+    ValueError
+        Raised when the file exists but is not a catalogue, i.e. it is not
+        an SQLite database or contains tables other than those of a
+        catalogue.
+
+    Attributes
+    ----------
+    path
+        See initialization parameter
+    """
+
+    _version = 1
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        try:
+            self._init_schema()
+        except BaseException:
+            self._connection.close()
+            raise
+
+    def _init_schema(self) -> None:
+        try:
+            self._connection.execute("PRAGMA foreign_keys = ON")
+            version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+            tables = {
+                name for (name,) in self._connection.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table'"
+                )
+            }
+        except sqlite3.DatabaseError as e:
+            raise ValueError(f"File is not a catalogue database: {self.path} ({e}).")
+
+        if tables and version == self._version and tables == _TABLES:
+            return
+
+        # Only an empty database or one created by this class (which sets the
+        # version to a positive value) may be (re)initialized, so that
+        # pointing the catalogue at an unrelated database does not destroy it.
+        if tables and (version < 1 or not tables <= _TABLES):
+            raise ValueError(
+                f"File is not a catalogue database: {self.path} (contains "
+                f"unexpected tables: {sorted(tables - _TABLES) or sorted(tables)})."
+            )
+
+        self._connection.executescript(
+            "".join(f"DROP TABLE {table};" for table in sorted(tables)) +
+            _SCHEMA +
+            f"PRAGMA user_version = {self._version};"
+        )
+
+    def close(self) -> None:
+        """Close the database connection"""
+        self._connection.close()
+
+    def __enter__(self) -> "Catalogue":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def update(self, paths: Iterable[str]) -> List[str]:
+        """Add files to the catalogue or update their data if they changed
+
+        Parameters
+        ----------
+        paths : typing.Iterable[str]
+            Paths to the files to be added or updated.
+
+        Raises
+        ------
+        ValueError
+            Raised when the type of any of the files is not supported, based on
+            its extension. In this case the catalogue is not modified.
+        OSError
+            Raised when any of the files cannot be read.
+
+        Returns
+        -------
+        typing.List[str]
+            The absolute paths of the files which were parsed, i.e. the files
+            which were not in the catalogue or changed since they were added.
+        """
+        paths = [os.path.abspath(path) for path in paths]
+        unsupported = [path for path in paths if _get_kind(path) is None]
+        if unsupported:
+            raise ValueError(f"Unsupported types of files: {unsupported}.")
+
+        parsed = []
+        for path in paths:
+            if self._update_file(path):
+                parsed.append(path)
+        return parsed
+
+    def update_directory(self, directory: str) -> List[str]:
+        """Add or update all the supported files in a directory tree
+
+        Parameters
+        ----------
+        directory : str
+            Path to the directory to be searched recursively.
+
+        Returns
+        -------
+        typing.List[str]
+            See return value of the `update` method.
+        """
+        paths = []
+        for dir_path, _dir_names, file_names in os.walk(directory):
+            for file_name in file_names:
+                if _get_kind(file_name) is not None:
+                    paths.append(os.path.join(dir_path, file_name))
+        return self.update(sorted(paths))
+
+    def prune(self) -> List[str]:
+        """Remove files which no longer exist from the catalogue
+
+        Returns
+        -------
+        typing.List[str]
+            The absolute paths of the removed files.
+        """
+        removed = [
+            path for (path,) in self._connection.execute("SELECT path FROM files").fetchall()
+            if not os.path.isfile(path)
+        ]
+        with self._connection:
+            self._connection.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in removed])
+        return removed
+
+    def get_paths(self) -> List[str]:
+        """Get the absolute paths of all the files in the catalogue, sorted"""
+        return [
+            path for (path,) in
+            self._connection.execute("SELECT path FROM files ORDER BY path")
+        ]
+
+    def get_errors(self) -> Dict[str, str]:
+        """Get the errors encountered in parsing the files in the catalogue
+
+        Returns
+        -------
+        typing.Dict[str, str]
+            Mapping from the absolute paths of the files which could not be
+            parsed to the error messages.
+        """
+        return dict(self._connection.execute(
+            "SELECT path, error FROM files WHERE error IS NOT NULL ORDER BY path"
+        ).fetchall())
+
+    def _update_file(self, path: str) -> bool:
+        stat = os.stat(path)
+        row = self._connection.execute(
+            "SELECT id, size, mtime_ns, sha256 FROM files WHERE path = ?", (path,)
+        ).fetchone()
+
+        if row is not None and (row[1], row[2]) == (stat.st_size, stat.st_mtime_ns):
+            return False
+
+        sha256 = _hash_file(path)
+        if row is not None and row[3] == sha256:
+            # Only touched, the parsed data remains valid.
+            with self._connection:
+                self._connection.execute(
+                    "UPDATE files SET size = ?, mtime_ns = ? WHERE id = ?",
+                    (stat.st_size, stat.st_mtime_ns, row[0])
+                )
+            return False
+
+        kind = _get_kind(path)
+        with self._connection:
+            self._connection.execute("DELETE FROM files WHERE path = ?", (path,))
+            file_id = cast(int, self._connection.execute(
+                "INSERT INTO files (path, kind, size, mtime_ns, sha256) VALUES (?, ?, ?, ?, ?)",
+                (path, kind, stat.st_size, stat.st_mtime_ns, sha256)
+            ).lastrowid)
+            try:
+                if kind == "log":
+                    self._insert_log(file_id, path)
+                elif kind == "esp":
+                    self._insert_esp(file_id, path)
+                else:
+                    self._insert_respin(file_id, path)
+            except Exception as e:
+                # Any failure of the parser is recorded for the file, as
+                # malformed files can raise other exceptions than
+                # InputFormatError, e.g. an IndexError for a truncated file.
+                for table in ["charges", "esp_fit_stats", "atoms", "respins"]:
+                    self._connection.execute(f"DELETE FROM {table} WHERE file_id = ?", (file_id,))
+                self._connection.execute(
+                    "UPDATE files SET error = ? WHERE id = ?",
+                    (f"{type(e).__name__}: {e}", file_id)
+                )
+
+        return True
+
+    def _insert_log(self, file_id: int, path: str) -> None:
+        sections = get_charges_sections_from_log(path, list(charge_type_parsers.values()))
+
+        for charge_type, charges_section_parser in charge_type_parsers.items():
+            for occurrence, section in enumerate(sections[charges_section_parser]):
+                self._connection.executemany(
+                    "INSERT INTO charges VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (file_id, charge_type, occurrence, atom_index, float(charge))
+                        for atom_index, charge in enumerate(section.charges)
+                    ]
+                )
+                if isinstance(section, EspChargesSectionData):
+                    self._connection.execute(
+                        "INSERT INTO esp_fit_stats VALUES (?, ?, ?, ?, ?)",
+                        (file_id, charge_type, occurrence, float(section.rms), float(section.rrms))
+                    )
+
+    def _insert_esp(self, file_id: int, path: str) -> None:
+        gaussian_esp_data = parse_gaussian_esp(path, array_backed=True)
+
+        self._connection.executemany(
+            "INSERT INTO atoms VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (file_id, atom_index, atom.atomic_number, *map(float, atom.coords), float(atom.charge))
+                for atom_index, atom in enumerate(gaussian_esp_data.molecule.atoms)
+            ]
+        )
+
+    def _insert_respin(self, file_id: int, path: str) -> None:
+        with open_file(path) as f:
+            respin = parse_respin(f)
+
+        self._connection.executemany(
+            "INSERT INTO atoms (file_id, atom_index, atomic_number) VALUES (?, ?, ?)",
+            [
+                (file_id, atom_index, atom.atomic_number)
+                for atom_index, atom in enumerate(respin.molecule.atoms)
+            ]
+        )
+        self._connection.execute(
+            "INSERT INTO respins VALUES (?, ?)",
+            (file_id, _dump_respin(respin))
+        )
+
+    def _get_file(self, path: str, kinds: List[str]) -> Tuple[int, str]:
+        path = os.path.abspath(path)
+        row = self._connection.execute(
+            "SELECT id, kind, error FROM files WHERE path = ?", (path,)
+        ).fetchone()
+
+        if row is None:
+            raise KeyError(f"File not in catalogue: {path}")
+        file_id, kind, error = row
+        if kind not in kinds:
+            raise ValueError(f"Expected a file of type {kinds} but '{path}' is of type '{kind}'.")
+        if error is not None:
+            raise InputFormatError(f"Parsing '{path}' failed with {error}")
+        return file_id, kind
+
+    @staticmethod
+    def _verify_charge_type(charge_type: str) -> None:
+        if charge_type not in charge_type_parsers:
+            raise ValueError(
+                f"Unsupported charge type: {charge_type}. Supported charge "
+                f"types are: {list(charge_type_parsers)}."
+            )
+
+    def get_charges_sections(self, path: str, charge_type: str) -> List[ChargesSectionData]:
+        """Get all the charges sections of the given type from Gaussian output
+
+        Parameters
+        ----------
+        path : str
+            Path to the Gaussian output file.
+        charge_type : str
+            Name of the charge type, which must be a key of
+            `repESP.log_ingestion.charge_type_parsers`, e.g. "mk".
+
+        Raises
+        ------
+        KeyError
+            Raised when the file is not in the catalogue.
+        ValueError
+            Raised when the file is not a Gaussian output file or the charge
+            type is not supported.
+        InputFormatError
+            Raised when the file could not be parsed.
+
+        Returns
+        -------
+        typing.List[ChargesSectionData]
+            The data from every occurrence of the charges section, as returned
+            by `get_charges_sections_from_log`. For ESP charges, these are
+            `EspChargesSectionData` objects.
+        """
+        self._verify_charge_type(charge_type)
+        file_id, _ = self._get_file(path, ["log"])
+
+        charges: Dict[int, List[Charge]] = {}
+        for occurrence, charge in self._connection.execute(
+            "SELECT occurrence, charge FROM charges WHERE file_id = ? AND charge_type = ? "
+            "ORDER BY occurrence, atom_index",
+            (file_id, charge_type)
+        ):
+            charges.setdefault(occurrence, []).append(Charge(charge))
+
+        if not isinstance(charge_type_parsers[charge_type], EspChargesSectionParser):
+            return [ChargesSectionData(charges[occurrence]) for occurrence in sorted(charges)]
+
+        return [
+            EspChargesSectionData(charges[occurrence], Esp(rms), rrms)
+            for occurrence, rms, rrms in self._connection.execute(
+                "SELECT occurrence, rms, rrms FROM esp_fit_stats WHERE file_id = ? AND charge_type = ? "
+                "ORDER BY occurrence",
+                (file_id, charge_type)
+            )
+        ]
+
+    def _get_charges_section(self, path: str, charge_type: str, occurrence: int) -> ChargesSectionData:
+        charges_sections = self.get_charges_sections(path, charge_type)
+        try:
+            return charges_sections[occurrence]
+        except IndexError:
+            raise IndexError(
+                f"Cannot find occurrence {occurrence} of {charge_type} charges in "
+                f"'{path}', which contains {len(charges_sections)} such sections."
+            )
+
+    def get_charges(self, path: str, charge_type: str, occurrence: int=-1) -> List[Charge]:
+        """Get the charges of the given type from Gaussian output
+
+        This is the catalogue equivalent of `get_charges_from_log`.
+
+        Parameters
+        ----------
+        path : str
+            Path to the Gaussian output file.
+        charge_type : str
+            See `get_charges_sections` method parameter
+        occurrence : int, optional
+            Which occurrence of the charges section to use, following Python
+            indexing semantics. Defaults to -1, i.e. the last section.
+
+        Raises
+        ------
+        KeyError
+            Raised when the file is not in the catalogue.
+        ValueError
+            Raised when the file is not a Gaussian output file or the charge
+            type is not supported.
+        InputFormatError
+            Raised when the file could not be parsed.
+        IndexError
+            Raised when the requested occurrence of the charges section was not
+            found in the file.
+
+        Returns
+        -------
+        typing.List[Charge]
+            List of charges in order of occurrence in output file.
+        """
+        return self._get_charges_section(path, charge_type, occurrence).charges
+
+    def get_esp_fit_stats(self, path: str, charge_type: str, occurrence: int=-1) -> Tuple[Esp, float]:
+        """Get the ESP fit statistics for the given charge type from Gaussian output
+
+        This is the catalogue equivalent of `get_esp_fit_stats_from_log`. See
+        `get_charges` method for parameters and raised exceptions. A
+        `ValueError` is also raised when the charge type is not ESP-based.
+
+        Returns
+        -------
+        Tuple[Esp, float]
+            RMS and RRMS.
+        """
+        if not isinstance(charge_type_parsers.get(charge_type), EspChargesSectionParser):
+            raise ValueError(f"Charge type {charge_type} is not ESP-based.")
+        section = self._get_charges_section(path, charge_type, occurrence)
+        assert isinstance(section, EspChargesSectionData)
+        return (section.rms, section.rrms)
+
+    def get_molecule(self, path: str) -> Molecule[Atom]:
+        """Get the molecule described by an .esp or "respin" file
+
+        Parameters
+        ----------
+        path : str
+            Path to the .esp or "respin" file.
+
+        Raises
+        ------
+        KeyError
+            Raised when the file is not in the catalogue.
+        ValueError
+            Raised when the file is neither an .esp nor a "respin" file.
+        InputFormatError
+            Raised when the file could not be parsed.
+
+        Returns
+        -------
+        Molecule[Atom]
+            For .esp files, the atoms are `AtomWithCoordsAndCharge` objects as
+            in the `GaussianEspData.molecule` attribute. For "respin" files,
+            the atoms are described only with their identities, as in the
+            `Respin.molecule` attribute.
+        """
+        file_id, kind = self._get_file(path, ["esp", "respin"])
+
+        rows = self._connection.execute(
+            "SELECT atomic_number, x, y, z, charge FROM atoms WHERE file_id = ? ORDER BY atom_index",
+            (file_id,)
+        ).fetchall()
+
+        if kind == "respin":
+            return Molecule([Atom(atomic_number) for atomic_number, *_ in rows])
+        return Molecule([
+            AtomWithCoordsAndCharge(
+                atomic_number=atomic_number,
+                coords=Coords((x, y, z)),
+                charge=Charge(charge)
+            )
+            for atomic_number, x, y, z, charge in rows
+        ])
+
+    def get_respin(self, path: str) -> Respin:
+        """Get the ``resp`` instructions from a "respin" file
+
+        Parameters
+        ----------
+        path : str
+            Path to the "respin" file.
+
+        Raises
+        ------
+        KeyError
+            Raised when the file is not in the catalogue.
+        ValueError
+            Raised when the file is not a "respin" file.
+        InputFormatError
+            Raised when the file could not be parsed.
+
+        Returns
+        -------
+        Respin
+            The instructions, as returned by `parse_respin`.
+        """
+        file_id, _ = self._get_file(path, ["respin"])
+        (dumped,) = self._connection.execute(
+            "SELECT respin FROM respins WHERE file_id = ?", (file_id,)
+        ).fetchone()
+        return _load_respin(dumped)
+
+    def get_equivalence(self, respin1_path: str, respin2_path: str) -> Equivalence:
+        """Get the atom equivalence from "respin" files for two-stage RESP
+
+        This is the catalogue equivalent of
+        `get_equivalence_from_two_stage_resp_ivary`, see its documentation for
+        details.
+
+        Parameters
+        ----------
+        respin1_path : str
+            Path to the "respin" file for the first stage of the fitting.
+        respin2_path : str
+            Path to the "respin" file for the second stage of the fitting.
+
+        Raises
+        ------
+        KeyError
+            Raised when any of the files is not in the catalogue.
+        ValueError
+            Raised when any of the files is not a "respin" file.
+        InputFormatError
+            Raised when any of the files could not be parsed.
+
+        Returns
+        -------
+        Equivalence
+            The atom equivalence information.
+        """
+        return get_equivalence_from_two_stage_resp_ivary(
+            self.get_respin(respin1_path).ivary,
+            self.get_respin(respin2_path).ivary
+        )
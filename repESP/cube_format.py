@@ -3,11 +3,16 @@
 from repESP.charges import AtomWithCoordsAndCharge, Charge
 from repESP.fields import Ed, Esp, Field, FieldValue, GridMesh
 from repESP.exceptions import InputFormatError
+from repESP.sidecar_cache import CachedData, SidecarCache
 from repESP.types import Coords, Coords, Molecule
-from repESP._util import get_line
+from repESP.util import FileOrPath
+from repESP._util import get_line, open_if_path, parse_float_array, read_float_array
 
 from dataclasses import dataclass
-from typing import Callable, Generic, List, TextIO, Tuple
+from io import StringIO
+import os
+import numpy as np
+from typing import Any, BinaryIO, Callable, cast, Dict, Generic, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple, Union
 
 
 @dataclass
@@ -120,7 +125,7 @@ def _parse_atom(line: str) -> AtomWithCoordsAndCharge:
 
 
 def parse_cube(
-    f: TextIO,
+    f: FileOrPath,
     make_value: Callable[[Cube.Info, str], FieldValue]
 ) -> Cube[FieldValue]:
     """Parse a file in the Gaussian "cube" file format
@@ -134,8 +139,10 @@ def parse_cube(
 
     Parameters
     ----------
-    f : TextIO
-        File object opened in read mode containing the cube file to be parsed.
+    f : FileOrPath
+        File object opened in read mode containing the cube file to be parsed
+        or the path of the file, which may be compressed (see
+        `util.open_file`).
     make_value : Callable[[Cube.Info, str], FieldValue]
         A function taking two parameters: the cube information and a string
         representing the field value. The function should parse the field value
@@ -164,6 +171,25 @@ def parse_cube(
         Data from the parsed cube file.
     """
 
+    with open_if_path(f) as opened:
+        info, molecule, grid = _parse_header(opened)
+
+        # Field values
+        value_ctor: Callable[[str], FieldValue] = lambda x: make_value(info, x)
+        values = [value_ctor(x) for x in opened.read().split()]
+
+    return Cube(
+        info,
+        molecule,
+        # The implicit assumption here is that the order of points in `grid`
+        # is the same as the order of `values`. This is correct, as the order
+        # of points in a GridMesh is the same as that in a cube file.
+        Field(grid, values)
+    )
+
+
+def _parse_header(f: TextIO) -> Tuple[Cube.Info, Molecule[AtomWithCoordsAndCharge], GridMesh]:
+
     # Lines 1-2
     info = Cube.Info(input_line=get_line(f), title_line=get_line(f))
 
@@ -181,38 +207,90 @@ def parse_cube(
         _parse_atom(get_line(f)) for i in range(grid_prelude.atom_count)
     ])
 
-    # Field values
-    value_ctor: Callable[[str], FieldValue] = lambda x: make_value(info, x)
-    values = [value_ctor(x) for x in f.read().split()]
-
-    return Cube(
-        info,
-        molecule,
-        # The implicit assumption here is that the order of points in `grid`
-        # is the same as the order of `values`. This is correct, as the order
-        # of points in a GridMesh is the same as that in a cube file.
-        Field(grid, values)
+    return info, molecule, grid
+
+
+def _dump_header(
+    info: Cube.Info,
+    molecule: Molecule[AtomWithCoordsAndCharge],
+    grid: GridMesh
+) -> Dict[str, Any]:
+    return {
+        "input_line": info.input_line,
+        "title_line": info.title_line,
+        "atoms": [
+            [atom.atomic_number, atom.charge, *atom.coords] for atom in molecule.atoms
+        ],
+        "origin": list(grid.origin),
+        "axes": [[axis.point_count, *axis.vector] for axis in grid.axes],
+    }
+
+
+def _load_header(
+    header: Dict[str, Any]
+) -> Tuple[Cube.Info, Molecule[AtomWithCoordsAndCharge], GridMesh]:
+    info = Cube.Info(header["input_line"], header["title_line"])
+    molecule = Molecule([
+        AtomWithCoordsAndCharge(atomic_number, Coords(coords), Charge(charge))
+        for atomic_number, charge, *coords in header["atoms"]
+    ])
+    grid = GridMesh(
+        Coords(header["origin"]),
+        GridMesh.Axes(
+            GridMesh.Axis(Coords(vector), point_count)
+            for point_count, *vector in header["axes"]
+        )
     )
+    return info, molecule, grid
 
 
 def _parse_cube_by_title_common(
+    f: TextIO,
     expected_title_start: str,
-    value_ctor: Callable[[str], FieldValue],
-    verify_title: bool
-) -> Callable[[Cube.Info, str], FieldValue]:
+    value_ctor: Callable[[Union[str, float]], FieldValue],
+    verify_title: bool,
+    array_backed: bool,
+    cache: Optional[SidecarCache]
+) -> Cube[FieldValue]:
 
-    def make_value(info: Cube.Info, value: str) -> FieldValue:
-        check_title: Callable[[str], bool] = lambda title: title.startswith(expected_title_start)
-        if verify_title and not check_title(info.title_line):
-            raise InputFormatError(
-                f'Title of cube file does not start with "{expected_title_start}".'
-            )
-        return value_ctor(value)
+    cached = cache.load(f, "cube") if cache is not None else None
+
+    if cached is None:
+        info, molecule, grid = _parse_header(f)
+    else:
+        info, molecule, grid = _load_header(cached.header)
+
+    # The title is verified once rather than for every value.
+    if verify_title and not info.title_line.startswith(expected_title_start):
+        raise InputFormatError(
+            f'Title of cube file does not start with "{expected_title_start}".'
+        )
 
-    return make_value
+    if cached is None and not array_backed and cache is None:
+        return Cube(info, molecule, Field(grid, [value_ctor(x) for x in f.read().split()]))
 
+    values_array = read_float_array(f) if cached is None else cached.values
 
-def parse_esp_cube(f: TextIO, verify_title: bool=True) -> Cube[Esp]:
+    values: Union[List[FieldValue], np.ndarray]
+    if array_backed:
+        values = values_array
+    else:
+        values = [value_ctor(x) for x in values_array.tolist()]
+
+    cube = Cube(info, molecule, Field(grid, values))
+
+    if cache is not None and cached is None:
+        cache.store(f, "cube", CachedData(_dump_header(info, molecule, grid), values_array))
+
+    return cube
+
+
+def parse_esp_cube(
+    f: FileOrPath,
+    verify_title: bool=True,
+    array_backed: bool=False,
+    cache: Optional[SidecarCache]=None
+) -> Cube[Esp]:
     """Parse a Gaussian "cube" file describing an ESP field
 
     If your cube file comes from elsewhere than Gaussian, you should ensure
@@ -220,25 +298,46 @@ def parse_esp_cube(f: TextIO, verify_title: bool=True) -> Cube[Esp]:
 
     Parameters
     ----------
-    f : TextIO
-        File object opened in read mode containing the cube file to be parsed.
+    f : FileOrPath
+        File object opened in read mode containing the cube file to be parsed
+        or the path of the file, which may be compressed (see
+        `util.open_file`).
     verify_title : bool, optional
         If this flag is set to True (default), an `InputFormatError` will
         be raised if the cube title does not start with the string
         ``" Electrostatic potential"``.
+    array_backed : bool, optional
+        Whether the values should be converted in bulk into an array-backed
+        `Field`, which is much faster for large cube files. Defaults to False,
+        in which case the values are stored as a list of `Esp` objects.
+    cache : typing.Optional[SidecarCache], optional
+        If given, the parsed cube is stored in the cache and later parsing of
+        the same, unmodified file reads the cached data instead of parsing
+        the text. Array-backed fields loaded from the cache are memory-mapped.
+        Defaults to None.
 
     Returns
     -------
     Cube[Esp]
         Data from the parsed cube file.
     """
-    return parse_cube(
-        f,
-        _parse_cube_by_title_common(" Electrostatic potential", Esp, verify_title)
-    )
+    with open_if_path(f) as opened:
+        return _parse_cube_by_title_common(
+            opened,
+            " Electrostatic potential",
+            Esp,
+            verify_title,
+            array_backed,
+            cache
+        )
 
 
-def parse_ed_cube(f: TextIO, verify_title: bool=True) -> Cube[Ed]:
+def parse_ed_cube(
+    f: FileOrPath,
+    verify_title: bool=True,
+    array_backed: bool=False,
+    cache: Optional[SidecarCache]=None
+) -> Cube[Ed]:
     """Parse a Gaussian "cube" file describing electron density field
 
     If your cube file comes from elsewhere than Gaussian, you should ensure
@@ -247,66 +346,541 @@ def parse_ed_cube(f: TextIO, verify_title: bool=True) -> Cube[Ed]:
 
     Parameters
     ----------
-    f : TextIO
-        File object opened in read mode containing the cube file to be parsed.
+    f : FileOrPath
+        File object opened in read mode containing the cube file to be parsed
+        or the path of the file, which may be compressed (see
+        `util.open_file`).
     verify_title : bool, optional
         If this flag is set to True (default), an `InputFormatError` will
         be raised if the cube title does not start with the string
         ``" Electron density"``.
+    array_backed : bool, optional
+        Whether the values should be converted in bulk into an array-backed
+        `Field`, which is much faster for large cube files. Defaults to False,
+        in which case the values are stored as a list of `Ed` objects.
+    cache : typing.Optional[SidecarCache], optional
+        If given, the parsed cube is stored in the cache and later parsing of
+        the same, unmodified file reads the cached data instead of parsing
+        the text. Array-backed fields loaded from the cache are memory-mapped.
+        Defaults to None.
 
     Returns
     -------
     Cube[Ed]
         Data from the parsed cube file.
     """
-    return parse_cube(
-        f,
-        _parse_cube_by_title_common(" Electron density", Ed, verify_title)
-    )
+    with open_if_path(f) as opened:
+        return _parse_cube_by_title_common(
+            opened,
+            " Electron density",
+            Ed,
+            verify_title,
+            array_backed,
+            cache
+        )
 
-def write_cube(f: TextIO, cube: Cube[Field.NumericValue]) -> None:
+def write_cube(f: FileOrPath, cube: Cube[Field.NumericValue]) -> None:
     """Write a Gaussian "cube" file described by the given input data
 
     Parameters
     ----------
-    f : TextIO
-        File object to which the supplied data is to be saved. Must be opened
-        in write mode.
+    f : FileOrPath
+        File object to which the supplied data is to be saved, which must be
+        opened in write mode, or the path of the file. The file is compressed
+        if the path has a .gz, .bz2 or .xz extension (see `util.open_file`).
     cube : Cube[Field.NumericValue]
         The dataclass containing the information needed to create a cube
         file. Note that only cube files describing fields with values matching
         `Field.NumericValue` are supported.
     """
 
-    f.write(f"{cube.info.input_line}\n{cube.info.title_line}\n")
-
     assert isinstance(cube.field.mesh, GridMesh)
 
+    with open_if_path(f, "w") as opened:
+        _write_header(opened, cube.info, cube.molecule, cube.field.mesh)
+        _write_values(opened, cube.field.values, cube.field.mesh.axes[2].point_count)
+
+
+def _write_header(
+    f: TextIO,
+    info: Cube.Info,
+    molecule: Molecule[AtomWithCoordsAndCharge],
+    mesh: GridMesh
+) -> None:
+
+    f.write(f"{info.input_line}\n{info.title_line}\n")
+
     f.write(' {0:4}   {1: .6f}   {2: .6f}   {3: .6f}    1\n'.format(
-        len(cube.molecule.atoms),
-        *cube.field.mesh.origin
+        len(molecule.atoms),
+        *mesh.origin
     ))
 
-    for axis in cube.field.mesh.axes:
+    for axis in mesh.axes:
         f.write(' {0:4}   {1: .6f}   {2: .6f}   {3: .6f}\n'.format(
             axis.point_count,
             *axis.vector
         ))
 
-    for atom in cube.molecule.atoms:
+    for atom in molecule.atoms:
         f.write(' {0:4}   {1: .6f}   {2: .6f}   {3: .6f}   {4: .6f}\n'.format(
             atom.atomic_number,
             atom.charge,
             *atom.coords
         ))
 
-    i = 1
-    for value in cube.field.values:
-        f.write(' {0: .5E}'.format(value))
-        if not i % 6:
-            f.write('\n')
-        if not i % cube.field.mesh.axes[2].point_count:
-            f.write('\n')
-            i = 1
-        else:
-            i += 1
+
+_WRITE_BLOCK_SIZE = 100000
+"""int : Approximate number of values formatted and written at once by `write_cube`"""
+
+
+def _get_row_format(row_length: int) -> str:
+    # Format of a row of values along the z axis. Values are written six per
+    # line and each row ends with a line break. Note that this results in an
+    # empty line when the row length is divisible by six, which Gaussian
+    # omits. Both layouts are accepted by the parsers.
+    return (" % .5E"*6 + "\n")*(row_length // 6) + " % .5E"*(row_length % 6) + "\n"
+
+
+def _write_values(f: TextIO, values: Union[Sequence[float], np.ndarray], row_length: int) -> None:
+    if row_length == 0:
+        return
+
+    row_format = _get_row_format(row_length)
+    rows_per_block = max(1, _WRITE_BLOCK_SIZE // row_length)
+    block_length = rows_per_block*row_length
+
+    values_array = np.asarray(values, dtype=float)
+    for start in range(0, len(values_array), block_length):
+        block = values_array[start:start+block_length]
+        f.write((row_format*(len(block) // row_length)) % tuple(block.tolist()))
+
+
+@dataclass
+class CubeSlabs:
+    """Dataclass representing a cube file read one x-slab at a time
+
+    The values of a cube file are ordered such that all the values for a given
+    index along the x axis, forming a slab of shape (ny, nz), are given
+    consecutively (see `GridMesh.points`). Processing the values slab by slab
+    thus only requires memory proportional to the size of a single slab.
+
+    Parameters
+    ----------
+    info : Cube.Info
+        Additional, less structured information about the cube file.
+    molecule : Molecule[AtomWithCoordsAndCharge]
+        The molecule which field is described by the cube file.
+    mesh : GridMesh
+        The grid of points at which the field values are given.
+    slabs : typing.Iterator[np.ndarray]
+        Iterator over the arrays of values for consecutive points along the x
+        axis, each of shape (ny, nz).
+
+    Attributes
+    ----------
+    info
+        See initialization parameter
+    molecule
+        See initialization parameter
+    mesh
+        See initialization parameter
+    slabs
+        See initialization parameter
+    """
+    info: Cube.Info
+    molecule: Molecule[AtomWithCoordsAndCharge]
+    mesh: GridMesh
+    slabs: Iterator[np.ndarray]
+
+
+_READ_CHUNK_SIZE = 1024**2
+"""int : Minimum number of characters read at once by `parse_cube_slabs`"""
+
+
+def parse_cube_slabs(f: TextIO) -> CubeSlabs:
+    """Parse a Gaussian "cube" file, reading the values one x-slab at a time
+
+    The header of the cube file is parsed immediately, while the values are
+    only read from the file as the slabs are iterated over. The file must thus
+    remain open until the iteration is finished. This allows processing cube
+    files which are too large to be read into memory, for example calculating
+    the difference between two cube files::
+
+        with open("a.cub") as a_file, open("b.cub") as b_file, open("diff.cub", "w") as out:
+            a, b = parse_cube_slabs(a_file), parse_cube_slabs(b_file)
+            write_cube_slabs(
+                out, a.info, a.molecule, a.mesh,
+                (a_slab - b_slab for a_slab, b_slab in zip(a.slabs, b.slabs))
+            )
+
+    Parameters
+    ----------
+    f : TextIO
+        File object opened in read mode containing the cube file to be parsed.
+
+    Raises
+    ------
+    InputFormatError
+        Raised when the file does not follow the expected format. Errors in the
+        values are only raised during the iteration over the slabs.
+
+    Returns
+    -------
+    CubeSlabs
+        The header information and the iterator over the slabs.
+    """
+    info, molecule, grid = _parse_header(f)
+    return CubeSlabs(info, molecule, grid, _iter_slabs(f, grid))
+
+
+def _iter_slabs(f: TextIO, grid: GridMesh) -> Iterator[np.ndarray]:
+    slab_shape = (grid.axes[1].point_count, grid.axes[2].point_count)
+    slab_size = slab_shape[0]*slab_shape[1]
+    # Assumes that values take about 13 characters, as in Gaussian's output.
+    chunks = _iter_float_chunks(f, max(_READ_CHUNK_SIZE, 13*slab_size))
+
+    buffered = [np.empty(0)]
+    buffered_size = 0
+    for _ in range(grid.axes[0].point_count):
+        while buffered_size < slab_size:
+            chunk = next(chunks, None)
+            if chunk is None:
+                raise InputFormatError(
+                    f"The number of values in the cube file is smaller than the "
+                    f"number of grid points ({len(grid)})."
+                )
+            buffered.append(chunk)
+            buffered_size += len(chunk)
+
+        values = np.concatenate(buffered)
+        yield values[:slab_size].reshape(slab_shape)
+        buffered = [values[slab_size:]]
+        buffered_size -= slab_size
+
+    if buffered_size or next(chunks, None) is not None:
+        raise InputFormatError(
+            f"The number of values in the cube file is larger than the number "
+            f"of grid points ({len(grid)})."
+        )
+
+
+def _iter_float_chunks(f: TextIO, chunk_size: int) -> Iterator[np.ndarray]:
+    # Yields non-empty arrays of the values in consecutive chunks of the file,
+    # taking care not to split values between chunks.
+    remainder = ""
+    while True:
+        text = f.read(chunk_size)
+        if not text:
+            break
+        text = remainder + text
+        split_index = max(text.rfind(" "), text.rfind("\n")) + 1
+        text, remainder = text[:split_index], text[split_index:]
+        values = parse_float_array(text)
+        if len(values):
+            yield values
+
+    values = parse_float_array(remainder)
+    if len(values):
+        yield values
+
+
+def write_cube_slabs(
+    f: FileOrPath,
+    info: Cube.Info,
+    molecule: Molecule[AtomWithCoordsAndCharge],
+    mesh: GridMesh,
+    slabs: Iterable[np.ndarray]
+) -> None:
+    """Write a Gaussian "cube" file from values given one x-slab at a time
+
+    The output is the same as that of `write_cube` for the same values but
+    only a single slab needs to be held in memory at any time.
+
+    Parameters
+    ----------
+    f : FileOrPath
+        File object to which the supplied data is to be saved, which must be
+        opened in write mode, or the path of the file. The file is compressed
+        if the path has a .gz, .bz2 or .xz extension (see `util.open_file`).
+    info : Cube.Info
+        Additional, less structured information about the cube file.
+    molecule : Molecule[AtomWithCoordsAndCharge]
+        The molecule which field is described by the cube file.
+    mesh : GridMesh
+        The grid of points at which the field values are given.
+    slabs : typing.Iterable[np.ndarray]
+        The values for consecutive points along the x axis, each of shape
+        (ny, nz). See `CubeSlabs.slabs`.
+
+    Raises
+    ------
+    ValueError
+        Raised when the shape or the number of the slabs does not match the mesh.
+    """
+    slab_shape = (mesh.axes[1].point_count, mesh.axes[2].point_count)
+
+    slab_count = 0
+    with open_if_path(f, "w") as opened:
+        _write_header(opened, info, molecule, mesh)
+
+        for slab in slabs:
+            if np.shape(slab) != slab_shape:
+                raise ValueError(
+                    f"Expected slab of shape {slab_shape} but got {np.shape(slab)}."
+                )
+            _write_values(opened, np.ravel(slab), slab_shape[1])
+            slab_count += 1
+
+    if slab_count != mesh.axes[0].point_count:
+        raise ValueError(
+            f"Expected {mesh.axes[0].point_count} slabs but got {slab_count}."
+        )
+
+
+class RandomAccessCube:
+    """Random access to the values of a cube file in the fixed-width layout
+
+    Cube files written by Gaussian (and `write_cube`) use fixed-width fields
+    for the values, six per line, with a line break at the end of each row of
+    values along the z axis. When the number of values in a row is divisible
+    by six, `write_cube` follows the row with an empty line, which Gaussian
+    omits, and both layouts are supported. The position of any value in the file
+    can thus be calculated, allowing selected values or regions of a large
+    cube file to be read without reading the whole file.
+
+    On initialization, the header is parsed and the layout of the values is
+    determined from the first row of values and verified against the size of
+    the file.
+
+    Parameters
+    ----------
+    f : BinaryIO
+        File object opened in binary read mode containing the cube file. The
+        file must remain open for as long as values are being read.
+
+    Raises
+    ------
+    InputFormatError
+        Raised when the file does not follow the expected format, including
+        when the values are not laid out in fixed-width fields.
+
+    Attributes
+    ----------
+    info : Cube.Info
+        Additional, less structured information about the cube file.
+    molecule : Molecule[AtomWithCoordsAndCharge]
+        The molecule which field is described by the cube file.
+    mesh : GridMesh
+        The grid of points at which the field values are given.
+    """
+
+    _values_per_line = 6
+
+    def __init__(self, f: BinaryIO) -> None:
+        self._f = f
+
+        header_lines = [f.readline() for _ in range(6)]
+        atom_count = _parse_grid_prelude(header_lines[2].decode()).atom_count
+        header_lines += [f.readline() for _ in range(atom_count)]
+        # Universal newlines mode, as when the file is opened in text mode
+        header = StringIO(b"".join(header_lines).decode(), newline=None)
+        self.info, self.molecule, self.mesh = _parse_header(header)
+
+        self._values_offset = f.tell()
+        self._shape = tuple(axis.point_count for axis in self.mesh.axes)
+        self._init_layout(f)
+
+        f.seek(0, os.SEEK_END)
+        expected_size = self._values_offset + self._shape[0]*self._shape[1]*self._row_size
+        if f.tell() != expected_size:
+            raise InputFormatError(
+                f"The size of the cube file ({f.tell()} bytes) does not match the "
+                f"size expected for fixed-width values ({expected_size} bytes)."
+            )
+
+    def _init_layout(self, f: BinaryIO) -> None:
+        first_line = f.readline()
+        content = first_line.rstrip(b"\r\n")
+        newline_size = len(first_line) - len(content)
+        nz = self._shape[2]
+        expected_count = min(nz, self._values_per_line)
+        tokens = content.split()
+
+        if newline_size == 0 or len(tokens) != expected_count or len(content) % expected_count:
+            raise InputFormatError("Cube file values are not laid out in fixed-width fields.")
+
+        self._field_width = len(content) // expected_count
+        if content != b"".join(token.rjust(self._field_width) for token in tokens):
+            raise InputFormatError("Cube file values are not laid out in fixed-width fields.")
+
+        self._line_size = self._values_per_line*self._field_width + newline_size
+        full_lines, remainder = divmod(nz, self._values_per_line)
+        if remainder:
+            self._row_size = full_lines*self._line_size + remainder*self._field_width + newline_size
+            return
+
+        # A row filling its last line may be terminated by an empty line,
+        # which is detected by reading the line following the first row.
+        self._row_size = full_lines*self._line_size
+        f.seek(self._values_offset + self._row_size)
+        if f.readline() in [b"\n", b"\r\n"]:
+            self._row_size += newline_size
+
+    def _get_offset(self, i: int, j: int, k: int) -> int:
+        line, position = divmod(k, self._values_per_line)
+        return (
+            self._values_offset +
+            (i*self._shape[1] + j)*self._row_size +
+            line*self._line_size +
+            position*self._field_width
+        )
+
+    def _check_index(self, index: Tuple[int, int, int]) -> None:
+        if len(index) != 3 or any(not 0 <= n < size for n, size in zip(index, self._shape)):
+            raise IndexError(f"Index {index} out of range for grid of shape {self._shape}.")
+
+    def _read_row_segment(self, i: int, j: int, k_start: int, k_stop: int) -> np.ndarray:
+        start = self._get_offset(i, j, k_start)
+        self._f.seek(start)
+        text = self._f.read(self._get_offset(i, j, k_stop - 1) + self._field_width - start)
+        values = parse_float_array(text.decode())
+        if len(values) != k_stop - k_start:
+            raise InputFormatError(
+                f"Unexpected content of cube file row ({i}, {j}), which may not "
+                f"be in the fixed-width layout."
+            )
+        return values
+
+    def get_value(self, index: Tuple[int, int, int]) -> float:
+        """Read the value at the given grid point
+
+        Parameters
+        ----------
+        index : typing.Tuple[int, int, int]
+            The indices of the point along the x, y and z axes.
+
+        Raises
+        ------
+        IndexError
+            Raised when the index is outside the grid.
+
+        Returns
+        -------
+        float
+            The value at the given point.
+        """
+        self._check_index(index)
+        i, j, k = index
+        return float(self._read_row_segment(i, j, k, k + 1)[0])
+
+    def get_values(self, indices: Iterable[Tuple[int, int, int]]) -> np.ndarray:
+        """Read the values at the given grid points
+
+        Parameters
+        ----------
+        indices : typing.Iterable[typing.Tuple[int, int, int]]
+            The indices of the points along the x, y and z axes.
+
+        Raises
+        ------
+        IndexError
+            Raised when any of the indices is outside the grid.
+
+        Returns
+        -------
+        np.ndarray
+            The values at the given points, in the same order as `indices`.
+        """
+        # Reading in the order of the file limits seeking back and forth.
+        index_list = list(indices)
+        for index in index_list:
+            self._check_index(index)
+        values = np.empty(len(index_list))
+        for position in sorted(range(len(index_list)), key=lambda n: tuple(index_list[n])):
+            i, j, k = index_list[position]
+            values[position] = self._read_row_segment(i, j, k, k + 1)[0]
+        return values
+
+    def get_box(self, start: Tuple[int, int, int], stop: Tuple[int, int, int]) -> np.ndarray:
+        """Read the values in a rectangular region of the grid
+
+        Parameters
+        ----------
+        start : typing.Tuple[int, int, int]
+            The indices of the first point of the region along each axis.
+        stop : typing.Tuple[int, int, int]
+            The indices one past the last point of the region along each axis,
+            as in Python slices.
+
+        Raises
+        ------
+        IndexError
+            Raised when the region is empty or extends outside the grid.
+
+        Returns
+        -------
+        np.ndarray
+            The values in the region, of shape ``stop - start``.
+        """
+        self._check_index(start)
+        self._check_index(cast(Tuple[int, int, int], tuple(n - 1 for n in stop)))
+        if any(n_stop <= n_start for n_start, n_stop in zip(start, stop)):
+            raise IndexError(f"Empty region requested: {start} to {stop}.")
+
+        box = np.empty(tuple(n_stop - n_start for n_start, n_stop in zip(start, stop)))
+        for i in range(start[0], stop[0]):
+            for j in range(start[1], stop[1]):
+                box[i - start[0], j - start[1]] = self._read_row_segment(i, j, start[2], stop[2])
+        return box
+
+    def crop(self, start: Tuple[int, int, int], stop: Tuple[int, int, int]) -> Field[float]:
+        """Read a rectangular region of the grid as a field
+
+        Parameters
+        ----------
+        start : typing.Tuple[int, int, int]
+            See `get_box` method parameter
+        stop : typing.Tuple[int, int, int]
+            See `get_box` method parameter
+
+        Raises
+        ------
+        IndexError
+            Raised when the region is empty or extends outside the grid.
+
+        Returns
+        -------
+        Field[float]
+            An array-backed field on the grid of points in the region.
+        """
+        box = self.get_box(start, stop)
+        mesh = GridMesh(
+            Coords(
+                origin + n*axis.vector[dimension]
+                for dimension, (origin, n, axis) in enumerate(zip(self.mesh.origin, start, self.mesh.axes))
+            ),
+            GridMesh.Axes(
+                GridMesh.Axis(axis.vector, point_count)
+                for axis, point_count in zip(self.mesh.axes, box.shape)
+            )
+        )
+        return Field(mesh, box.ravel())
+
+    def get_nearest_index(self, coords: Coords) -> Tuple[int, int, int]:
+        """Find the grid point nearest to the given coordinates
+
+        Parameters
+        ----------
+        coords : Coords
+            The coordinates of the point in space.
+
+        Returns
+        -------
+        typing.Tuple[int, int, int]
+            The indices of the nearest point along the x, y and z axes, clipped
+            to the extent of the grid.
+        """
+        return cast(Tuple[int, int, int], tuple(
+            min(max(round((coord - origin)/axis.vector[dimension]), 0), axis.point_count - 1)
+            for dimension, (coord, origin, axis) in enumerate(zip(coords, self.mesh.origin, self.mesh.axes))
+        ))
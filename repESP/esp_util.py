@@ -2,14 +2,17 @@
 
 from repESP.charges import AtomWithCoordsAndCharge, Charge, DipoleMoment, DipoleMomentValue
 from repESP.charges import QuadrupoleMoment, QuadrupoleMomentValue
-from repESP.fields import Esp, Field, Mesh
+from repESP.fields import ArrayMesh, Esp, Field, Mesh
 from repESP.exceptions import InputFormatError
+from repESP.sidecar_cache import CachedData, SidecarCache
 from repESP.types import AtomWithCoords, Coords, Molecule
-from repESP._util import get_line
+from repESP.util import FileOrPath
+from repESP._util import get_line, open_if_path, read_float_array
 
-from dataclasses import dataclass
+from dataclasses import astuple, dataclass
 from fortranformat import FortranRecordWriter as FW, FortranRecordReader as FR
-from typing import Callable, cast, List, Pattern, TextIO, Tuple, Type, TypeVar
+import numpy as np
+from typing import Callable, List, Optional, Pattern, TextIO, Tuple, Type, TypeVar
 import re
 
 
@@ -96,15 +99,29 @@ class EspData:
         )
 
 
-def parse_gaussian_esp(f: TextIO) -> GaussianEspData:
+def parse_gaussian_esp(
+    f: FileOrPath,
+    array_backed: bool=False,
+    cache: Optional[SidecarCache]=None
+) -> GaussianEspData:
     """Parse a file in the Gaussian .esp file format
 
     Parameters
     ----------
-    f : TextIO
-        File object opened in read mode containing the .esp file to be parsed.
-        The file can be generated with Gaussian by specifying the ``IOp(6/50=1)``
-        override.
+    f : FileOrPath
+        File object opened in read mode containing the .esp file to be parsed
+        or the path of the file, which may be compressed (see
+        `util.open_file`). The file can be generated with Gaussian by
+        specifying the ``IOp(6/50=1)`` override.
+    array_backed : bool, optional
+        Whether the ESP points should be read in bulk into an `ArrayMesh` and
+        an array-backed `Field`. This is much faster for large files. Defaults
+        to False, in which case a `Mesh` and a list of `Esp` values are created.
+    cache : typing.Optional[SidecarCache], optional
+        If given, the parsed data is stored in the cache and later parsing of
+        the same, unmodified file reads the cached data instead of parsing
+        the text. Array-backed fields loaded from the cache are memory-mapped.
+        Defaults to None.
 
     Raises
     ------
@@ -118,6 +135,24 @@ def parse_gaussian_esp(f: TextIO) -> GaussianEspData:
         A dataclass representing the information in the given .esp file.
     """
 
+    with open_if_path(f) as opened:
+        cached = cache.load(opened, "gaussian_esp") if cache is not None else None
+        if cached is not None:
+            return _load_gaussian_esp(cached, array_backed)
+
+        gaussian_esp_data = _parse_gaussian_esp(opened, array_backed or cache is not None)
+
+        if cache is not None:
+            cached = _dump_gaussian_esp(gaussian_esp_data)
+            cache.store(opened, "gaussian_esp", cached)
+            if not array_backed:
+                gaussian_esp_data.field = _make_esp_points_field(cached.values, array_backed)
+
+    return gaussian_esp_data
+
+
+def _parse_gaussian_esp(f: TextIO, array_backed: bool) -> GaussianEspData:
+
     charge, multiplicity, atom_count = _parse_prelude([get_line(f) for i in range(3)])
 
     molecule = Molecule([_parse_atom(get_line(f)) for _ in range(atom_count)])
@@ -139,7 +174,7 @@ def parse_gaussian_esp(f: TextIO) -> GaussianEspData:
         raise InputFormatError("Expected ESP points section header.")
 
     point_count = int(points_header_match.group(1))
-    field = _parse_esp_points(f)
+    field = _parse_esp_points_array(f) if array_backed else _parse_esp_points(f)
 
     if len(field.mesh) != point_count:
         raise InputFormatError(
@@ -150,6 +185,39 @@ def parse_gaussian_esp(f: TextIO) -> GaussianEspData:
     return GaussianEspData(charge, multiplicity, molecule, dipole_moment, quadrupole_moment, field)
 
 
+def _dump_gaussian_esp(gaussian_esp_data: GaussianEspData) -> CachedData:
+    field = gaussian_esp_data.field
+    assert isinstance(field.mesh, ArrayMesh)
+    return CachedData(
+        {
+            "charge": gaussian_esp_data.charge,
+            "multiplicity": gaussian_esp_data.multiplicity,
+            "atoms": [
+                [atom.atomic_number, *atom.coords, atom.charge]
+                for atom in gaussian_esp_data.molecule.atoms
+            ],
+            "dipole_moment": list(astuple(gaussian_esp_data.dipole_moment)),
+            "quadrupole_moment": list(astuple(gaussian_esp_data.quadrupole_moment)),
+        },
+        np.column_stack((field.values, field.mesh.coordinates))
+    )
+
+
+def _load_gaussian_esp(cached: CachedData, array_backed: bool) -> GaussianEspData:
+    header = cached.header
+    return GaussianEspData(
+        header["charge"],
+        header["multiplicity"],
+        Molecule([
+            AtomWithCoordsAndCharge(atomic_number, Coords(coords), Charge(charge))
+            for atomic_number, *coords, charge in header["atoms"]
+        ]),
+        DipoleMoment(*map(DipoleMomentValue, header["dipole_moment"])),
+        QuadrupoleMoment(*map(QuadrupoleMomentValue, header["quadrupole_moment"])),
+        _make_esp_points_field(cached.values, array_backed)
+    )
+
+
 def _parse_prelude(lines: List[str]) -> Tuple[int, int, int]:
     assert len(lines) == 3
 
@@ -235,13 +303,45 @@ def _parse_esp_points(f: TextIO) -> Field[Esp]:
     )
 
 
-def parse_resp_esp(f: TextIO) -> EspData:
+def _parse_esp_points_array(f: TextIO) -> Field[Esp]:
+    # Each line consists of the ESP value followed by the point coordinates.
+    values = read_float_array(f)
+    if len(values) % 4:
+        raise InputFormatError(
+            "Expected four values (ESP value and coordinates) for every ESP point."
+        )
+
+    return _make_esp_points_field(values.reshape(-1, 4), True)
+
+
+def _make_esp_points_field(points: np.ndarray, array_backed: bool) -> Field[Esp]:
+    # The rows of `points` consist of the ESP value and the point coordinates.
+    if array_backed:
+        return Field(
+            ArrayMesh(points[:, 1:]),
+            points[:, 0]
+        )
+
+    return Field(
+        Mesh([Coords(coords) for coords in points[:, 1:].tolist()]),
+        [Esp(value) for value in points[:, 0].tolist()]
+    )
+
+
+def parse_resp_esp(f: FileOrPath, array_backed: bool=False) -> EspData:
     """Parse a file in the .esp file format defined by ``resp``
 
     Parameters
     ----------
-    f : TextIO
-        File object opened in read mode containing the .esp file to be parsed.
+    f : FileOrPath
+        File object opened in read mode containing the .esp file to be parsed
+        or the path of the file, which may be compressed (see
+        `util.open_file`).
+    array_backed : bool, optional
+        Whether the ESP points should be read in bulk into an `ArrayMesh` and
+        an array-backed `Field`. This is much faster for large files but,
+        unlike the default parsing mode, requires that no other content
+        follows the points. Defaults to False.
 
     Raises
     ------
@@ -253,6 +353,11 @@ def parse_resp_esp(f: TextIO) -> EspData:
     EspData
         A dataclass representing the information in the given .esp file.
     """
+    with open_if_path(f) as opened:
+        return _parse_resp_esp(opened, array_backed)
+
+
+def _parse_resp_esp(f: TextIO, array_backed: bool) -> EspData:
 
     atom_and_point_count = get_line(f).split()
 
@@ -266,6 +371,15 @@ def parse_resp_esp(f: TextIO) -> EspData:
 
     atoms_coords = [Coords(get_line(f).split()) for _ in range(atom_count)]
 
+    if array_backed:
+        field = _parse_esp_points_array(f)
+        if len(field.mesh) != point_count:
+            raise InputFormatError(
+                f"The number of ESP points ({len(field.mesh)}) does not agree with that "
+                f"specified in the file header ({point_count})."
+            )
+        return EspData(atoms_coords, field)
+
     mesh_coords: List[Coords] = []
     esp_values: List[Esp] = []
 
@@ -287,14 +401,15 @@ def parse_resp_esp(f: TextIO) -> EspData:
     )
 
 
-def write_resp_esp(f: TextIO, esp_data: EspData) -> None:
+def write_resp_esp(f: FileOrPath, esp_data: EspData) -> None:
     """Write a ``resp`` .esp file described by the given input data
 
     Parameters
     ----------
-    f : TextIO
-        File object to which the supplied data is to be saved. Must be opened
-        in write mode.
+    f : FileOrPath
+        File object to which the supplied data is to be saved, which must be
+        opened in write mode, or the path of the file. The file is compressed
+        if the path has a .gz, .bz2 or .xz extension (see `util.open_file`).
     esp_data : EspData
         The dataclass containing the information needed to create a .esp file.
     """
@@ -309,21 +424,117 @@ def write_resp_esp(f: TextIO, esp_data: EspData) -> None:
         "points": "1X,4E16.7",
     }
 
-    f.write(
-        FW(formats["header"]).write(
-            [
-                len(atoms_coords),
-                len(field.mesh)
-            ]
-        ) + "\n"
-    )
-
-    for atom_coords in atoms_coords:
-        f.write(FW(formats["atoms"]).write(atom_coords) + "\n")
-
-    for point_coords, esp_val in zip(field.mesh.points, field.values):
-        f.write(
-            FW(formats["points"]).write(
-                cast(List[float], [esp_val]) + list(point_coords)
+    points = np.empty((len(field.mesh), 4))
+    points[:, 0] = field.values
+    points[:, 1:] = field.mesh.as_array()
+
+    with open_if_path(f, "w") as opened:
+        opened.write(
+            FW(formats["header"]).write(
+                [
+                    len(atoms_coords),
+                    len(field.mesh)
+                ]
             ) + "\n"
         )
+
+        _write_e16_7_rows(
+            opened,
+            formats["atoms"],
+            np.array(atoms_coords, dtype=float).reshape(-1, 3),
+        )
+
+        _write_e16_7_rows(opened, formats["points"], points)
+
+
+_E16_7_BLOCK_SIZE = 10000
+"""int : Number of lines formatted and written at once by `_write_e16_7_rows`"""
+
+
+def _write_e16_7_rows(f: TextIO, fortran_format: str, values: np.ndarray) -> None:
+    """Write rows of values in the Fortran ``nX,kE16.7`` edit descriptor format
+
+    The output is identical to writing each row with a `FortranRecordWriter`
+    for the given format but the values are formatted in bulk. The mantissa
+    and exponent of each value are calculated with numpy. Rows containing
+    values whose formatting cannot be determined reliably this way (non-finite
+    values, exponents outside the two-digit range and mantissas close to
+    a rounding tie) are formatted with `FortranRecordWriter`.
+
+    Parameters
+    ----------
+    f : TextIO
+        File object to which the rows are to be written.
+    fortran_format : str
+        The Fortran format of a row, consisting of the number of leading
+        spaces and the E16.7 descriptor repeated once for each column, for
+        example "1X,4E16.7".
+    values : np.ndarray
+        Two-dimensional array of the values to be written.
+    """
+    skip, descriptor = fortran_format.split(",")
+    field_count = values.shape[1]
+    if skip[-1] != "X" or descriptor != f"{field_count}E16.7":
+        raise ValueError(f"Unsupported format for {field_count} columns: {fortran_format}")
+
+    field_format = "%s0.%07dE%+03d"
+    line_format = " "*int(skip[:-1]) + field_format*field_count + "\n"
+    fallback_writer = FW(fortran_format)
+
+    for start in range(0, len(values), _E16_7_BLOCK_SIZE):
+        block = values[start:start+_E16_7_BLOCK_SIZE]
+        mantissas, exponents, reliable = _get_e16_7_components(block)
+
+        items = np.empty(block.shape + (3,), dtype=object)
+        items[..., 0] = np.where(block < 0, "  -", "   ")
+        items[..., 1] = mantissas.tolist()
+        items[..., 2] = exponents.tolist()
+
+        text = (line_format*len(block)) % tuple(items.ravel().tolist())
+
+        fallback_rows = np.flatnonzero(~reliable.all(axis=1))
+        if len(fallback_rows):
+            lines = text.splitlines(keepends=True)
+            for row in fallback_rows:
+                lines[row] = fallback_writer.write(block[row].tolist()) + "\n"
+            text = "".join(lines)
+
+        f.write(text)
+
+
+def _get_e16_7_components(
+    values: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Returns the 7-digit integer mantissas and the exponents such that the
+    # absolute values are 0.mantissa * 10**exponent, as well as the mask of
+    # values for which these could be determined reliably.
+    finite = np.isfinite(values)
+    magnitudes = np.where(finite & (values != 0), np.abs(values), 0)
+    nonzero = magnitudes != 0
+    safe_magnitudes = np.where(nonzero, magnitudes, 1)
+
+    exponents = np.floor(np.log10(safe_magnitudes)).astype(np.int64) + 1
+    # The clipping prevents overflow for subnormal values, which are
+    # formatted with the fallback due to their exponents anyway.
+    scaled = safe_magnitudes*10.0**np.clip(7 - exponents, -300, 300)
+
+    # Correct the exponents where the logarithm was inaccurate.
+    too_small = scaled < 1e6
+    exponents -= too_small
+    scaled = np.where(too_small, scaled*10, scaled)
+    too_large = scaled >= 1e7
+    exponents += too_large
+    scaled = np.where(too_large, scaled/10, scaled)
+
+    fractions = scaled - np.floor(scaled)
+    mantissas = np.rint(scaled).astype(np.int64)
+    # Rounding up may carry over to an additional digit.
+    carried = mantissas == 10**7
+    mantissas = np.where(carried, 10**6, mantissas)
+    exponents += carried
+
+    mantissas = np.where(nonzero, mantissas, 0)
+    exponents = np.where(nonzero, exponents, 0)
+
+    reliable = finite & (np.abs(fractions - 0.5) > 1e-6) & (np.abs(exponents) <= 99)
+    return mantissas, exponents, reliable
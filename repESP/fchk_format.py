@@ -0,0 +1,328 @@
+"""Reading the Gaussian formatted checkpoint file format (.fchk)
+
+The formatted checkpoint file is a sequence of named entries, each of which
+is either a single value or an array of values. Arrays can be very large,
+e.g. the density matrix or molecular orbital coefficients of a large system,
+so `FormattedCheckpoint` only records the position of every array when the
+file is opened and parses an array only when it is requested.
+"""
+
+from repESP.charges import Charge
+from repESP.exceptions import InputFormatError
+from repESP.types import AtomWithCoords, Coords, Molecule
+from repESP._util import parse_float_array
+
+from dataclasses import dataclass
+import math
+import numpy as np
+import re
+from typing import BinaryIO, Dict, List, Optional, Union
+
+
+FchkValue = Union[int, float, str, bool, np.ndarray]
+"""Type of the values of formatted checkpoint file entries"""
+
+
+_VALUES_PER_LINE = {"I": 6, "R": 5, "C": 5, "H": 9, "L": 72}
+_VALUE_WIDTHS = {"I": 12, "R": 16, "C": 12, "H": 8, "L": 1}
+
+
+@dataclass
+class _Entry:
+    data_type: str
+    # The following are None for arrays and scalars, respectively.
+    scalar: Optional[str]
+    count: Optional[int]
+    offset: int = 0
+    size: int = 0
+
+
+def _parse_header_line(line: str) -> Optional[_Entry]:
+    # Fixed-width layout: name (A40), 3X, type (A1), 3X, "N=" (A2) and value
+    if len(line) < 44 or line[40:43] != "   " or line[43] not in _VALUES_PER_LINE or line[0] == " ":
+        return None
+    if line[47:49] == "N=":
+        try:
+            return _Entry(line[43], None, int(line[49:]))
+        except ValueError:
+            return None
+    return _Entry(line[43], line[44:].strip(), None)
+
+
+def _parse_float(text: str) -> float:
+    # Exponents with three digits are written without the "E", e.g. "1.0-100"
+    return float(re.sub(r"(?<=\d)([+-]\d{3})$", r"E\1", text.replace("D", "E")))
+
+
+class FormattedCheckpoint:
+    """Lazy reader of the Gaussian formatted checkpoint file (.fchk)
+
+    On initialization, the file is indexed by reading only the lines naming
+    the entries. The length of each array is calculated from the number of
+    its values, which is given in the line naming it, so that the values do
+    not need to be read. Arrays are parsed into NumPy arrays when requested.
+
+    Parameters
+    ----------
+    f : BinaryIO
+        File object opened in binary read mode containing the formatted
+        checkpoint file. The file must remain open for as long as entries are
+        being read.
+
+    Raises
+    ------
+    InputFormatError
+        Raised when the file does not follow the expected format.
+
+    Attributes
+    ----------
+    title : str
+        The title of the calculation.
+    job_type : str
+        The type of the calculation, e.g. "SP" or "Freq".
+    method : str
+        The method used in the calculation, e.g. "RB3LYP".
+    basis : str
+        The basis set used in the calculation.
+    """
+
+    def __init__(self, f: BinaryIO) -> None:
+        self._f = f
+        self._entries: Dict[str, _Entry] = {}
+
+        f.seek(0)
+        self.title = f.readline().decode().rstrip("\r\n").strip()
+        second_line = f.readline()
+        if not second_line:
+            raise InputFormatError("Formatted checkpoint file is too short.")
+        newline_size = len(second_line) - len(second_line.rstrip(b"\r\n"))
+        second_line_text = second_line.decode().rstrip("\r\n")
+        self.job_type = second_line_text[:10].strip()
+        self.method = second_line_text[10:70].strip()
+        self.basis = second_line_text[70:].strip()
+
+        while True:
+            line = f.readline()
+            if not line.strip():
+                if not line:
+                    break
+                continue
+            line_text = line.decode().rstrip("\r\n")
+            entry = _parse_header_line(line_text)
+            if entry is None:
+                raise InputFormatError(
+                    f"Expected an entry of the formatted checkpoint file but got: {line_text}"
+                )
+            if entry.count is not None:
+                entry.offset = f.tell()
+                entry.size = self._skip_array(f, entry.data_type, entry.count, newline_size)
+            # Gaussian occasionally repeats an entry, e.g. "Force Field".
+            self._entries.setdefault(line_text[:40].rstrip(), entry)
+
+    @staticmethod
+    def _skip_array(f: BinaryIO, data_type: str, count: int, newline_size: int) -> int:
+        offset = f.tell()
+        line_count = math.ceil(count/_VALUES_PER_LINE[data_type])
+        size = count*_VALUE_WIDTHS[data_type] + line_count*newline_size
+
+        # The values are written in fixed-width fields, so their size can be
+        # calculated. This is verified by checking that the array is followed
+        # by the next entry or the end of the file.
+        f.seek(offset + size)
+        next_line = f.readline()
+        if not next_line.strip() or _parse_header_line(next_line.decode().rstrip("\r\n")) is not None:
+            f.seek(offset + size)
+            return size
+
+        f.seek(offset)
+        for _ in range(line_count):
+            f.readline()
+        return f.tell() - offset
+
+    def keys(self) -> List[str]:
+        """The names of the entries in order of occurrence in the file"""
+        return list(self._entries)
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and name in self._entries
+
+    def _get_entry(self, name: str) -> _Entry:
+        try:
+            return self._entries[name]
+        except KeyError:
+            raise KeyError(f"Entry not found in the formatted checkpoint file: {name}")
+
+    def get(self, name: str) -> FchkValue:
+        """Get the value of the entry with the given name
+
+        Parameters
+        ----------
+        name : str
+            The name of the entry, e.g. "Atomic numbers".
+
+        Raises
+        ------
+        KeyError
+            Raised when the entry is not present in the file.
+        InputFormatError
+            Raised when the value of the entry cannot be parsed.
+
+        Returns
+        -------
+        FchkValue
+            For single values, an int, float, str or bool, depending on the
+            data type of the entry. Arrays of integers, real numbers and logical
+            values are returned as `np.ndarray`, while character arrays are
+            returned as a single str.
+        """
+        entry = self._get_entry(name)
+        if entry.scalar is not None:
+            return self._parse_scalar(name, entry.data_type, entry.scalar)
+        return self._read_array(name, entry)
+
+    def get_array(self, name: str) -> np.ndarray:
+        """Get the value of a numerical or logical array entry
+
+        Raises
+        ------
+        KeyError
+            Raised when the entry is not present in the file.
+        ValueError
+            Raised when the entry is not a numerical or logical array.
+        InputFormatError
+            Raised when the value of the entry cannot be parsed.
+        """
+        value = self.get(name)
+        if not isinstance(value, np.ndarray):
+            raise ValueError(f"Entry '{name}' is not a numerical or logical array.")
+        return value
+
+    @staticmethod
+    def _parse_scalar(name: str, data_type: str, text: str) -> FchkValue:
+        try:
+            if data_type == "I":
+                return int(text)
+            elif data_type == "R":
+                return _parse_float(text)
+            elif data_type == "L":
+                return text == "T"
+            return text
+        except ValueError:
+            raise InputFormatError(f"Failed parsing value of entry '{name}': {text}")
+
+    def _read_array(self, name: str, entry: _Entry) -> FchkValue:
+        assert entry.count is not None
+        self._f.seek(entry.offset)
+        text = self._f.read(entry.size).decode()
+
+        if entry.data_type in ["C", "H"]:
+            return "".join(text.splitlines()).rstrip()
+        if entry.data_type == "L":
+            values = np.array([char == "T" for char in "".join(text.split())])
+        elif entry.data_type == "I":
+            try:
+                values = np.array(text.split(), dtype=int)
+            except ValueError:
+                raise InputFormatError(f"Failed parsing integer values of entry '{name}'.")
+        else:
+            try:
+                values = parse_float_array(text)
+            except InputFormatError:
+                try:
+                    values = np.array([_parse_float(value) for value in text.split()])
+                except ValueError:
+                    raise InputFormatError(f"Failed parsing real values of entry '{name}'.")
+
+        if len(values) != entry.count:
+            raise InputFormatError(
+                f"Expected {entry.count} values of entry '{name}' but found {len(values)}."
+            )
+        return values
+
+    @property
+    def charge(self) -> int:
+        """The total charge of the molecule"""
+        return int(self.get("Charge"))
+
+    @property
+    def multiplicity(self) -> int:
+        """The multiplicity of the molecule's electron configuration"""
+        return int(self.get("Multiplicity"))
+
+    def get_molecule(self) -> Molecule[AtomWithCoords]:
+        """Get the molecule with the current coordinates of its atoms
+
+        Returns
+        -------
+        Molecule[AtomWithCoords]
+            The molecule, with the atom coordinates in bohr.
+        """
+        atomic_numbers = self.get_array("Atomic numbers")
+        coordinates = self.get_array("Current cartesian coordinates").reshape(-1, 3)
+        if len(atomic_numbers) != len(coordinates):
+            raise InputFormatError(
+                "The number of atomic numbers does not match the number of coordinates."
+            )
+        return Molecule([
+            AtomWithCoords(int(atomic_number), Coords(coords))
+            for atomic_number, coords in zip(atomic_numbers, coordinates)
+        ])
+
+    def get_charges(self, name: str="ESP Charges") -> List[Charge]:
+        """Get the partial charges on the atoms
+
+        Parameters
+        ----------
+        name : str, optional
+            The name of the entry with the charges, e.g. "Mulliken Charges".
+            Defaults to "ESP Charges".
+
+        Raises
+        ------
+        KeyError
+            Raised when the charges are not present in the file.
+
+        Returns
+        -------
+        typing.List[Charge]
+            List of charges in the order of the atoms.
+        """
+        return [Charge(charge) for charge in self.get_array(name)]
+
+    def get_density_matrix(self, name: str="Total SCF Density") -> np.ndarray:
+        """Get a density matrix in the basis of the basis functions
+
+        The formatted checkpoint file stores the lower triangle of the
+        symmetric matrix, which is expanded into the full matrix.
+
+        Parameters
+        ----------
+        name : str, optional
+            The name of the entry with the density matrix, e.g. "Spin SCF
+            Density". Defaults to "Total SCF Density".
+
+        Raises
+        ------
+        KeyError
+            Raised when the density matrix is not present in the file.
+        InputFormatError
+            Raised when the size of the matrix does not match the number of
+            basis functions.
+
+        Returns
+        -------
+        np.ndarray
+            The density matrix of shape (n, n), where n is the number of basis
+            functions.
+        """
+        basis_function_count = int(self.get("Number of basis functions"))
+        lower_triangle = self.get_array(name)
+        if len(lower_triangle) != basis_function_count*(basis_function_count + 1)//2:
+            raise InputFormatError(
+                f"The size of the density matrix '{name}' does not match the "
+                f"number of basis functions ({basis_function_count})."
+            )
+        result = np.zeros((basis_function_count, basis_function_count))
+        result[np.tril_indices(basis_function_count)] = lower_triangle
+        result += np.tril(result, -1).T
+        return result
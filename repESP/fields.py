@@ -8,11 +8,13 @@ from repESP.types import Coords, Dist
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field, InitVar
-from typing import Any, cast, Collection, Generic, Iterable, Iterator, List, NewType, Tuple, Type, TypeVar
+from typing import Any, cast, Collection, Generic, Iterable, Iterator, List, NewType, Optional, Tuple, Type, TypeVar, Union
 
 import functools
 import math
+import numpy as np
 import operator
+from scipy.spatial import cKDTree  # type: ignore
 
 
 EspT = TypeVar('EspT', bound='Esp')
@@ -59,12 +61,191 @@ class Ed(float):
         return f"{super().__str__()} a.u."
 
 
+class SpatialIndex:
+    """Index of points in space for vectorized proximity queries
+
+    The index is built with a k-d tree. It is usually obtained from the
+    `AbstractMesh.spatial_index` property rather than constructed directly.
+    All queries return arrays of indices of the points, i.e. their positions
+    in the order of iteration over `AbstractMesh.points`, in increasing
+    order. These can be used to select the values of a `Field` defined on
+    the mesh, e.g. ``np.asarray(field.values)[indices]``.
+
+    Parameters
+    ----------
+    coordinates : np.ndarray
+        Array of shape (N, 3) containing the coordinates of the N points.
+    """
+
+    def __init__(self, coordinates: np.ndarray) -> None:
+        self._coordinates = np.asarray(coordinates, dtype=float).reshape(-1, 3)
+        self._tree = cKDTree(self._coordinates)
+
+    def __len__(self) -> int:
+        return len(self._coordinates)
+
+    @staticmethod
+    def _as_centers(centers: Union[Coords, Collection[Coords], np.ndarray]) -> np.ndarray:
+        return np.array(centers, dtype=float).reshape(-1, 3)
+
+    def ball(
+        self,
+        centers: Union[Coords, Collection[Coords], np.ndarray],
+        radii: Union[float, Collection[float], np.ndarray]
+    ) -> np.ndarray:
+        """Find the points within a distance from any of the given centers
+
+        Parameters
+        ----------
+        centers : Union[Coords, Collection[Coords], np.ndarray]
+            The coordinates of a single center or of multiple centers, e.g.
+            atoms of a molecule.
+        radii : Union[float, Collection[float], np.ndarray]
+            The radius of the ball around all the centers or around each of
+            them.
+
+        Returns
+        -------
+        np.ndarray
+            The indices of the points lying no farther than the radius from
+            at least one of the centers.
+        """
+        centers_array = self._as_centers(centers)
+        radii_array = np.broadcast_to(np.asarray(radii, dtype=float), len(centers_array))
+        if len(centers_array) == 0 or len(self) == 0:
+            return np.zeros(0, dtype=int)
+        neighbours = self._tree.query_ball_point(centers_array, radii_array)
+        return np.unique(np.concatenate([np.asarray(indices, dtype=int) for indices in neighbours]))
+
+    def shell(
+        self,
+        centers: Union[Coords, Collection[Coords], np.ndarray],
+        inner_radii: Union[float, Collection[float], np.ndarray],
+        outer_radii: Union[float, Collection[float], np.ndarray]
+    ) -> np.ndarray:
+        """Find the points between two distances from the given centers
+
+        For multiple centers, e.g. atoms of a molecule, the shell is the
+        region within the outer radius of any of the centers but outside the
+        inner radii of all of them.
+
+        Parameters
+        ----------
+        centers : Union[Coords, Collection[Coords], np.ndarray]
+            The coordinates of a single center or of multiple centers.
+        inner_radii : Union[float, Collection[float], np.ndarray]
+            The inner radius of the shell for all the centers or for each of
+            them.
+        outer_radii : Union[float, Collection[float], np.ndarray]
+            The outer radius of the shell for all the centers or for each of
+            them.
+
+        Returns
+        -------
+        np.ndarray
+            The indices of the points lying farther than the inner radius
+            from every center and no farther than the outer radius from at
+            least one center.
+        """
+        return np.setdiff1d(
+            self.ball(centers, outer_radii),
+            self.ball(centers, inner_radii),
+            assume_unique=True
+        )
+
+    def slab(
+        self,
+        plane: Tuple[float, float, float, float],
+        distance: float
+    ) -> np.ndarray:
+        """Find the points near a plane
+
+        Parameters
+        ----------
+        plane : Tuple[float, float, float, float]
+            The coefficients (A, B, C, D) of the plane equation
+            ``Ax + By + Cz + D = 0``.
+        distance : float
+            The maximum distance of the points from the plane.
+
+        Raises
+        ------
+        ValueError
+            Raised when the plane coefficients do not define a plane.
+
+        Returns
+        -------
+        np.ndarray
+            The indices of the points lying no farther than `distance` from
+            the plane.
+        """
+        normal = np.array(plane[:3], dtype=float)
+        norm = np.linalg.norm(normal)
+        if norm == 0:
+            raise ValueError(f"The coefficients {plane} do not define a plane.")
+        distances = np.abs(self._coordinates @ normal + plane[3])/norm
+        return np.flatnonzero(distances <= distance)
+
+    def pairs(self, distance: float) -> np.ndarray:
+        """Find all pairs of points lying close to each other
+
+        Parameters
+        ----------
+        distance : float
+            The maximum distance between the points of a pair.
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape (P, 2) of the indices of the P pairs of points.
+            The first index of each pair is smaller than the second and the
+            pairs are sorted.
+        """
+        pairs = self._tree.query_pairs(distance, output_type="ndarray").reshape(-1, 2)
+        result: np.ndarray = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+        return result
+
+    def nearest(
+        self,
+        coords: Union[Coords, Collection[Coords], np.ndarray],
+        k: int=1
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Find the points nearest to the given positions
+
+        Parameters
+        ----------
+        coords : Union[Coords, Collection[Coords], np.ndarray]
+            The coordinates of a single position or of multiple positions.
+        k : int, optional
+            The number of nearest points to be found for each position.
+            Defaults to 1.
+
+        Raises
+        ------
+        ValueError
+            Raised when `k` is not between 1 and the number of points.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            The distances to the nearest points and their indices, ordered by
+            distance. Both arrays have the shape (M, k), where M is the number
+            of positions.
+        """
+        if not 0 < k <= len(self):
+            raise ValueError(f"Expected k between 1 and the number of points ({len(self)}) but got {k}.")
+        distances, indices = self._tree.query(self._as_centers(coords), k=[*range(1, k + 1)])
+        return distances, indices
+
+
 class AbstractMesh(ABC):
     """Abstract base class for collections of points in space
 
     Calling ``len`` on instances of this class will return the number of points.
     """
 
+    _spatial_index: Optional[SpatialIndex] = None
+
     @property
     @abstractmethod
     def points(self) -> Iterator[Coords]:
@@ -83,6 +264,31 @@ class AbstractMesh(ABC):
     def __len__(self) -> int:
         pass
 
+    def as_array(self) -> np.ndarray:
+        """Coordinates of the points as an array
+
+        Subclasses may override this method with a more efficient
+        implementation than iterating over `points`.
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape (N, 3) containing the coordinates of the N points,
+            in the order of iteration over `points`.
+        """
+        return np.array([tuple(point) for point in self.points], dtype=float).reshape(-1, 3)
+
+    @property
+    def spatial_index(self) -> SpatialIndex:
+        """Spatial index of the points for vectorized proximity queries
+
+        The index is built on first access and cached on the mesh. It does
+        not reflect any later modifications of the points.
+        """
+        if self._spatial_index is None:
+            self._spatial_index = SpatialIndex(self.as_array())
+        return self._spatial_index
+
 
 @dataclass
 class Mesh(AbstractMesh):
@@ -245,6 +451,90 @@ class GridMesh(AbstractMesh):
             (axis.point_count for axis in self.axes)
         )
 
+    def as_array(self) -> np.ndarray:
+        """Coordinates of the points as an array
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape (N, 3) containing the coordinates of the N points,
+            in the order of iteration over `points`.
+        """
+        axes_values = [
+            self.origin[i] + np.arange(axis.point_count)*axis.vector[i]
+            for i, axis in enumerate(self.axes)
+        ]
+        return np.stack(
+            [values.ravel() for values in np.meshgrid(*axes_values, indexing="ij")],
+            axis=1
+        )
+
+
+@dataclass(eq=False)
+class ArrayMesh(AbstractMesh):
+    """Collection of points in space stored in a numpy array
+
+    Like `Mesh`, this class makes no assumptions regarding the structure of
+    the points but stores them compactly as an array of floats. It is produced
+    by the array-backed parsing modes, which avoid creating Python objects
+    for every point.
+
+    Parameters
+    ----------
+    coordinates : np.ndarray
+        Array of shape (N, 3) containing the coordinates of the N points.
+
+    Raises
+    ------
+    ValueError
+        Raised when the coordinates array does not have the expected shape.
+
+    Attributes
+    ----------
+    coordinates
+        See initialization parameter
+    """
+    coordinates: np.ndarray
+
+    def __post_init__(self) -> None:
+        self.coordinates = np.asarray(self.coordinates, dtype=float)
+        if self.coordinates.ndim != 2 or self.coordinates.shape[1] != 3:
+            raise ValueError(
+                f"Expected an array of shape (N, 3) but got {self.coordinates.shape}."
+            )
+
+    @property
+    def points(self) -> Iterator[Coords]:
+        """Coordinates of points of which the mesh consists
+
+        The order of iteration is the same as that of the rows of the array.
+
+        Yields
+        ------
+        Iterator[Coords]
+            Iterator over the point coordinates
+        """
+        for x, y, z in self.coordinates.tolist():
+            yield Coords((Dist(x), Dist(y), Dist(z)))
+
+    def __len__(self) -> int:
+        return len(self.coordinates)
+
+    def as_array(self) -> np.ndarray:
+        """Coordinates of the points as an array
+
+        Returns
+        -------
+        np.ndarray
+            The `coordinates` array, which is not copied.
+        """
+        return self.coordinates
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ArrayMesh):
+            return NotImplemented
+        return bool(np.array_equal(self.coordinates, other.coordinates))
+
 
 FieldValue = TypeVar('FieldValue')
 """typing.TypeVar : The generic type for the values of the `Field` class.
@@ -272,8 +562,11 @@ class Field(Generic[FieldValue]):
     ----------
     mesh
         See initialization parameter
-    values : typing.List[FieldValue]
-        Converted from the `values_` initialization parameter
+    values : typing.Union[typing.List[FieldValue], numpy.ndarray]
+        Converted from the `values_` initialization parameter. If `values_`
+        is a numpy array, it is stored without conversion, making the field
+        "array-backed". Arithmetic operations on array-backed fields are
+        vectorized and their results are also array-backed.
     NumericValue : typing.TypeVar
         Generic type specifying a subset of FieldValue types for which arithmetic
         operations are defined. This can be any type matching "bound=float".
@@ -281,7 +574,7 @@ class Field(Generic[FieldValue]):
 
     mesh: AbstractMesh
     values_: InitVar[Collection[FieldValue]]
-    values: List[FieldValue] = field(init=False)
+    values: Union[List[FieldValue], np.ndarray] = field(init=False)
 
     def __post_init__(self, values_: Collection[FieldValue]) -> None:
 
@@ -291,7 +584,17 @@ class Field(Generic[FieldValue]):
                 f"number of points ({len(self.mesh)}) and the number of values ({len(values_)})"
             )
 
-        self.values = list(values_)
+        if isinstance(values_, np.ndarray):
+            self.values = values_
+        else:
+            self.values = list(values_)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Field):
+            return NotImplemented
+        if isinstance(self.values, np.ndarray) or isinstance(other.values, np.ndarray):
+            return self.mesh == other.mesh and bool(np.array_equal(np.asarray(self.values), np.asarray(other.values)))
+        return self.mesh == other.mesh and self.values == other.values
 
     # TODO: This would ideally be extended to numbers.Number but mypy throws errors.
     NumericValue = TypeVar('NumericValue', bound=float)
@@ -308,6 +611,12 @@ class Field(Generic[FieldValue]):
                 "Cannot add or subtract Fields with different meshes."
             )
 
+        if isinstance(self.values, np.ndarray) or isinstance(other.values, np.ndarray):
+            return Field(
+                self.mesh,
+                np.add(self.values, other.values)
+            )
+
         return Field(
             self.mesh,
             [
@@ -317,6 +626,9 @@ class Field(Generic[FieldValue]):
         )
 
     def __neg__(self: 'Field[NumericValue]') -> 'Field[NumericValue]':
+        if isinstance(self.values, np.ndarray):
+            return Field(self.mesh, -self.values)
+
         return Field(
             self.mesh,
             [
@@ -4,11 +4,19 @@ from repESP.charges import Charge
 from repESP.fields import Esp
 from repESP.exceptions import InputFormatError
 from repESP.types import Atom, Coords, Molecule
+from repESP.util import FileOrPath, _open_binary_file
+from repESP._util import open_if_path
 
 from abc import ABC, abstractmethod
+import codecs
 from dataclasses import dataclass
+import io
+import json
+import os
 import re
-from typing import List, Mapping, Optional, TextIO, Tuple
+import tempfile
+from typing import BinaryIO, Callable, cast, Dict, Iterable, Iterator, List, Mapping, Optional
+from typing import Sequence, TextIO, Tuple
 
 
 @dataclass
@@ -145,6 +153,11 @@ class EspChargesSectionParser(ChargesSectionParser):
                 rms = Esp(matched_charges_and_stats.group(1))
                 rrms = float(matched_charges_and_stats.group(2))
                 break
+        else:
+            raise InputFormatError(
+                "Charges section does not contain the ESP fit statistics line "
+                "preceding the charges. The section may be truncated."
+            )
 
         charges = []
         for line in section[i+3:]:
@@ -166,19 +179,168 @@ class EspChargesSectionParser(ChargesSectionParser):
         )
 
 
+class LogSectionIndex:
+    """Persistent index of the positions of charges sections in Gaussian output
+
+    The index records the byte offsets of the first and last line of every
+    charges section recognized by the given parsers. It is stored in a JSON
+    file next to the output file, so that it can be reused by later sessions.
+    The stored index is only used if the size and modification time of the
+    output file are unchanged. Otherwise, as well as when a charge type not
+    yet in the index is requested, the output file is scanned again.
+
+    Pass the index to `get_charges_from_log` or `get_esp_fit_stats_from_log`
+    to read the requested section directly, without scanning the file. If the
+    index cannot be saved, e.g. due to file permissions, it is only kept in
+    memory.
+
+    Parameters
+    ----------
+    path : str
+        Path to the Gaussian `.log`/`.out` output file. Compressed files are
+        supported (see `util.open_file`), in which case the offsets refer to
+        the decompressed contents.
+    charges_section_parsers : typing.Sequence[ChargesSectionParser]
+        Parsers for the charge types which are to be indexed.
+    encoding : str, optional
+        The encoding of the output file. Defaults to "utf-8".
+
+    Raises
+    ------
+    InputFormatError
+        Raised when the file does not follow the expected format.
+
+    Attributes
+    ----------
+    path
+        See initialization parameter
+    index_path : str
+        Path to the JSON file storing the index.
+    """
+
+    _version = 1
+    _index_suffix = ".sections.json"
+
+    def __init__(
+        self,
+        path: str,
+        charges_section_parsers: Sequence[ChargesSectionParser],
+        encoding: str="utf-8"
+    ) -> None:
+        self.path = path
+        self.index_path = path + self._index_suffix
+        self._encoding = encoding
+        self._parsers = {
+            self._get_parser_key(charges_section_parser): charges_section_parser
+            for charges_section_parser in charges_section_parsers
+        }
+        self._source: Dict[str, int] = {}
+        self._sections: Dict[str, List[Tuple[int, int]]] = {}
+
+        if not self._load():
+            self._build()
+
+    @staticmethod
+    def _get_parser_key(charges_section_parser: ChargesSectionParser) -> str:
+        parser_class = type(charges_section_parser)
+        return f"{parser_class.__module__}.{parser_class.__qualname__}"
+
+    def _describe_source(self) -> Dict[str, int]:
+        stat = os.stat(self.path)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def _load(self) -> bool:
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return False
+
+        if (
+            index["version"] != self._version or
+            index["source"] != self._describe_source() or
+            any(key not in index["sections"] for key in self._parsers)
+        ):
+            return False
+
+        self._source = index["source"]
+        self._sections = {
+            key: [(start, end) for start, end in positions]
+            for key, positions in index["sections"].items()
+        }
+        return True
+
+    def _build(self) -> None:
+        keys = list(self._parsers)
+        self._source = self._describe_source()
+        self._sections = {key: [] for key in keys}
+
+        decode: Callable[[bytes], str] = lambda line: line.decode(self._encoding)
+        with _open_binary_file(self.path, "r") as f:
+            lines = _iter_binary_lines(f, decode)
+            for i, start, end, _ in _iter_charges_sections(lines, list(self._parsers.values())):
+                self._sections[keys[i]].append((start, end))
+
+        self._save()
+
+    def _save(self) -> None:
+        index = {"version": self._version, "source": self._source, "sections": self._sections}
+        directory = os.path.dirname(os.path.abspath(self.index_path))
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(index, f)
+            os.replace(temp_path, self.index_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def get_section_positions(
+        self,
+        charges_section_parser: ChargesSectionParser
+    ) -> List[Tuple[int, int]]:
+        """Get the positions of all the sections of the given charge type
+
+        The output file is scanned again if it has been modified or the charge
+        type has not yet been indexed.
+
+        Parameters
+        ----------
+        charges_section_parser : ChargesSectionParser
+            Parser for the desired charge type.
+
+        Returns
+        -------
+        typing.List[typing.Tuple[int, int]]
+            The byte offsets of the first and last line of each of the
+            sections, in order of occurrence in the output file.
+        """
+        key = self._get_parser_key(charges_section_parser)
+        if key not in self._parsers:
+            self._parsers[key] = charges_section_parser
+        if key not in self._sections or self._source != self._describe_source():
+            self._build()
+        return self._sections[key]
+
+
 def get_charges_from_log(
-    f: TextIO,
+    f: FileOrPath,
     charges_section_parser: ChargesSectionParser,
     verify_against: Optional[Molecule[Atom]]=None,
-    occurrence: int=-1
+    occurrence: int=-1,
+    index: Optional[LogSectionIndex]=None
 ) -> List[Charge]:
     """Extract charges from the charges section in Gaussian output
 
     Parameters
     ----------
-    f : TextIO
+    f : FileOrPath
         File object opened in read mode containing the Gaussian `.log`/`.out`
-        output file from which the charges are to be extracted.
+        output file from which the charges are to be extracted, or the path
+        of the file, which may be compressed (see `util.open_file`).
     charges_section_parser : ChargesSectionParser
         Object of a class implementing the `ChargesSectionParser` interface for
         the desired charge type, e.g. `MullikenChargeSectionParser()`.
@@ -197,6 +359,16 @@ def get_charges_from_log(
         to select the final optimization. Other values can be specified,
         starting with 0 for the first occurrence.
 
+        Negative values count from the end of the output. For such values, if
+        `f` is an uncompressed file on disk, it is read backwards from the end
+        until the requested section is found, rather than being read in its
+        entirety.
+    index : LogSectionIndex, optional
+        Index of the sections in the output file. If given, the requested
+        section is read directly from the position recorded in the index. In
+        this case, `f` must be the file on disk for which the index was
+        created. Defaults to None.
+
     Returns
     -------
     typing.List[Charge]
@@ -209,8 +381,10 @@ def get_charges_from_log(
     IndexError
         Raised when the requested occurence of the charges section cannot
         be found could not be found in the output file.
+    ValueError
+        Raised when an index is given but `f` is not the indexed file.
     """
-    charges_section = _get_charges_section_from_log(f, charges_section_parser, occurrence)
+    charges_section = _get_charges_section_from_log(f, charges_section_parser, occurrence, index)
     parsed_charges_section = charges_section_parser.parse_section(charges_section)
     _verify_charges_section(parsed_charges_section, verify_against)
 
@@ -218,10 +392,11 @@ def get_charges_from_log(
 
 
 def get_esp_fit_stats_from_log(
-    f: TextIO,
+    f: FileOrPath,
     charges_section_parser: EspChargesSectionParser,
     verify_against: Optional[Molecule[Atom]]=None,
-    occurrence: int=-1
+    occurrence: int=-1,
+    index: Optional[LogSectionIndex]=None
 ) -> Tuple[Esp, float]:
     """Extract ESP fit statistics from charges section in Gaussian output
 
@@ -237,7 +412,7 @@ def get_esp_fit_stats_from_log(
     Tuple[Esp, float]
         RMS and RRMS.
     """
-    charges_section = _get_charges_section_from_log(f, charges_section_parser, occurrence)
+    charges_section = _get_charges_section_from_log(f, charges_section_parser, occurrence, index)
     parsed_charges_section = charges_section_parser.parse_section(charges_section)
     _verify_charges_section(parsed_charges_section, verify_against)
 
@@ -245,16 +420,26 @@ def get_esp_fit_stats_from_log(
 
 
 def _get_charges_section_from_log(
-    f: TextIO,
+    f: FileOrPath,
     charges_section_parser: ChargesSectionParser,
-    occurrence: int
+    occurrence: int,
+    index: Optional[LogSectionIndex]=None
 ) -> List[str]:
 
-    charges_sections = _get_charges_sections(f, charges_section_parser)
+    selected_charges_section: Optional[List[str]]
+    with open_if_path(f) as opened:
+        if index is not None:
+            selected_charges_section = _get_charges_section_from_index(opened, charges_section_parser, occurrence, index)
+        elif occurrence < 0 and _can_scan_backwards(opened):
+            selected_charges_section = _get_charges_section_from_end(opened, charges_section_parser, -occurrence)
+        else:
+            charges_sections = _get_charges_sections(opened, charges_section_parser)
+            try:
+                selected_charges_section = charges_sections[occurrence]
+            except IndexError:
+                selected_charges_section = None
 
-    try:
-        selected_charges_section = charges_sections[occurrence]
-    except IndexError:
+    if selected_charges_section is None:
         raise IndexError(
             f"Cannot find occurrence {occurrence} in a list of recognized charges "
             f"sections in the output. Check if the program that produced the output "
@@ -266,6 +451,159 @@ def _get_charges_section_from_log(
     return selected_charges_section
 
 
+def _get_charges_section_from_index(
+    f: TextIO,
+    charges_section_parser: ChargesSectionParser,
+    occurrence: int,
+    index: LogSectionIndex
+) -> Optional[List[str]]:
+
+    path = getattr(f, "name", None)
+    if not hasattr(f, "buffer") or not isinstance(path, str) or not os.path.isfile(path):
+        raise ValueError("A log section index can only be used with a file on disk.")
+    if not os.path.samefile(path, index.path):
+        raise ValueError(f"The given index was created for a different file: {index.path}.")
+
+    try:
+        start, _ = index.get_section_positions(charges_section_parser)[occurrence]
+    except IndexError:
+        return None
+
+    buffer = cast(BinaryIO, getattr(f, "buffer"))
+    decode: Callable[[bytes], str] = lambda line: line.decode(f.encoding, f.errors or "strict")
+    try:
+        section = _read_section_at(buffer, start, charges_section_parser, decode)
+    finally:
+        f.seek(0, io.SEEK_END)
+
+    if section is None:
+        raise InputFormatError(
+            f"Charges section not found at the position recorded in the index "
+            f"({start}). The file may have been modified."
+        )
+    return section
+
+
+_NESTED_SECTIONS_ERROR = (
+    "Encountered start of new charge section start while parsing a charge "
+    "section. Please submit a bug report attaching the input file that failed "
+    "parsing."
+)
+
+
+_BACKWARD_SCAN_BLOCK_SIZE = 1024**2
+"""int : Number of bytes read at once when scanning a log file backwards"""
+
+
+def _can_scan_backwards(f: TextIO) -> bool:
+    # The backward scan operates on the underlying binary file, which is only
+    # straightforward for a seekable file, opened at its start, in an
+    # encoding where each line can be decoded separately. Compressed files
+    # are seekable but every backward seek decompresses them from the start.
+    try:
+        return (
+            isinstance(getattr(f, "buffer").raw, io.FileIO) and
+            f.seekable() and
+            f.tell() == 0 and
+            codecs.lookup(f.encoding).name in ["ascii", "utf-8", "iso8859-1", "cp1252"]
+        )
+    except (AttributeError, LookupError, OSError, TypeError):
+        return False
+
+
+def _get_charges_section_from_end(
+    f: TextIO,
+    charges_section_parser: ChargesSectionParser,
+    occurrence_from_end: int
+) -> Optional[List[str]]:
+    """Find the given occurrence of the charges section counting from the end
+
+    Only the end of the file, up to the start of the requested section, is
+    read, which makes this much faster than a forward scan of the whole file
+    for large files. Incomplete sections are skipped as in the forward scan.
+    """
+    buffer = cast(BinaryIO, getattr(f, "buffer"))
+    decode: Callable[[bytes], str] = lambda line: line.decode(f.encoding, f.errors or "strict")
+
+    try:
+        lines = _iter_lines_backwards(buffer, decode)
+        complete_sections_found = 0
+        for offset, line in lines:
+            if not charges_section_parser.is_section_start(line):
+                continue
+            section = _read_section_at(buffer, offset, charges_section_parser, decode)
+            if section is not None:
+                complete_sections_found += 1
+                if complete_sections_found == occurrence_from_end:
+                    _verify_not_nested(lines, charges_section_parser)
+                    return section
+        return None
+    finally:
+        # Leave the file in the same state as after a forward scan.
+        f.seek(0, io.SEEK_END)
+
+
+def _iter_lines_backwards(
+    buffer: BinaryIO,
+    decode: Callable[[bytes], str]
+) -> Iterator[Tuple[int, str]]:
+    # Yields the lines and their byte offsets, last line first.
+    position = buffer.seek(0, io.SEEK_END)
+    incomplete_line = b""
+    while position > 0:
+        read_size = min(_BACKWARD_SCAN_BLOCK_SIZE, position)
+        position -= read_size
+        buffer.seek(position)
+        lines = (buffer.read(read_size) + incomplete_line).split(b"\n")
+
+        # The first line of the block may continue in the preceding block.
+        first_line_offset = position
+        if position > 0:
+            incomplete_line = lines.pop(0)
+            first_line_offset += len(incomplete_line) + 1
+
+        line_offsets = [first_line_offset]
+        for line in lines[:-1]:
+            line_offsets.append(line_offsets[-1] + len(line) + 1)
+
+        for line, offset in zip(reversed(lines), reversed(line_offsets)):
+            yield offset, decode(line.rstrip(b"\r"))
+
+
+def _verify_not_nested(
+    preceding_lines: Iterator[Tuple[int, str]],
+    charges_section_parser: ChargesSectionParser
+) -> None:
+    # A forward scan would have raised if a section were still open at the
+    # start of the found section, i.e. if a section start is encountered
+    # before a section end when going backwards from it.
+    for _, line in preceding_lines:
+        if charges_section_parser.is_section_start(line):
+            raise InputFormatError(_NESTED_SECTIONS_ERROR)
+        if charges_section_parser.is_section_end(line):
+            return
+
+
+def _read_section_at(
+    buffer: BinaryIO,
+    offset: int,
+    charges_section_parser: ChargesSectionParser,
+    decode: Callable[[bytes], str]
+) -> Optional[List[str]]:
+    # Reads the section starting at the given offset as in the forward scan,
+    # returning None if the end of the file is reached before the section end.
+    buffer.seek(offset)
+    section: List[str] = []
+    for raw_line in iter(buffer.readline, b""):
+        line = decode(raw_line.rstrip(b"\n").rstrip(b"\r"))
+        if section and charges_section_parser.is_section_start(line):
+            raise InputFormatError(_NESTED_SECTIONS_ERROR)
+        section.append(line)
+        if charges_section_parser.is_section_end(line):
+            return section
+    return None
+
+
 def _verify_charges_section(
     charges_section: ChargesSectionData,
     verify_against: Optional[Molecule[Atom]]
@@ -289,28 +627,110 @@ def _get_charges_sections(
 
     Further verification of charge type is necessary based on parsing the section.
     """
-    charges_sections: List[List[str]] = []
-    current_section: Optional[List[str]] = None
+    return [
+        section for _, _, _, section in
+        _iter_charges_sections(_iter_text_lines(f), [charges_section_parser])
+    ]
+
+
+def _iter_text_lines(f: TextIO) -> Iterator[Tuple[int, str]]:
+    # Line positions are not known in text mode and not needed by the callers.
     for line in f:
-        line = line.rstrip('\n')
-        if charges_section_parser.is_section_start(line):
+        yield 0, line.rstrip('\n')
+
+
+def _iter_binary_lines(
+    buffer: BinaryIO,
+    decode: Callable[[bytes], str]
+) -> Iterator[Tuple[int, str]]:
+    offset = buffer.tell()
+    for raw_line in buffer:
+        yield offset, decode(raw_line.rstrip(b"\n").rstrip(b"\r"))
+        offset += len(raw_line)
+
+
+def _iter_charges_sections(
+    lines: Iterable[Tuple[int, str]],
+    charges_section_parsers: Sequence[ChargesSectionParser]
+) -> Iterator[Tuple[int, int, int, List[str]]]:
+    """Extract charges sections which *may* be of any of the given types
+
+    The lines are given together with their positions in the file. Yields the
+    index of the parser, the positions of the first and last line and the
+    section as soon as the end of the section is encountered.
+    """
+    current_sections: List[Optional[Tuple[int, List[str]]]] = [None]*len(charges_section_parsers)
+    for position, line in lines:
+        for i, charges_section_parser in enumerate(charges_section_parsers):
+            current_section = current_sections[i]
+
+            if charges_section_parser.is_section_start(line):
+                if current_section is not None:
+                    raise InputFormatError(_NESTED_SECTIONS_ERROR)
+                current_section = current_sections[i] = (position, [])
+
             if current_section is not None:
-                raise InputFormatError(
-                    "Encountered start of new charge section start while "
-                    "parsing a charge section. Please submit a bug report "
-                    "attaching the input file that failed parsing."
-                )
-            current_section = []
+                start_position, section = current_section
+                section.append(line)
+                # Section end lines are less generic, hence we're only checking for
+                # them when inside a section.
+                if charges_section_parser.is_section_end(line):
+                    yield i, start_position, position, section
+                    current_sections[i] = None
+
+
+def get_charges_sections_from_log(
+    f: FileOrPath,
+    charges_section_parsers: Sequence[ChargesSectionParser],
+    verify_against: Optional[Molecule[Atom]]=None
+) -> Dict[ChargesSectionParser, List[ChargesSectionData]]:
+    """Extract all charges sections of several charge types in a single pass
+
+    This is equivalent to, but more efficient than, parsing every occurrence
+    of each of the charge types separately with `get_charges_from_log` or
+    `get_esp_fit_stats_from_log`, which would require reading the file once
+    for every charge type and occurrence.
 
-        if current_section is not None:
-            current_section.append(line)
-            # Section end lines are less generic, hence we're only checking for
-            # them when inside a section.
-            if charges_section_parser.is_section_end(line):
-                charges_sections.append(current_section)
-                current_section = None
+    Parameters
+    ----------
+    f : FileOrPath
+        File object opened in read mode containing the Gaussian `.log`/`.out`
+        output file from which the charges are to be extracted, or the path
+        of the file, which may be compressed (see `util.open_file`).
+    charges_section_parsers : typing.Sequence[ChargesSectionParser]
+        Objects of classes implementing the `ChargesSectionParser` interface
+        for the desired charge types, e.g. ``[MullikenChargeSectionParser(),
+        MkChargeSectionParser()]``.
+    verify_against : Molecule[Atom], optional
+        Molecule against which the output is to be verified. Defaults to None.
+        See `get_charges_from_log` for details.
 
-    return charges_sections
+    Raises
+    ------
+    InputFormatError
+        Raised when the file does not follow the expected format.
+
+    Returns
+    -------
+    typing.Dict[ChargesSectionParser, typing.List[ChargesSectionData]]
+        Mapping from each of the given parsers to the list of data parsed from
+        every occurrence of the corresponding charges section, in order of
+        occurrence in the output file. ESP charge parsers produce
+        `EspChargesSectionData` objects, which also contain the fit statistics.
+        Charge types which were not found are mapped to an empty list.
+    """
+    result: Dict[ChargesSectionParser, List[ChargesSectionData]] = {
+        charges_section_parser: [] for charges_section_parser in charges_section_parsers
+    }
+
+    with open_if_path(f) as opened:
+        for i, _, _, section in _iter_charges_sections(_iter_text_lines(opened), charges_section_parsers):
+            charges_section_parser = charges_section_parsers[i]
+            parsed_charges_section = charges_section_parser.parse_section(section)
+            _verify_charges_section(parsed_charges_section, verify_against)
+            result[charges_section_parser].append(parsed_charges_section)
+
+    return result
 
 
 class MullikenChargeSectionParser(ChargesSectionParser):
@@ -0,0 +1,232 @@
+"""Bulk extraction of charges from many Gaussian output files
+
+Harvesting charges from a large number of Gaussian output files one by one
+with `get_charges_from_log` is dominated by reading and scanning the files.
+This module parses the files in a pool of processes, reading each file only
+once for all the requested charge types, and collects the charges into a
+single `pandas.DataFrame`.
+"""
+
+from repESP.exceptions import InputFormatError
+from repESP.gaussian_format import ChargesSectionParser, get_charges_sections_from_log
+from repESP.gaussian_format import MullikenChargeSectionParser, MkChargeSectionParser
+from repESP.gaussian_format import ChelpChargeSectionParser, ChelpgChargeSectionParser
+from repESP.gaussian_format import HlyChargeSectionParser, NpaChargeSectionParser
+from repESP.util import _strip_compressed_extension
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import os
+import pandas as pd
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+
+charge_type_parsers: Dict[str, ChargesSectionParser] = {
+    "mulliken": MullikenChargeSectionParser(),
+    "nbo": NpaChargeSectionParser(),
+    "mk": MkChargeSectionParser(),
+    "chelp": ChelpChargeSectionParser(),
+    "chelpg": ChelpgChargeSectionParser(),
+    "hly": HlyChargeSectionParser(),
+}
+"""Dict[str, ChargesSectionParser] : Parsers of the supported charge types keyed by their names"""
+
+
+@dataclass
+class ChargesTable:
+    """Dataclass representing charges extracted from many Gaussian output files
+
+    Parameters
+    ----------
+    charges : pd.DataFrame
+        Table with a single "charge" column, indexed by the "file",
+        "charge_type" and (zero-based) "atom_index" levels. Files are listed in
+        the order in which they were given.
+    errors : pd.DataFrame
+        Table with a single "error" column containing the messages of the
+        errors encountered when reading the files, indexed by "file". Charges
+        from files listed here are not included in the `charges` table.
+
+    Attributes
+    ----------
+    charges
+        See initialization parameter
+    errors
+        See initialization parameter
+    """
+    charges: pd.DataFrame
+    errors: pd.DataFrame
+
+
+def find_log_files(directory: str, extensions: Sequence[str]=(".log", ".out")) -> List[str]:
+    """Find Gaussian output files in a directory tree
+
+    Files compressed with gzip, bzip2 or xz are also found, e.g. "job.log.gz"
+    for the default extensions (see `repESP.util.open_file`).
+
+    Parameters
+    ----------
+    directory : str
+        Path to the directory to be searched recursively.
+    extensions : typing.Sequence[str], optional
+        The extensions of the files to be returned, not including the
+        extension of the compression format. Defaults to ``(".log", ".out")``.
+
+    Returns
+    -------
+    typing.List[str]
+        The paths to the found files, sorted to make the order reproducible.
+    """
+    result = []
+    for dir_path, _dir_names, file_names in os.walk(directory):
+        for file_name in file_names:
+            if _strip_compressed_extension(file_name).endswith(tuple(extensions)):
+                result.append(os.path.join(dir_path, file_name))
+    return sorted(result)
+
+
+_FileCharges = Tuple[str, Dict[str, List[float]], Optional[str]]
+
+
+def _get_file_charges(
+    path: str,
+    charges_section_parsers: Mapping[str, ChargesSectionParser],
+    occurrence: int
+) -> _FileCharges:
+    # Errors are returned rather than raised, so that a single malformed file
+    # does not abort the processing of the remaining files.
+    try:
+        sections = get_charges_sections_from_log(path, list(charges_section_parsers.values()))
+        charges = {}
+        for name, charges_section_parser in charges_section_parsers.items():
+            sections_of_type = sections[charges_section_parser]
+            if sections_of_type:
+                try:
+                    section = sections_of_type[occurrence]
+                except IndexError:
+                    raise InputFormatError(
+                        f"Requested occurrence {occurrence} of {name} charges "
+                        f"but only {len(sections_of_type)} found."
+                    )
+                charges[name] = [float(charge) for charge in section.charges]
+        return path, charges, None
+    except Exception as e:
+        # Any failure is recorded, as malformed files can raise other
+        # exceptions than InputFormatError.
+        return path, {}, f"{type(e).__name__}: {e}"
+
+
+def _iter_file_charges(
+    paths: Sequence[str],
+    charges_section_parsers: Mapping[str, ChargesSectionParser],
+    occurrence: int,
+    max_workers: Optional[int],
+    chunksize: int
+) -> Iterator[_FileCharges]:
+    if max_workers == 1:
+        for path in paths:
+            yield _get_file_charges(path, charges_section_parsers, occurrence)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        yield from executor.map(
+            _get_file_charges,
+            paths,
+            [charges_section_parsers]*len(paths),
+            [occurrence]*len(paths),
+            chunksize=chunksize
+        )
+
+
+def get_charges_table_from_logs(
+    paths: Iterable[str],
+    charge_types: Optional[Sequence[str]]=None,
+    occurrence: int=-1,
+    max_workers: Optional[int]=None,
+    chunksize: int=16
+) -> ChargesTable:
+    """Extract charges from many Gaussian output files in parallel
+
+    Every file is read once, extracting all the requested charge types in a
+    single pass. Charge types which are not present in a file are omitted
+    from the result for that file without raising an error.
+
+    Parameters
+    ----------
+    paths : typing.Iterable[str]
+        Paths to the Gaussian `.log`/`.out` files, e.g. as returned by
+        `find_log_files`.
+    charge_types : typing.Optional[typing.Sequence[str]], optional
+        The names of the charge types to be extracted, which must be keys of
+        the `charge_type_parsers` dictionary. Defaults to None, in which
+        case all the supported charge types are extracted.
+    occurrence : int, optional
+        Which occurrence of each charges section to extract from every file,
+        following Python indexing semantics. Defaults to -1, i.e. the last
+        occurrence, which is the result of the final step of an optimization.
+    max_workers : typing.Optional[int], optional
+        The number of worker processes. Defaults to None, in which case the
+        number of processors on the machine is used. If set to 1, the files
+        are parsed in the calling process.
+    chunksize : int, optional
+        The number of files sent to a worker process at once. Defaults to 16.
+
+    Raises
+    ------
+    ValueError
+        Raised when an unsupported charge type is requested.
+
+    Returns
+    -------
+    ChargesTable
+        The extracted charges and the errors encountered for individual files.
+        Errors in reading or parsing a file are recorded rather than raised.
+    """
+    if charge_types is None:
+        charge_types = list(charge_type_parsers)
+
+    unsupported = [name for name in charge_types if name not in charge_type_parsers]
+    if unsupported:
+        raise ValueError(
+            f"Unsupported charge types requested: {unsupported}. Supported "
+            f"charge types are: {list(charge_type_parsers)}."
+        )
+
+    requested_parsers = {name: charge_type_parsers[name] for name in charge_types}
+    paths = list(paths)
+
+    # The table is assembled column-wise to avoid creating a pandas object
+    # for every file.
+    files: List[str] = []
+    types: List[str] = []
+    atom_indices: List[int] = []
+    charge_values: List[float] = []
+    error_files: List[str] = []
+    error_messages: List[str] = []
+
+    for path, charges, error in _iter_file_charges(
+        paths, requested_parsers, occurrence, max_workers, chunksize
+    ):
+        if error is not None:
+            error_files.append(path)
+            error_messages.append(error)
+            continue
+        for name, values in charges.items():
+            files.extend([path]*len(values))
+            types.extend([name]*len(values))
+            atom_indices.extend(range(len(values)))
+            charge_values.extend(values)
+
+    charges_table = pd.DataFrame(
+        {"charge": charge_values},
+        index=pd.MultiIndex.from_arrays(
+            [files, types, atom_indices],
+            names=["file", "charge_type", "atom_index"]
+        )
+    )
+    errors_table = pd.DataFrame(
+        {"error": error_messages},
+        index=pd.Index(error_files, name="file", dtype=object)
+    )
+
+    return ChargesTable(charges_table, errors_table)
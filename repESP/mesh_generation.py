@@ -0,0 +1,210 @@
+"""Generating fitting points for ESP-based partial charges
+
+The functions in this module generate the points at which the ESP is fitted
+by the Merz-Kollman (MK) and CHelpG schemes, reproducing the points used by
+Gaussian. The ESP at these points can then be calculated, e.g. with
+`calc_fields.esp_from_wavefunction`, without running a new QM calculation.
+
+As is customary in the specification of these schemes, all the parameters
+are given in angstrom, while the coordinates of the molecule and of the
+generated points are in bohr, as everywhere else in the library.
+
+Attributes
+----------
+"""
+
+from repESP.fields import ArrayMesh
+from repESP.types import AtomWithCoords, Molecule
+from repESP.util import angstrom_per_bohr
+
+from scipy.spatial import cKDTree  # type: ignore
+import numpy as np
+from typing import Dict, Optional, Sequence
+
+
+MK_RADII: Dict[int, float] = {
+    1: 1.2, 6: 1.5, 7: 1.5, 8: 1.4, 9: 1.35, 15: 1.8, 16: 1.75, 17: 1.7,
+}
+"""Dict[int, float] : Merz-Kollman van der Waals radii in angstrom
+
+The radii are given by atomic number for the elements for which they are
+defined by Gaussian.
+"""
+
+CHELPG_RADII: Dict[int, float] = {
+    1: 1.45, 2: 1.45, 3: 1.5, 4: 1.5, 5: 1.5, 6: 1.5, 7: 1.7, 8: 1.7, 9: 1.7, 10: 1.7,
+}
+"""Dict[int, float] : Breneman (CHelpG) van der Waals radii in angstrom
+
+The radii are given by atomic number for the elements for which they are
+defined by Gaussian.
+"""
+
+
+def _get_radii(molecule: Molecule[AtomWithCoords], radii: Dict[int, float]) -> np.ndarray:
+    try:
+        return np.array([radii[atom.atomic_number] for atom in molecule.atoms])
+    except KeyError as e:
+        raise ValueError(f"No van der Waals radius specified for atomic number {e}.")
+
+
+def _get_coordinates(molecule: Molecule[AtomWithCoords]) -> np.ndarray:
+    # Coordinates of the atoms in angstrom
+    return angstrom_per_bohr*np.array(
+        [tuple(atom.coords) for atom in molecule.atoms], dtype=float
+    ).reshape(-1, 3)
+
+
+def _get_points_inside(
+    points: np.ndarray,
+    coordinates: np.ndarray,
+    radii: np.ndarray
+) -> np.ndarray:
+    # Boolean mask of the points lying strictly inside of a sphere of the
+    # given radius around any of the atoms. The tolerance prevents rounding
+    # errors from excluding points generated on the spheres themselves.
+    result = np.zeros(len(points), dtype=bool)
+    if len(points) == 0 or len(radii) == 0:
+        return result
+    distances = cKDTree(coordinates).sparse_distance_matrix(
+        cKDTree(points),
+        radii.max(),
+        output_type="ndarray"
+    )
+    inside = distances["v"] < radii[distances["i"]]*(1 - 1e-10)
+    result[distances["j"][inside]] = True
+    return result
+
+
+def _get_sphere_points(point_count: int) -> np.ndarray:
+    # Points on a unit sphere, distributed along circles of latitude as in
+    # the original Merz-Kollman scheme.
+    equator_count = int(np.sqrt(np.pi*point_count))
+    latitude_count = equator_count//2
+    result = []
+    for i in range(latitude_count + 1):
+        polar_angle = np.pi*i/latitude_count if latitude_count else 0
+        xy = np.sin(polar_angle)
+        longitude_count = max(int(equator_count*xy + 1e-10), 1)
+        azimuthal_angles = 2*np.pi*np.arange(longitude_count)/longitude_count
+        result.append(np.stack([
+            np.cos(azimuthal_angles)*xy,
+            np.sin(azimuthal_angles)*xy,
+            np.full(longitude_count, np.cos(polar_angle))
+        ], axis=1))
+    return np.concatenate(result)[:point_count]
+
+
+def generate_mk_mesh(
+    molecule: Molecule[AtomWithCoords],
+    scale_factors: Sequence[float]=(1.4, 1.6, 1.8, 2.0),
+    density: float=1.0,
+    radii: Optional[Dict[int, float]]=None
+) -> ArrayMesh:
+    """Generate fitting points according to the Merz-Kollman scheme
+
+    The points lie on nested surfaces, each of which is the union of spheres
+    around the atoms with the van der Waals radii of the atoms multiplied by
+    a scale factor. The default parameters reproduce the points used by
+    Gaussian with ``Pop=MK``.
+
+    Parameters
+    ----------
+    molecule : Molecule[AtomWithCoords]
+        The molecule around which the points are to be generated.
+    scale_factors : Sequence[float], optional
+        The factors scaling the van der Waals radii for every surface.
+        Defaults to (1.4, 1.6, 1.8, 2.0).
+    density : float, optional
+        The number of points per square angstrom of each sphere. Defaults to
+        1, while 6 is recommended for the RESP method (the equivalent of
+        ``IOp(6/42=6)`` in Gaussian).
+    radii : Dict[int, float], optional
+        The van der Waals radii in angstrom by atomic number. Defaults to
+        `MK_RADII`.
+
+    Raises
+    ------
+    ValueError
+        Raised when a radius is not specified for an atom of the molecule.
+
+    Returns
+    -------
+    ArrayMesh
+        The generated points, ordered by surface and, within each surface, by
+        the atom around which they were generated.
+    """
+    coordinates = _get_coordinates(molecule)
+    atom_radii = _get_radii(molecule, MK_RADII if radii is None else radii)
+
+    result = []
+    for scale_factor in scale_factors:
+        scaled_radii = scale_factor*atom_radii
+        points = np.concatenate([
+            center + radius*_get_sphere_points(int(density*4*np.pi*radius**2))
+            for center, radius in zip(coordinates, scaled_radii)
+        ] + [np.zeros((0, 3))])
+        result.append(points[~_get_points_inside(points, coordinates, scaled_radii)])
+
+    return ArrayMesh(np.concatenate(result + [np.zeros((0, 3))])/angstrom_per_bohr)
+
+
+def generate_chelpg_mesh(
+    molecule: Molecule[AtomWithCoords],
+    spacing: float=0.3,
+    box_extension: float=2.8,
+    radii: Optional[Dict[int, float]]=None
+) -> ArrayMesh:
+    """Generate fitting points according to the CHelpG scheme
+
+    The points are selected from a cubic grid enclosing the molecule. Points
+    lying within the van der Waals radius of any atom or farther than
+    `box_extension` from all the atoms are rejected. The default parameters
+    reproduce the points used by Gaussian with ``Pop=CHelpG``.
+
+    Parameters
+    ----------
+    molecule : Molecule[AtomWithCoords]
+        The molecule around which the points are to be generated.
+    spacing : float, optional
+        The distance between neighbouring grid points in angstrom. Defaults
+        to 0.3.
+    box_extension : float, optional
+        The maximum distance in angstrom of a point from the nearest atom.
+        Defaults to 2.8.
+    radii : Dict[int, float], optional
+        The van der Waals radii in angstrom by atomic number. Defaults to
+        `CHELPG_RADII`.
+
+    Raises
+    ------
+    ValueError
+        Raised when a radius is not specified for an atom of the molecule.
+
+    Returns
+    -------
+    ArrayMesh
+        The generated points, in the order of the underlying grid.
+    """
+    coordinates = _get_coordinates(molecule)
+    atom_radii = _get_radii(molecule, CHELPG_RADII if radii is None else radii)
+
+    # The grid is centered on the box enclosing the molecule and extended in
+    # every direction by `box_extension`.
+    lower = coordinates.min(axis=0) - box_extension
+    upper = coordinates.max(axis=0) + box_extension
+    step_counts = np.ceil((upper - lower)/spacing).astype(int) + 1
+    axes_values = [
+        0.5*(lower[i] + upper[i]) + spacing*(np.arange(step_counts[i]) - 0.5*(step_counts[i] - 1))
+        for i in range(3)
+    ]
+    points = np.stack(
+        [values.ravel() for values in np.meshgrid(*axes_values, indexing="ij")],
+        axis=1
+    )
+
+    nearest_distances, _ = cKDTree(coordinates).query(points)
+    points = points[nearest_distances <= box_extension]
+    points = points[~_get_points_inside(points, coordinates, atom_radii)]
+
+    return ArrayMesh(points/angstrom_per_bohr)
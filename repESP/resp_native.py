@@ -0,0 +1,542 @@
+"""Native implementation of ESP fitting with restraints as in ``resp``
+
+This module reproduces the fitting performed by the ``resp`` program for
+single structure "respin" instructions without running an external program.
+This makes it possible to efficiently fit charges at many restraint weights
+(`fit_restraint_path`), for example when choosing the restraint weight for
+a force field, and to assess the error introduced by fitting to a reduced
+set of points (`decimate_esp_data`).
+"""
+
+from repESP.charges import Charge
+from repESP.esp_util import EspData
+from repESP.fields import ArrayMesh, Esp, Field
+from repESP.respin_format import Respin
+
+from dataclasses import dataclass
+import numpy as np
+from typing import List, Optional, Sequence
+
+
+_HYPERBOLIC_RESTRAINT_TIGHTNESS = 0.1
+"""float : Value of the `b` parameter of the hyperbolic restraint used by ``resp``"""
+
+
+@dataclass
+class RestraintPath:
+    """Dataclass representing charges fitted at a range of restraint weights
+
+    Parameters
+    ----------
+    qwts : typing.List[float]
+        The restraint weights at which the charges were fitted.
+    charges : typing.List[typing.List[Charge]]
+        The fitted charges for each of the restraint weights.
+    rms : typing.List[Esp]
+        The RMS error of the ESP reproduced from the fitted charges for each of
+        the restraint weights.
+    rrms : typing.List[float]
+        The relative RMS error, as defined by ``resp``, for each of the
+        restraint weights.
+
+    Attributes
+    ----------
+    qwts
+        See initialization parameter
+    charges
+        See initialization parameter
+    rms
+        See initialization parameter
+    rrms
+        See initialization parameter
+    """
+    qwts: List[float]
+    charges: List[List[Charge]]
+    rms: List[Esp]
+    rrms: List[float]
+
+
+class _NormalEquations:
+    """The least-squares problem of fitting charges to the ESP
+
+    The expensive part of the fitting, which scales with the number of fitting
+    points, is performed on initialization. Subsequent solves only involve
+    systems with a size of the order of the number of atoms.
+    """
+
+    # Limits the memory needed for the inverse distance matrix.
+    _chunk_size = 10000
+
+    def __init__(self, esp_data: EspData, respin: Respin, initial_charges: Optional[List[Charge]]) -> None:
+
+        if respin.cntrl.nmol != 1:
+            raise NotImplementedError(
+                "Native fitting of multiple structures is not currently supported."
+            )
+
+        if respin.cntrl.irstrnt == 2:
+            raise ValueError(
+                "The `irstrnt` value of 2 requests analysis of input charges without fitting."
+            )
+
+        if respin.cntrl.iqopt in [2, 3] and initial_charges is None:
+            raise ValueError("Initial charges expected (`iqopt` is not 1) but none given.")
+
+        atom_count = len(esp_data.atoms_coords)
+        if atom_count != respin.iuniq:
+            raise ValueError(
+                f"The number of atoms in the .esp data ({atom_count}) does not "
+                f"match that in the respin ({respin.iuniq})."
+            )
+
+        atoms_coords = np.array(esp_data.atoms_coords, dtype=float)
+        points_coords = esp_data.field.mesh.as_array()
+        esp_values = np.array(esp_data.field.values, dtype=float)
+
+        self.a = np.zeros((atom_count, atom_count))
+        self.b = np.zeros(atom_count)
+        for start in range(0, len(points_coords), self._chunk_size):
+            chunk = slice(start, start + self._chunk_size)
+            inverse_distances = 1/np.linalg.norm(
+                points_coords[chunk, np.newaxis, :] - atoms_coords[np.newaxis, :, :],
+                axis=2
+            )
+            self.a += inverse_distances.T @ inverse_distances
+            self.b += inverse_distances.T @ esp_values[chunk]
+
+        self.point_count = len(esp_values)
+        self.ssvpot = float(esp_values @ esp_values)
+        self.total_charge = respin.charge
+        self.hyperbolic = respin.cntrl.irstrnt == 1
+
+        self.restrained = np.array([
+            respin.cntrl.ihfree == 0 or atom.atomic_number != 1
+            for atom in respin.molecule.atoms
+        ])
+
+        self._init_parametrization(respin.ivary)
+
+        self.initial_charges = np.zeros(atom_count)
+        if respin.cntrl.iqopt in [2, 3] and initial_charges is not None:
+            if len(initial_charges) != atom_count:
+                raise ValueError(
+                    f"The number of initial charges ({len(initial_charges)}) "
+                    f"does not match the number of atoms ({atom_count})."
+                )
+            self.initial_charges = np.array(initial_charges, dtype=float)
+            if respin.cntrl.iqopt == 3:
+                self.initial_charges = self._average_over_parameters(self.initial_charges)
+
+        self.fixed_charges = np.where(self.frozen, self.initial_charges, 0)
+
+    def _init_parametrization(self, ivary: Respin.Ivary) -> None:
+        # Charges are expressed as q = T p + q_fixed, where p are the
+        # independent parameters. Equivalenced atoms share a parameter.
+        atom_count = len(ivary.values)
+        parameter_of_atom: List[Optional[int]] = [None]*atom_count
+        parameter_count = 0
+
+        def get_parameter(atom: int, visited: List[int]) -> int:
+            existing = parameter_of_atom[atom]
+            if existing is not None:
+                return existing
+            ivary_value = ivary.values[atom]
+            if ivary_value > 0 and ivary_value - 1 != atom:
+                if atom in visited:
+                    raise ValueError("Cyclic equivalencing in ivary values.")
+                parameter = get_parameter(ivary_value - 1, visited + [atom])
+            else:
+                nonlocal parameter_count
+                parameter = parameter_count
+                parameter_count += 1
+            parameter_of_atom[atom] = parameter
+            return parameter
+
+        self.frozen = np.array([value == -1 for value in ivary.values])
+        for atom in range(atom_count):
+            if not self.frozen[atom]:
+                get_parameter(atom, [])
+
+        self.t = np.zeros((atom_count, parameter_count))
+        for atom, parameter in enumerate(parameter_of_atom):
+            if parameter is not None:
+                self.t[atom, parameter] = 1
+
+    def _average_over_parameters(self, charges: np.ndarray) -> np.ndarray:
+        counts = self.t.sum(axis=0)
+        averaged = self.t @ ((self.t.T @ charges)/np.where(counts > 0, counts, 1))
+        return np.where(self.t.any(axis=1), averaged, charges)
+
+    def solve(
+        self,
+        qwt: float,
+        initial_guess: np.ndarray,
+        max_iterations: int=50,
+        tolerance: float=1e-6
+    ) -> np.ndarray:
+        """Fit the charges with the given restraint weight
+
+        For hyperbolic restraints, the fitting is iterated starting from the
+        given initial guess until the charges change by less than `tolerance`.
+        """
+        atom_count, parameter_count = self.t.shape
+        charges: np.ndarray = initial_guess.copy()
+
+        constraint_row = np.ones(atom_count) @ self.t
+        remaining_charge = self.total_charge - self.fixed_charges.sum()
+
+        for _ in range(max_iterations):
+            if self.hyperbolic:
+                restraint = qwt/np.sqrt(charges**2 + _HYPERBOLIC_RESTRAINT_TIGHTNESS**2)
+            else:
+                restraint = np.full(atom_count, qwt)
+            a = self.a + np.diag(np.where(self.restrained, restraint, 0))
+
+            # The total charge constraint is imposed with a Lagrange multiplier.
+            system = np.zeros((parameter_count + 1, parameter_count + 1))
+            system[:parameter_count, :parameter_count] = self.t.T @ a @ self.t
+            system[:parameter_count, parameter_count] = constraint_row
+            system[parameter_count, :parameter_count] = constraint_row
+            rhs = np.append(self.t.T @ (self.b - a @ self.fixed_charges), remaining_charge)
+
+            solution = np.linalg.lstsq(system, rhs, rcond=None)[0]
+            new_charges = self.t @ solution[:parameter_count] + self.fixed_charges
+
+            converged = np.max(np.abs(new_charges - charges), initial=0) < tolerance
+            charges = new_charges
+            if converged or not self.hyperbolic:
+                break
+
+        return charges
+
+    def chipot(self, charges: np.ndarray) -> float:
+        """The sum of squares of the ESP reproduced from the charges"""
+        return float(charges @ self.a @ charges - 2*self.b @ charges + self.ssvpot)
+
+
+def fit_restraint_path(
+    esp_data: EspData,
+    respin: Respin,
+    qwts: Sequence[float],
+    initial_charges: Optional[List[Charge]]=None
+) -> RestraintPath:
+    """Fit charges at a range of restraint weights
+
+    The fitting follows the algorithm of the ``resp`` program. The normal
+    equations of the least-squares problem are formed only once, which is the
+    dominant cost for large sets of fitting points. The iterative solution for
+    each weight is started from the charges obtained for the preceding weight,
+    so the weights should be given in increasing or decreasing order.
+
+    Parameters
+    ----------
+    esp_data : EspData
+        Object containing the atom coordinates and ESP field values at the
+        points to be used in the fitting.
+    respin : Respin
+        Fitting instructions for a single structure. The `qwt` and `inopt`
+        values are ignored.
+    qwts : Sequence[float]
+        The restraint weights at which to fit the charges.
+    initial_charges : Optional[typing.List[Charge]], optional
+        Initial charges, which are required if `iqopt` is not equal to 1 and
+        otherwise ignored. Charges on frozen atoms are fixed at these values.
+        Defaults to None.
+
+    Raises
+    ------
+    ValueError
+        Raised when the arguments are inconsistent, a restraint weight is
+        negative or the instructions do not request any fitting.
+    NotImplementedError
+        Raised when `respin` describes multiple structures.
+
+    Returns
+    -------
+    RestraintPath
+        The charges and fit quality at each of the restraint weights.
+    """
+    if any(qwt < 0 for qwt in qwts):
+        raise ValueError(f"Restraint weights must not be negative: {qwts}.")
+
+    normal_equations = _NormalEquations(esp_data, respin, initial_charges)
+
+    result = RestraintPath([], [], [], [])
+    charges = normal_equations.initial_charges
+    for qwt in qwts:
+        charges = normal_equations.solve(qwt, charges)
+        chipot = max(normal_equations.chipot(charges), 0)
+        result.qwts.append(qwt)
+        result.charges.append([Charge(charge) for charge in charges])
+        result.rms.append(Esp(np.sqrt(chipot/normal_equations.point_count)))
+        result.rrms.append(float(np.sqrt(chipot/normal_equations.ssvpot)))
+
+    return result
+
+
+def fit_charges(
+    esp_data: EspData,
+    respin: Respin,
+    initial_charges: Optional[List[Charge]]=None
+) -> List[Charge]:
+    """Fit charges as the ``resp`` program would, without running it
+
+    Parameters
+    ----------
+    esp_data : EspData
+        Object containing the atom coordinates and ESP field values at the
+        points to be used in the fitting.
+    respin : Respin
+        Fitting instructions for a single structure.
+    initial_charges : Optional[typing.List[Charge]], optional
+        See `fit_restraint_path` function parameter
+
+    Raises
+    ------
+    ValueError
+        Raised when the arguments are inconsistent or the instructions do not
+        request any fitting.
+    NotImplementedError
+        Raised when `respin` describes multiple structures.
+
+    Returns
+    -------
+    typing.List[Charge]
+        The fitted charges.
+    """
+    return fit_restraint_path(esp_data, respin, [respin.cntrl.qwt], initial_charges).charges[0]
+
+
+@dataclass
+class Decimation:
+    """Dataclass representing a reduced set of fitting points and its effect
+
+    Parameters
+    ----------
+    esp_data : EspData
+        The ESP data at the selected fitting points.
+    indices : np.ndarray
+        The indices of the selected points in the original set of points, in
+        increasing order.
+    charges : typing.List[Charge]
+        The charges fitted to the ESP at the selected points.
+    reference_charges : typing.List[Charge]
+        The charges fitted to the ESP at all the original points.
+    rrms : float
+        The relative RMS error, as defined by ``resp``, of the ESP at all the
+        original points reproduced from `charges`.
+    reference_rrms : float
+        The relative RMS error of the ESP at all the original points
+        reproduced from `reference_charges`. The difference from `rrms` is
+        the deterioration of the fit quality due to the decimation.
+    qwt : float
+        The restraint weight with which `charges` were fitted. The sum of
+        squared ESP errors minimized by ``resp`` grows with the number of
+        points, while the restraint does not, so the restraint weight given
+        in the respin is scaled by the fraction of the selected points. This
+        weight should be used in subsequent fits to the selected points.
+
+    Attributes
+    ----------
+    esp_data
+        See initialization parameter
+    indices
+        See initialization parameter
+    charges
+        See initialization parameter
+    reference_charges
+        See initialization parameter
+    rrms
+        See initialization parameter
+    reference_rrms
+        See initialization parameter
+    qwt
+        See initialization parameter
+    """
+    esp_data: EspData
+    indices: np.ndarray
+    charges: List[Charge]
+    reference_charges: List[Charge]
+    rrms: float
+    reference_rrms: float
+    qwt: float
+
+    @property
+    def max_charge_deviation(self) -> Charge:
+        """The largest absolute difference between `charges` and `reference_charges`"""
+        return Charge(max(
+            (abs(charge - reference) for charge, reference in zip(self.charges, self.reference_charges)),
+            default=0
+        ))
+
+
+_MAX_CELL_HALVINGS = 50
+"""int : Limit on halving the cell edge in `_select_stratified`
+
+After this many halvings, the edge is below the precision of the coordinates
+relative to their extent, so that all distinct points are in separate cells.
+"""
+
+
+def _select_stratified(points_coords: np.ndarray, point_count: int, rng: np.random.Generator) -> np.ndarray:
+    # Space is divided into cubic cells with the largest edge for which at
+    # least `point_count` cells are occupied, found by bisection. One point
+    # is chosen at random from each of the occupied cells.
+    def occupied_cells(edge: float) -> np.ndarray:
+        return np.unique(np.floor(points_coords/edge).astype(np.int64), axis=0, return_inverse=True)[1].ravel()
+
+    # Duplicate points always share a cell, so no more cells can be occupied
+    # than there are distinct points.
+    cell_count = min(point_count, len(np.unique(points_coords, axis=0)))
+
+    lower = upper = float(np.max(np.ptp(points_coords, axis=0))) + 1
+    for _ in range(_MAX_CELL_HALVINGS):
+        if np.max(occupied_cells(lower)) + 1 >= cell_count:
+            break
+        lower /= 2
+    for _ in range(30):
+        if upper/lower < 1 + 1e-3:
+            break
+        middle = np.sqrt(lower*upper)
+        if np.max(occupied_cells(middle)) + 1 >= cell_count:
+            lower = middle
+        else:
+            upper = middle
+
+    permutation = rng.permutation(len(points_coords))
+    cells = occupied_cells(lower)[permutation]
+    _, first_in_cell = np.unique(cells, return_index=True)
+    selected = permutation[first_in_cell]
+    if len(selected) < point_count:
+        # Only possible with duplicate points, the remainder of which is
+        # chosen at random from the points not yet selected.
+        remaining = np.setdiff1d(permutation, selected)
+        selected = np.concatenate([selected, rng.choice(remaining, point_count - len(selected), replace=False)])
+    # The number of occupied cells may exceed the requested number of points.
+    result: np.ndarray = rng.choice(selected, point_count, replace=False)
+    return result
+
+
+def _select_by_leverage(
+    points_coords: np.ndarray,
+    atoms_coords: np.ndarray,
+    normal_equations: _NormalEquations,
+    point_count: int,
+    rng: np.random.Generator
+) -> np.ndarray:
+    # Points are sampled with probabilities proportional to their statistical
+    # leverage in the unconstrained fit, i.e. the diagonal elements of the
+    # hat matrix A (A^T A)^-1 A^T of the inverse distance matrix A.
+    inverse_a = np.linalg.pinv(normal_equations.a)
+    leverages = np.empty(len(points_coords))
+    for start in range(0, len(points_coords), _NormalEquations._chunk_size):
+        chunk = slice(start, start + _NormalEquations._chunk_size)
+        inverse_distances = 1/np.linalg.norm(
+            points_coords[chunk, np.newaxis, :] - atoms_coords[np.newaxis, :, :],
+            axis=2
+        )
+        leverages[chunk] = np.sum((inverse_distances @ inverse_a)*inverse_distances, axis=1)
+    leverages = np.maximum(leverages, 0)
+    return rng.choice(len(points_coords), point_count, replace=False, p=leverages/leverages.sum())
+
+
+def decimate_esp_data(
+    esp_data: EspData,
+    respin: Respin,
+    point_count: int,
+    method: str="stratified",
+    seed: Optional[int]=None,
+    initial_charges: Optional[List[Charge]]=None
+) -> Decimation:
+    """Reduce the number of fitting points and report the effect on the fit
+
+    The cost of the fitting is dominated by the number of fitting points,
+    while dense sets of points, e.g. high-density MK surfaces, contain much
+    redundant information. This function selects a subset of the points and
+    fits the charges both to the subset and to all the points, so that the
+    error introduced by the reduction is known.
+
+    Parameters
+    ----------
+    esp_data : EspData
+        Object containing the atom coordinates and ESP field values at the
+        points to be decimated.
+    respin : Respin
+        Fitting instructions for a single structure, used to assess the
+        effect of the decimation.
+    point_count : int
+        The number of points to be selected.
+    method : str, optional
+        The method of selecting the points. Defaults to "stratified", in
+        which case space is divided into cubic cells of equal size and a
+        point is chosen at random from each cell, so that the selected
+        points cover the original points evenly. With "leverage", the points
+        are chosen at random with probabilities proportional to their
+        leverage scores in the least-squares fit, which favours the points
+        with most influence on the fitted charges.
+    seed : Optional[int], optional
+        The seed of the random number generator used to select the points.
+        Defaults to None, in which case the selection is not reproducible.
+    initial_charges : Optional[typing.List[Charge]], optional
+        See `fit_restraint_path` function parameter
+
+    Raises
+    ------
+    ValueError
+        Raised when the method is not recognized, the number of points to
+        be selected is not between 1 and the number of the original points,
+        or the arguments are otherwise inconsistent.
+    NotImplementedError
+        Raised when `respin` describes multiple structures.
+
+    Returns
+    -------
+    Decimation
+        The selected points together with the charges fitted to them and to
+        all the original points.
+    """
+    points_coords = esp_data.field.mesh.as_array()
+    if not 0 < point_count <= len(points_coords):
+        raise ValueError(
+            f"The number of points to be selected ({point_count}) must be "
+            f"between 1 and the number of points ({len(points_coords)})."
+        )
+
+    normal_equations = _NormalEquations(esp_data, respin, initial_charges)
+    rng = np.random.default_rng(seed)
+    if method == "stratified":
+        indices = _select_stratified(points_coords, point_count, rng)
+    elif method == "leverage":
+        atoms_coords = np.array(esp_data.atoms_coords, dtype=float)
+        indices = _select_by_leverage(points_coords, atoms_coords, normal_equations, point_count, rng)
+    else:
+        raise ValueError(f"Decimation method not recognized: {method}.")
+    indices = np.sort(indices)
+
+    decimated = EspData(
+        esp_data.atoms_coords,
+        Field(
+            ArrayMesh(points_coords[indices]),
+            np.asarray(esp_data.field.values, dtype=float)[indices]
+        )
+    )
+
+    # The restraint is not normalized by the number of points, so its
+    # weight is scaled down to keep its relative strength unchanged.
+    qwt = respin.cntrl.qwt*point_count/len(points_coords)
+    decimated_equations = _NormalEquations(decimated, respin, initial_charges)
+    charges = decimated_equations.solve(qwt, decimated_equations.initial_charges)
+    reference_charges = normal_equations.solve(respin.cntrl.qwt, normal_equations.initial_charges)
+
+    def rrms(charges: np.ndarray) -> float:
+        return float(np.sqrt(max(normal_equations.chipot(charges), 0)/normal_equations.ssvpot))
+
+    return Decimation(
+        decimated,
+        indices,
+        [Charge(charge) for charge in charges],
+        [Charge(charge) for charge in reference_charges],
+        rrms(charges),
+        rrms(reference_charges),
+        qwt
+    )
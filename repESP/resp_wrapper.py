@@ -3,6 +3,7 @@
 from repESP.charges import Charge
 from repESP.esp_util import EspData, write_resp_esp
 from repESP.equivalence import Equivalence
+from repESP.exceptions import InputFormatError
 from repESP.respin_generation import prepare_respin
 from repESP.respin_generation import RespStage1RespinGenerator, RespStage2RespinGenerator
 from repESP.respin_generation import FitHydrogensOnlyRespinGenerator, FrozenAtomsRespinGenerator
@@ -11,30 +12,332 @@ from repESP.respin_format import Respin, write_respin
 from repESP.resp_charges_format import write_resp_charges, parse_resp_charges
 from repESP.types import Atom, Molecule
 
-from dataclasses import dataclass
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+import hashlib
+import io
 from itertools import zip_longest
+import json
 import os
+import queue
+import shutil
 import subprocess
 import sys
-from typing import Callable, List, Optional
+from types import TracebackType
+from fortranformat import FortranRecordWriter as FW
+from typing import Callable, Iterator, List, Optional, Sequence, TextIO, Type, TypeVar, Union
 import tempfile
 
 
+class ScratchDirectoryPool:
+    """Pool of reusable scratch directories in which ``resp`` is run
+
+    By default, every call to `run_resp` creates and removes a temporary
+    directory, and a two-stage fit creates two. When fitting at a high rate,
+    especially with a network-mounted temporary directory, this metadata churn
+    can take up a noticeable share of the runtime. This pool creates its
+    directories once and only empties them between uses.
+
+    The pool is safe to share between threads of a single process: when all
+    directories are in use, `acquire` blocks until one is released. Each
+    process should create its own pool.
+
+    The pool can be used as a context manager, which calls `close` on exit.
+
+    Example
+    -------
+
+    >>> with ScratchDirectoryPool(size=4) as pool:
+    ...     for esp_data in esp_data_list:
+    ...         charges = run_resp(esp_data, respin, scratch_pool=pool)
+
+    Parameters
+    ----------
+    size : int, optional
+        The number of directories in the pool, i.e. the maximum number of
+        concurrent fits that the pool supports. Defaults to 1.
+    base_dir : Optional[str], optional
+        The directory in which the pool directories are to be created. Defaults
+        to None, in which case the memory-backed ``/dev/shm`` is used if it is
+        available and the OS temporary directory otherwise.
+
+    Raises
+    ------
+    ValueError
+        Raised when the requested pool size is smaller than one.
+    """
+
+    def __init__(self, size: int=1, base_dir: Optional[str]=None) -> None:
+        if size < 1:
+            raise ValueError(f"Scratch directory pool size must be positive, got {size}.")
+
+        if base_dir is None:
+            base_dir = self._get_default_base_dir()
+
+        self._root: Optional[str] = tempfile.mkdtemp(prefix="repESP_scratch_", dir=base_dir)
+        self._available: "queue.Queue[str]" = queue.Queue()
+
+        for i in range(size):
+            calc_dir = os.path.join(self._root, f"slot_{i}")
+            os.mkdir(calc_dir)
+            self._available.put(calc_dir)
+
+    @staticmethod
+    def _get_default_base_dir() -> Optional[str]:
+        # tmpfs on Linux; elsewhere fall back to `tempfile` defaults.
+        shm = "/dev/shm"
+        if os.path.isdir(shm) and os.access(shm, os.W_OK | os.X_OK):
+            return shm
+        return None
+
+    @staticmethod
+    def _empty_directory(calc_dir: str) -> None:
+        with os.scandir(calc_dir) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    os.unlink(entry.path)
+
+    @property
+    def root(self) -> str:
+        """The directory containing all the directories of this pool
+
+        Raises
+        ------
+        ValueError
+            Raised when the pool has already been closed.
+        """
+        if self._root is None:
+            raise ValueError("The scratch directory pool has already been closed.")
+        return self._root
+
+    @contextmanager
+    def acquire(self) -> Iterator[str]:
+        """Borrow an empty scratch directory from the pool
+
+        The directory is emptied and returned to the pool when the context
+        exits.
+
+        Yields
+        ------
+        Iterator[str]
+            Path to the borrowed directory.
+        """
+        if self._root is None:
+            raise ValueError("The scratch directory pool has already been closed.")
+
+        calc_dir = self._available.get()
+        try:
+            yield calc_dir
+        finally:
+            self._empty_directory(calc_dir)
+            self._available.put(calc_dir)
+
+    def close(self) -> None:
+        """Remove all the directories of the pool
+
+        The pool must not be used after it has been closed.
+        """
+        if self._root is not None:
+            shutil.rmtree(self._root, ignore_errors=True)
+            self._root = None
+
+    def __enter__(self) -> "ScratchDirectoryPool":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType]
+    ) -> None:
+        self.close()
+
+
+@dataclass
+class _CachedRespResult:
+    charges: List[Charge]
+    esout: Optional[str]
+
+
+class RespResultCache:
+    """Opt-in on-disk cache of the results of ``resp`` calculations
+
+    Results are keyed by a hash of the exact ``resp`` input, i.e. the "respin"
+    instructions, the .esp file and the initial charges, serialized in the
+    same way as when they are passed to ``resp``. Thus a fit is only reused
+    when ``resp`` would have been given identical input. The fitted charges
+    are stored together with the "esout" file, if it was requested.
+
+    The total size of the cache is bounded: when it is exceeded, the least
+    recently used entries are removed. The cache can be shared by multiple
+    processes at once, as entries are written atomically and concurrent
+    removal of entries is tolerated.
+
+    Parameters
+    ----------
+    directory : str
+        The directory in which the cached results are to be stored. It will be
+        created if it does not exist.
+    max_size : int, optional
+        The maximum total size of the cached entries in bytes. Defaults to 256 MiB.
+
+    Raises
+    ------
+    ValueError
+        Raised when the maximum size is not positive.
+    """
+
+    _entry_suffix = ".json"
+
+    def __init__(self, directory: str, max_size: int=256*1024**2) -> None:
+        if max_size <= 0:
+            raise ValueError(f"Maximum cache size must be positive, got {max_size}.")
+
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _make_key(
+        esp_data: Union[EspData, List[EspData]],
+        respin: Respin,
+        initial_charges: Optional[List[Charge]]
+    ) -> str:
+        hasher = hashlib.sha256()
+
+        def update(section: str, write: Callable[[io.StringIO], None]) -> None:
+            f = io.StringIO()
+            write(f)
+            hasher.update(f"{section}\n".encode())
+            hasher.update(f.getvalue().encode())
+
+        update("respin", lambda f: write_respin(f, respin, skip_cntrl_defaults=False))
+        update("esp", lambda f: _write_resp_esp_structures(f, esp_data, respin))
+        if initial_charges is not None:
+            update("qin", lambda f: write_resp_charges(f, initial_charges))
+
+        return hasher.hexdigest()
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self._entry_suffix)
+
+    def _get(self, key: str, require_esout: bool) -> Optional[_CachedRespResult]:
+        path = self._get_path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+            # Mark as recently used. Access times are unreliable on many
+            # filesystems, hence the modification time is updated instead.
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            # Missing or evicted by another process in the meantime
+            return None
+
+        if require_esout and entry["esout"] is None:
+            return None
+
+        return _CachedRespResult(
+            [Charge(charge) for charge in entry["charges"]],
+            entry["esout"]
+        )
+
+    def _put(self, key: str, result: _CachedRespResult) -> None:
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"charges": result.charges, "esout": result.esout}, f)
+            # Atomic, so that other processes never see a partial entry.
+            os.replace(temp_path, self._get_path(key))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        self._evict()
+
+    def _get_entries(self) -> List["os.DirEntry[str]"]:
+        with os.scandir(self.directory) as entries:
+            return [entry for entry in entries if entry.name.endswith(self._entry_suffix)]
+
+    def _evict(self) -> None:
+        sized_entries = []
+        for entry in self._get_entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            sized_entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_size = sum(size for _, size, _ in sized_entries)
+        for _, size, path in sorted(sized_entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+    @property
+    def size(self) -> int:
+        """The current total size of the cached entries in bytes"""
+        total_size = 0
+        for entry in self._get_entries():
+            try:
+                total_size += entry.stat().st_size
+            except FileNotFoundError:
+                pass
+        return total_size
+
+    def clear(self) -> None:
+        """Remove all the cached entries"""
+        for entry in self._get_entries():
+            try:
+                os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+def _write_resp_esp_structures(
+    f: TextIO,
+    esp_data: Union[EspData, List[EspData]],
+    respin: Respin
+) -> None:
+    # In a multiple structure fit, `resp` reads the data for consecutive
+    # structures from a single .esp file.
+    esp_data_list = esp_data if isinstance(esp_data, list) else [esp_data]
+
+    if len(esp_data_list) != respin.cntrl.nmol:
+        raise ValueError(
+            f"The number of .esp data sets ({len(esp_data_list)}) does not match "
+            f"the number of structures in the respin (`nmol` = {respin.cntrl.nmol})."
+        )
+
+    for structure_esp_data in esp_data_list:
+        write_resp_esp(f, structure_esp_data)
+
+
 def _run_resp_in_dir(
-    esp_data: EspData,
+    esp_data: Union[EspData, List[EspData]],
     respin: Respin,
     initial_charges: Optional[List[Charge]],
     generate_esout: bool,
     calc_dir: str,
+    qwts: Optional[Sequence[float]]=None
 ) -> List[Charge]:
 
     if respin.cntrl.iqopt in [2, 3] and initial_charges is None:
         raise ValueError("`resp` expected initial charges (`iqopt` is not 1) but none given.")
 
+    if (respin.cntrl.inopt == 1) != (qwts is not None):
+        raise ValueError("Restraint weights must be given if and only if `inopt` is equal to 1.")
+
     respin_fn = "input.respin"
     qin_fn = "charges.qin"
     qout_fn = "charges.qout"
     espot_fn = "espot.esp"
+    qwts_fn = "qwts.dat"
 
     get_full_path: Callable[[str], str] = lambda fn: f"{calc_dir}/{fn}"
 
@@ -46,7 +349,13 @@ def _run_resp_in_dir(
             write_resp_charges(f, initial_charges)
 
     with open(get_full_path(espot_fn), "w") as f:
-        write_resp_esp(f, esp_data)
+        _write_resp_esp_structures(f, esp_data, respin)
+
+    if qwts is not None:
+        with open(get_full_path(qwts_fn), "w") as f:
+            # Same precision as `qwt` in the "cntrl" section.
+            for qwt in qwts:
+                print(FW("F10.5").write([qwt]), file=f)
 
     try:
         process = subprocess.run(
@@ -58,6 +367,7 @@ def _run_resp_in_dir(
                 "-t", "charges.qout",
                 "-e", "espot.esp",
                 *(["-s", "esout.esp"] if generate_esout else []),
+                *(["-w", "qwts.dat"] if qwts is not None else []),
             ],
             cwd=calc_dir,
             check=True,  # raises CalledProcessError
@@ -77,19 +387,23 @@ def _run_resp_in_dir(
 
 
 def run_resp(
-    esp_data: EspData,
+    esp_data: Union[EspData, List[EspData]],
     respin: Respin,
     initial_charges: Optional[List[Charge]]=None,
     generate_esout: bool=False,
-    save_intermediates_to: Optional[str]=None
+    save_intermediates_to: Optional[str]=None,
+    scratch_pool: Optional[ScratchDirectoryPool]=None,
+    cache: Optional[RespResultCache]=None
 ) -> List[Charge]:
     """Run the ``resp`` program with the given "respin" instructions
 
     Parameters
     ----------
-    esp_data : EspData
+    esp_data : Union[EspData, typing.List[EspData]]
         Object containing the data normally provided in the .esp file i.e. atom
         coordinates and ESP field values at the points to be used in the fitting.
+        For a multiple structure fit, a list with one such object per structure
+        must be given, in the order of structures in `respin`.
     respin : Respin
         Instructions for the fitting in the `resp` program input format.
     initial_charges : Optional[typing.List[Charge]], optional
@@ -97,7 +411,8 @@ def run_resp(
         the fitting method or may simply be provided as an initial guess for
         the fitting algorithm. `ValueError` will be raised if the `respin`
         argument specifies that initial charges are expected (`iqopt` not equal
-        to 1) but this argument is not provided. Defaults to None.
+        to 1) but this argument is not provided. In a multiple structure fit,
+        the charges of consecutive structures are concatenated. Defaults to None.
     generate_esout : bool, optional
         Whether to produce an "esout" file containing the ESP field values at
         the fitting points, reproduced from the fitted charges. This can also
@@ -110,31 +425,200 @@ def run_resp(
         must not exist and will be created by the program. If the user does
         not require access to the files, this option should remain at the default
         of None. The calculation will then be run in the OS temporary directory.
+    scratch_pool : Optional[ScratchDirectoryPool], optional
+        A pool of reusable directories in which to run the calculation instead
+        of creating a new temporary directory. This option is ignored when
+        `save_intermediates_to` is given. Defaults to None.
+    cache : Optional[RespResultCache], optional
+        A cache of results of previous ``resp`` calculations. If a result for
+        identical input is found, ``resp`` is not run. In that case, only the
+        fitted charges (and "esout" file, if requested) will be written to
+        `save_intermediates_to`. Defaults to None.
+
+    Raises
+    ------
+    ValueError
+        Raised when the number of `esp_data` objects does not match the number
+        of structures in `respin`.
 
     Returns
     -------
     typing.List[Charge]
         The charges fitted using the ``resp`` program according to the "respin"
-        instructions.
+        instructions. In a multiple structure fit, the charges of consecutive
+        structures are concatenated.
     """
 
-    if save_intermediates_to is None:
-        with tempfile.TemporaryDirectory() as temp_dir_name:
-            return _run_resp_in_dir(esp_data, respin, initial_charges, generate_esout, temp_dir_name)
-    else:
+    cache_key = None
+    if cache is not None:
+        cache_key = cache._make_key(esp_data, respin, initial_charges)
+        cached_result = cache._get(cache_key, require_esout=generate_esout)
+        if cached_result is not None:
+            if save_intermediates_to is not None:
+                os.mkdir(save_intermediates_to)
+                _write_cached_result(cached_result, save_intermediates_to)
+            return cached_result.charges
+
+    def run_in_dir(calc_dir: str) -> List[Charge]:
+        charges = _run_resp_in_dir(esp_data, respin, initial_charges, generate_esout, calc_dir)
+        if cache is not None and cache_key is not None:
+            esout = None
+            if generate_esout:
+                with open(f"{calc_dir}/esout.esp") as f:
+                    esout = f.read()
+            cache._put(cache_key, _CachedRespResult(charges, esout))
+        return charges
+
+    return _run_in_calc_dir(run_in_dir, save_intermediates_to, scratch_pool)
+
+
+_RunResultT = TypeVar('_RunResultT')
+
+
+def _run_in_calc_dir(
+    run_in_dir: Callable[[str], _RunResultT],
+    save_intermediates_to: Optional[str],
+    scratch_pool: Optional[ScratchDirectoryPool]
+) -> _RunResultT:
+    if save_intermediates_to is not None:
         os.mkdir(save_intermediates_to)
-        return _run_resp_in_dir(esp_data, respin, initial_charges, generate_esout, save_intermediates_to)
+        return run_in_dir(save_intermediates_to)
+    elif scratch_pool is not None:
+        with scratch_pool.acquire() as scratch_dir_name:
+            return run_in_dir(scratch_dir_name)
+    else:
+        with tempfile.TemporaryDirectory() as temp_dir_name:
+            return run_in_dir(temp_dir_name)
+
+
+def _parse_respout_charges(f: TextIO) -> List[List[Charge]]:
+    """Extract fitted charges from each optimization in ``resp`` output
+
+    ``resp`` prints the table of initial and optimized charges after each
+    optimization, i.e. once for every restraint weight when cycling through
+    weights (`inopt` equal to 1).
+    """
+    all_charges: List[List[Charge]] = []
+    lines = iter(f)
+
+    for line in lines:
+        if "Point Charges Before & After Optimization" not in line:
+            continue
+
+        for line in lines:
+            if "q(opt)" in line:
+                header = line.split()
+                break
+        else:
+            raise InputFormatError("Expected header of charges table in `resp` output.")
+
+        q_opt_column = header.index("q(opt)")
+        charges: List[Charge] = []
+
+        for line in lines:
+            line_split = line.split()
+            if not line_split and not charges:
+                continue
+            if len(line_split) != len(header) or not line_split[0].isdigit():
+                break
+            charges.append(Charge(line_split[q_opt_column]))
+
+        all_charges.append(charges)
+
+    return all_charges
+
+
+def _write_cached_result(cached_result: _CachedRespResult, calc_dir: str) -> None:
+    with open(f"{calc_dir}/charges.qout", "w") as f:
+        write_resp_charges(f, cached_result.charges)
+    if cached_result.esout is not None:
+        with open(f"{calc_dir}/esout.esp", "w") as f:
+            f.write(cached_result.esout)
+
+
+def run_resp_qwt_scan(
+    esp_data: Union[EspData, List[EspData]],
+    respin: Respin,
+    qwts: Sequence[float],
+    initial_charges: Optional[List[Charge]]=None,
+    save_intermediates_to: Optional[str]=None,
+    scratch_pool: Optional[ScratchDirectoryPool]=None
+) -> List[List[Charge]]:
+    """Fit charges at several restraint weights in a single ``resp`` run
+
+    ``resp`` is instructed to cycle through the given restraint weights
+    (`inopt` equal to 1), which is much faster than running ``resp`` once for
+    every weight. Other than the restraint weight, all fits follow the given
+    "respin" instructions.
+
+    Parameters
+    ----------
+    esp_data : Union[EspData, typing.List[EspData]]
+        See `run_resp` function parameter
+    respin : Respin
+        Instructions for the fitting in the `resp` program input format. The
+        `inopt` and `qwt` values in its "cntrl" section are ignored.
+    qwts : Sequence[float]
+        The restraint weights at which to fit the charges. The weights are
+        passed to ``resp`` with the same precision as the `qwt` value in the
+        "cntrl" section, i.e. five decimal places.
+    initial_charges : Optional[typing.List[Charge]], optional
+        See `run_resp` function parameter
+    save_intermediates_to : Optional[str], optional
+        See `run_resp` function parameter
+    scratch_pool : Optional[ScratchDirectoryPool], optional
+        See `run_resp` function parameter
+
+    Raises
+    ------
+    ValueError
+        Raised when no restraint weights are given or any is negative.
+    InputFormatError
+        Raised when the ``resp`` output could not be parsed or does not contain
+        the charges for all of the restraint weights.
+
+    Returns
+    -------
+    typing.List[typing.List[Charge]]
+        The fitted charges for each restraint weight, in the order of `qwts`.
+    """
+
+    if len(qwts) == 0:
+        raise ValueError("At least one restraint weight must be given.")
+
+    if any(qwt < 0 for qwt in qwts):
+        raise ValueError(f"Restraint weights must not be negative: {qwts}.")
+
+    scan_respin = replace(respin, cntrl=replace(respin.cntrl, inopt=1, qwt=qwts[0]))
+
+    def run_in_dir(calc_dir: str) -> List[List[Charge]]:
+        _run_resp_in_dir(esp_data, scan_respin, initial_charges, False, calc_dir, qwts)
+
+        with open(f"{calc_dir}/output.respout") as f:
+            all_charges = _parse_respout_charges(f)
+
+        if len(all_charges) != len(qwts):
+            raise InputFormatError(
+                f"Expected charges for {len(qwts)} restraint weights in `resp` "
+                f"output but found {len(all_charges)}."
+            )
+
+        return all_charges
+
+    return _run_in_calc_dir(run_in_dir, save_intermediates_to, scratch_pool)
 
 
 # NOTE: If alternative interface is to be implemented in place of the two
 # respin files, try the `variants` library presented by Paul Ganssle.
 def run_two_stage_resp(
-    esp_data: EspData,
+    esp_data: Union[EspData, List[EspData]],
     respin1: Respin,
     respin2: Respin,
     initial_charges: Optional[List[Charge]]=None,
     generate_esout: bool=False,
-    save_intermediates_to: Optional[str]=None
+    save_intermediates_to: Optional[str]=None,
+    scratch_pool: Optional[ScratchDirectoryPool]=None,
+    cache: Optional[RespResultCache]=None
 ) -> List[Charge]:
     """Apply the two-stage procedure to fit RESP charges
 
@@ -145,7 +629,7 @@ def run_two_stage_resp(
 
     Parameters
     ----------
-    esp_data : EspData
+    esp_data : Union[EspData, typing.List[EspData]]
         See `run_resp` function parameter
     respin1 : Respin
         Instructions for 1st stage RESP fitting.
@@ -157,6 +641,10 @@ def run_two_stage_resp(
         See `run_resp` function parameter
     save_intermediates_to : Optional[str], optional
         See `run_resp` function parameter
+    scratch_pool : Optional[ScratchDirectoryPool], optional
+        See `run_resp` function parameter
+    cache : Optional[RespResultCache], optional
+        See `run_resp` function parameter
 
     Returns
     -------
@@ -184,7 +672,9 @@ def run_two_stage_resp(
         respin1,
         initial_charges,
         generate_esout,
-        get_calc_dir(1)
+        get_calc_dir(1),
+        scratch_pool,
+        cache
     )
 
     respin2_generated = prepare_respin(
@@ -199,7 +689,9 @@ def run_two_stage_resp(
         respin2,
         resp1_charges,
         generate_esout,
-        get_calc_dir(2)
+        get_calc_dir(2),
+        scratch_pool,
+        cache
     )
 
 
@@ -214,7 +706,9 @@ def fit_with_equivalencing(
     total_charge: int,
     initial_charges: Optional[List[Charge]]=None,
     generate_esout: bool=False,
-    save_intermediates_to: Optional[str]=None
+    save_intermediates_to: Optional[str]=None,
+    scratch_pool: Optional[ScratchDirectoryPool]=None,
+    cache: Optional[RespResultCache]=None
 ) -> List[Charge]:
     """Fit charges to the provided ESP subject to equivalence relations
 
@@ -234,6 +728,10 @@ def fit_with_equivalencing(
         See `run_resp` function parameter
     save_intermediates_to : Optional[str], optional
         See `run_resp` function parameter
+    scratch_pool : Optional[ScratchDirectoryPool], optional
+        See `run_resp` function parameter
+    cache : Optional[RespResultCache], optional
+        See `run_resp` function parameter
 
     Returns
     -------
@@ -254,7 +752,9 @@ def fit_with_equivalencing(
         respin,
         initial_charges,
         generate_esout,
-        save_intermediates_to
+        save_intermediates_to,
+        scratch_pool,
+        cache
     )
 
 
@@ -265,7 +765,9 @@ def fit_hydrogens_only(
     total_charge: int,
     initial_charges: List[Charge],
     generate_esout: bool=False,
-    save_intermediates_to: Optional[str]=None
+    save_intermediates_to: Optional[str]=None,
+    scratch_pool: Optional[ScratchDirectoryPool]=None,
+    cache: Optional[RespResultCache]=None
 ) -> List[Charge]:
     """Fit hydrogen atom charges to the provided ESP subject to equivalence relations
 
@@ -286,6 +788,10 @@ def fit_hydrogens_only(
         See `run_resp` function parameter
     save_intermediates_to : Optional[str], optional
         See `run_resp` function parameter
+    scratch_pool : Optional[ScratchDirectoryPool], optional
+        See `run_resp` function parameter
+    cache : Optional[RespResultCache], optional
+        See `run_resp` function parameter
 
     Returns
     -------
@@ -307,7 +813,9 @@ def fit_hydrogens_only(
         respin,
         initial_charges,
         generate_esout,
-        save_intermediates_to
+        save_intermediates_to,
+        scratch_pool,
+        cache
     )
 
 
@@ -319,7 +827,9 @@ def fit_with_frozen_atoms(
     total_charge: int,
     initial_charges: List[Charge],
     generate_esout: bool=False,
-    save_intermediates_to: Optional[str]=None
+    save_intermediates_to: Optional[str]=None,
+    scratch_pool: Optional[ScratchDirectoryPool]=None,
+    cache: Optional[RespResultCache]=None
 ) -> List[Charge]:
     """Fit hydrogen atom charges to the provided ESP subject to equivalence relations
 
@@ -343,6 +853,10 @@ def fit_with_frozen_atoms(
         See `run_resp` function parameter
     save_intermediates_to : Optional[str], optional
         See `run_resp` function parameter
+    scratch_pool : Optional[ScratchDirectoryPool], optional
+        See `run_resp` function parameter
+    cache : Optional[RespResultCache], optional
+        See `run_resp` function parameter
 
     Returns
     -------
@@ -364,5 +878,7 @@ def fit_with_frozen_atoms(
         respin,
         initial_charges,
         generate_esout,
-        save_intermediates_to
+        save_intermediates_to,
+        scratch_pool,
+        cache
     )
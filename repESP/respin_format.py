@@ -1,6 +1,6 @@
 """Parsing and writing ``resp`` program instruction file format ("respin")"""
 
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from fortranformat import FortranRecordWriter as FW
 from itertools import zip_longest
 import io
@@ -21,8 +21,11 @@ IvaryT = TypeVar('IvaryT', bound='Respin.Ivary')
 class Respin:
     """Dataclass describing the ``resp`` program instructions
 
-    Note that the functionality is currently limited to a single molecule and
-    a single structure.
+    The instructions describe either a single structure or, in a multiple
+    structure fit (e.g. of a conformer ensemble), several structures fitted
+    simultaneously. The attributes `subtitle`, `charge`, `molecule`, `ivary`
+    and `wtmol` describe the first structure, while any further structures
+    are given in `additional_structures`.
 
     Parameters
     ----------
@@ -39,6 +42,25 @@ class Respin:
     ivary : Ivary
         The "ivary" values for fitting the considered structure. These determine
         how the charge on each atom is allowed to vary during the fitting.
+    wtmol : float, optional
+        Relative weight of the structure in a multiple structure fit. Defaults
+        to 1.0.
+    additional_structures : typing.List[Structure], optional
+        Further structures to be fitted together with the first one. The value
+        of `cntrl.nmol` must be equal to the total number of structures.
+        Defaults to an empty list.
+    structure_equivalence : typing.List[typing.List[typing.Tuple[int, int]]], optional
+        Groups of atoms in different structures which are to be assigned
+        identical charges ("multiple-molecule equivalencing"). Each group is a
+        list of at least two (structure, atom) pairs of zero-based indices,
+        where structure 0 is the first structure. Defaults to an empty list.
+
+    Raises
+    ------
+    ValueError
+        Raised when the number of structures is inconsistent with `cntrl.nmol`
+        or the equivalence groups have fewer than two members or refer to
+        atoms which are not described.
 
     Attributes
     ----------
@@ -54,6 +76,12 @@ class Respin:
         See initialization parameter
     ivary
         See initialization parameter
+    wtmol
+        See initialization parameter
+    additional_structures
+        See initialization parameter
+    structure_equivalence
+        See initialization parameter
     """
 
     _ValueType = TypeVar("_ValueType", int, float, str)
@@ -116,6 +144,8 @@ class Respin:
                 stages 1 and 2, respectively. The Glycam force field is derived with
                 one stage fitting with a value of 0.01.
 
+        nmol : int, optional
+            Number of structures in a multiple structure fit. Defaults to 1.
 
         Attributes
         ----------
@@ -131,6 +161,8 @@ class Respin:
             See initialization parameter
         qwt
             See initialization parameter
+        nmol
+            See initialization parameter
         """
         inopt: int = 0
         ioutopt: int = 0
@@ -138,14 +170,7 @@ class Respin:
         ihfree: int = 1
         irstrnt: int = 1
         qwt: float = 0
-
-        @property
-        def nmol(self) -> int:
-            """Number of structures in a multiple structure fit.
-
-            With the current implementation this will always be equal to 1.
-            """
-            return 1
+        nmol: int = 1
 
         def __post_init__(self) -> None:
             Respin._check_value("inopt", self.inopt, [0, 1])
@@ -155,6 +180,8 @@ class Respin:
             Respin._check_value("irstrnt", self.irstrnt, [0, 1, 2])
             if self.qwt < 0:
                 raise ValueError(f"Invalid value for `qwt`: {self.qwt}.")
+            if self.nmol < 1:
+                raise ValueError(f"Invalid value for `nmol`: {self.nmol}.")
 
     @dataclass
     class Ivary:
@@ -291,6 +318,57 @@ class Respin:
             """
             return cls([0 if val is None else val + 1 for val in equivalence.values])
 
+    @dataclass
+    class Structure:
+        """Dataclass describing a single structure in a multiple structure fit
+
+        Parameters
+        ----------
+        subtitle : str
+            Subtitle describing the structure.
+        charge : int
+            The total charge of the molecule.
+        molecule : Molecule[Atom]
+            The molecule in this structure. Only atom identities are required.
+        ivary : Respin.Ivary
+            The "ivary" values for fitting this structure. Equivalencing refers
+            to atoms within this structure.
+        wtmol : float, optional
+            Relative weight of the structure in the fit. Defaults to 1.0.
+
+        Attributes
+        ----------
+        subtitle
+            See initialization parameter
+        charge
+            See initialization parameter
+        molecule
+            See initialization parameter
+        ivary
+            See initialization parameter
+        wtmol
+            See initialization parameter
+        """
+        subtitle: str
+        charge: int
+        molecule: Molecule[Atom]
+        ivary: "Respin.Ivary"
+        wtmol: float = 1.0
+
+        @property
+        def iuniq(self) -> int:
+            """The number of atoms in the structure"""
+            return len(self.molecule.atoms)
+
+        def __post_init__(self) -> None:
+            if len(self.molecule.atoms) != len(self.ivary.values):
+                raise ValueError(
+                    f"Number of atoms ({len(self.molecule.atoms)}) does not match number "
+                    f"of ivary values ({len(self.ivary.values)})."
+                )
+            if self.wtmol < 0:
+                raise ValueError(f"Invalid value for `wtmol`: {self.wtmol}.")
+
 
     title: str
     cntrl: Cntrl
@@ -298,27 +376,51 @@ class Respin:
     charge: int
     molecule: Molecule[Atom]
     ivary: Ivary
-
-    @property
-    def wtmol(self) -> float:
-        """Relative weight of the structure in a multistructure fitting.
-
-        A value of 1.0 is always returned in the current implementation.
-        """
-        return 1.0
+    wtmol: float = 1.0
+    additional_structures: List[Structure] = field(default_factory=list)
+    structure_equivalence: List[List[Tuple[int, int]]] = field(default_factory=list)
 
     @property
     def iuniq(self) -> int:
-        """The number of atoms in the fitted structure"""
+        """The number of atoms in the first fitted structure"""
         return len(self.molecule.atoms)
 
+    @property
+    def structures(self) -> List[Structure]:
+        """All the fitted structures, including the first one"""
+        return [
+            Respin.Structure(self.subtitle, self.charge, self.molecule, self.ivary, self.wtmol),
+            *self.additional_structures
+        ]
+
     def __post_init__(self) -> None:
-        if len(self.molecule.atoms) != len(self.ivary.values):
+        # Validates the first structure like the additional ones.
+        structures = self.structures
+
+        if self.cntrl.nmol != len(structures):
             raise ValueError(
-                f"Number of atoms ({len(self.molecule.atoms)}) does not match number "
-                f"of ivary values ({len(self.ivary.values)})."
+                f"The value of `nmol` ({self.cntrl.nmol}) does not match the "
+                f"number of structures ({len(structures)})."
             )
 
+        for group in self.structure_equivalence:
+            if len(group) < 2:
+                raise ValueError(
+                    f"Structure equivalence group must have at least two "
+                    f"members but got: {group}."
+                )
+            for structure_index, atom_index in group:
+                if not 0 <= structure_index < len(structures):
+                    raise ValueError(
+                        f"Structure equivalence refers to structure number "
+                        f"{structure_index}, which is not described."
+                    )
+                if not 0 <= atom_index < structures[structure_index].iuniq:
+                    raise ValueError(
+                        f"Structure equivalence refers to atom number {atom_index} "
+                        f"in structure {structure_index}, which is not described."
+                    )
+
 
 def _get_equivalence_from_ivary(ivary: Respin.Ivary) -> Equivalence:
     """Get atom equivalence information from an `Respin.Ivary` object
@@ -393,18 +495,82 @@ def _parse_cntrl(f: TextIO) -> Respin.Cntrl:
 
         kwargs[key] = float(value) if key == "qwt" else int(value)
 
-    # nmol is not a parameter of Cntrl.__init__ and must be equal to 1.
-    nmol = kwargs.pop("nmol", None)
-    if nmol is not None and nmol != 1:
-        raise InputFormatError("Parsing multiple structures is not supported")
-
     return Respin.Cntrl(**kwargs)  # type: ignore # (not sure why not recognized)
 
 
+def _parse_structure(f: TextIO) -> Respin.Structure:
+
+    wtmol = get_line(f).strip()
+    subtitle = get_line(f)
+
+    charge_and_iuniq = get_line(f)
+    if len(charge_and_iuniq.split()) != 2:
+        raise InputFormatError(
+            f"Expected two ints for the line specifying charge and iuniq, found:\n{charge_and_iuniq}"
+        )
+
+    charge = int(charge_and_iuniq.split()[0])
+    iuniq = int(charge_and_iuniq.split()[1])
+
+    atoms: List[Atom] = []
+    ivary = Respin.Ivary([])
+
+    for _ in range(iuniq):
+        line = get_line(f)
+        if len(line.split()) != 2:
+            raise InputFormatError(
+                f"The value of `iuniq` ({iuniq}) is larger than the number of "
+                f"atoms in the described molecule ({len(atoms)}) or a line is "
+                f"malformed. Expected two ints for the line specifying atom and "
+                f"ivary, found:\n{line}"
+            )
+
+        atoms.append(Atom(int(line.split()[0])))
+        ivary_value = int(line.split()[1])
+        # `respgen` uses a value of -99 but internally we use -1 as per resp spec.
+        ivary.values.append(ivary_value if ivary_value != -99 else -1)
+
+    return Respin.Structure(subtitle, charge, Molecule(atoms), ivary, float(wtmol))
+
+
+def _parse_structure_equivalence(f: TextIO) -> List[List[Tuple[int, int]]]:
+    groups: List[List[Tuple[int, int]]] = []
+    while True:
+        line = get_line(f)
+        if line.strip() == "":
+            return groups
+
+        try:
+            group_size = int(line)
+            indices: List[int] = []
+            while len(indices) < 2*group_size:
+                line = get_line(f)
+                if line.strip() == "":
+                    raise InputFormatError(
+                        "Unexpected end of multiple structure equivalencing group."
+                    )
+                # Pairs of one-based structure and atom numbers in 16I5 format
+                indices.extend(int(value) - 1 for value in line.split())
+        except ValueError:
+            raise InputFormatError(
+                f"Failed parsing multiple structure equivalencing group from line: {line}"
+            )
+
+        if len(indices) != 2*group_size:
+            raise InputFormatError(
+                f"Expected {group_size} (structure, atom) pairs in multiple "
+                f"structure equivalencing group but found {len(indices)/2:g}."
+            )
+
+        groups.append(list(zip(indices[::2], indices[1::2])))
+
+
 def parse_respin(f: TextIO) -> Respin:
     """Parse a file in the "respin" format (input format of ``resp``)
 
-    Note that only files describing a single structure fit are currently supported.
+    Both single structure and multiple structure fits are supported. Charge
+    constraints (sections other than multiple structure equivalencing) are
+    not supported.
 
     Parameters
     ----------
@@ -430,63 +596,39 @@ def parse_respin(f: TextIO) -> Respin:
 
     cntrl = _parse_cntrl(f)
 
-    wtmol = get_line(f).strip()
-    if not math.isclose(float(wtmol), 1.0, rel_tol=0, abs_tol=1e-6):
-        raise InputFormatError(
-            f"Encountered value of `wtmol` different from 1.0 ({wtmol}) but "
-            f"parsing is supported only for single-structure respin files."
-        )
-
-    subtitle = get_line(f)
+    first, *additional_structures = [_parse_structure(f) for _ in range(cntrl.nmol)]
 
-    charge_and_iuniq = get_line(f)
-    if len(charge_and_iuniq.split()) != 2:
+    # The blank line terminates the (unsupported) charge constraints section.
+    line = get_line(f)
+    if line.strip() != "":
         raise InputFormatError(
-            f"Expected two ints for the line specifying charge and iuniq, found:\n{charge_and_iuniq}"
+            f"The value of `iuniq` is smaller than the number of atoms in the "
+            f"described molecule or charge constraints were given, which are "
+            f"not supported. Found the following line instead of a blank line:\n{line}"
         )
 
-    charge = int(charge_and_iuniq.split()[0])
-    iuniq = int(charge_and_iuniq.split()[1])
-
-    atoms: List[Atom] = []
-    ivary = Respin.Ivary([])
-
-    for line in f:
-        if line.rstrip('\n') == "":
-            break
-        if len(line.split()) != 2:
-            raise InputFormatError(
-                f"Expected two ints for the line specifying atom and ivary, found:\n{line}"
-            )
-
-        atoms.append(Atom(int(line.split()[0])))
-        ivary_value = int(line.split()[1])
-        # `respgen` uses a value of -99 but internally we use -1 as per resp spec.
-        ivary.values.append(ivary_value if ivary_value != -99 else -1)
-
-    if len(atoms) != iuniq:
-        raise InputFormatError(
-            f"The value of `iuniq` ({iuniq}) is different from the number of"
-            f"atoms in the described molecule ({len(atoms)})."
+    structure_equivalence = _parse_structure_equivalence(f) if cntrl.nmol > 1 else []
+
+    try:
+        return Respin(
+            title,
+            cntrl,
+            first.subtitle,
+            first.charge,
+            first.molecule,
+            first.ivary,
+            first.wtmol,
+            additional_structures,
+            structure_equivalence
         )
-
-    return Respin(
-        title,
-        cntrl,
-        subtitle,
-        charge,
-        Molecule(atoms),
-        ivary
-    )
+    except ValueError as e:
+        raise InputFormatError(e)
 
 
 def _write_cntrl(f: TextIO, cntrl: Respin.Cntrl, skip_defaults: bool) -> None:
 
     default_cntrl: Dict[str, Union[int, float]] = asdict(Respin.Cntrl())
-    default_cntrl["nmol"] = 1
-
     dict_: Dict[str, Union[int, float]] = asdict(cntrl)
-    dict_["nmol"] = cntrl.nmol
 
     print(" &cntrl\n", file=f)
     for key, value in dict_.items():
@@ -517,11 +659,31 @@ def write_respin(f: TextIO, respin: Respin, skip_cntrl_defaults: bool=True) -> N
     print(respin.title, file=f)
     print(file=f)
     _write_cntrl(f, respin.cntrl, skip_cntrl_defaults)
-    print(FW("F7.1").write([respin.wtmol]), file=f)
-    print(respin.subtitle, file=f)
-    print(FW("2I5").write([respin.charge, respin.iuniq]), file=f)
-    for atom, ivary in zip(respin.molecule.atoms, respin.ivary.values):
-        print(FW("2I5").write([atom.atomic_number, ivary]), file=f)
+    for structure in respin.structures:
+        _write_structure(f, structure)
     # According to the spec, a blank line is only for multi-structures but
     # `resp` fails without it.
     print(file=f)
+    if respin.cntrl.nmol > 1:
+        _write_structure_equivalence(f, respin.structure_equivalence)
+
+
+def _write_structure(f: TextIO, structure: Respin.Structure) -> None:
+    # The shorter format is kept for weights which it represents exactly.
+    wtmol_format = "F7.1" if math.isclose(structure.wtmol, round(structure.wtmol, 1)) else "F10.5"
+    print(FW(wtmol_format).write([structure.wtmol]), file=f)
+    print(structure.subtitle, file=f)
+    print(FW("2I5").write([structure.charge, structure.iuniq]), file=f)
+    for atom, ivary in zip(structure.molecule.atoms, structure.ivary.values):
+        print(FW("2I5").write([atom.atomic_number, ivary]), file=f)
+
+
+def _write_structure_equivalence(f: TextIO, groups: List[List[Tuple[int, int]]]) -> None:
+    for group in groups:
+        print(FW("I5").write([len(group)]), file=f)
+        # resp expects one-based structure and atom numbers
+        print(
+            FW("16I5").write([index + 1 for pair in group for index in pair]),
+            file=f
+        )
+    print(file=f)
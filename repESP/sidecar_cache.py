@@ -0,0 +1,187 @@
+"""Binary cache of parsed text files to speed up repeated parsing
+
+Large cube and .esp files are often parsed many times, for example by
+different scripts processing the same calculations. The parsers accepting a
+`SidecarCache` store the parsed data in a compact binary form on first use,
+so that subsequent parsing of the same, unmodified file only requires reading
+a small JSON header and memory-mapping an array of values.
+"""
+
+from dataclasses import dataclass
+import hashlib
+import json
+import numpy as np
+import os
+import tempfile
+from typing import Any, BinaryIO, Callable, Dict, Optional, TextIO
+
+
+@dataclass
+class CachedData:
+    """Dataclass representing the parsed data stored in the cache
+
+    Parameters
+    ----------
+    header : typing.Dict[str, typing.Any]
+        JSON-serializable data describing everything but the bulk values.
+    values : np.ndarray
+        The bulk values, e.g. the values of a cube file. When loaded from the
+        cache, this is a read-only memory-mapped array.
+
+    Attributes
+    ----------
+    header
+        See initialization parameter
+    values
+        See initialization parameter
+    """
+    header: Dict[str, Any]
+    values: np.ndarray
+
+
+class SidecarCache:
+    """Cache of parsed text files stored in binary form
+
+    Each cache entry consists of a JSON header and a .npy array file. An entry
+    is only used if the source file still has the same path, size and
+    modification time and, if `verify_hash` is set, the same SHA-256 hash as
+    when the entry was created. Otherwise the file is parsed again and the
+    entry replaced.
+
+    Only files which were opened from a path on disk can be cached. Other file
+    objects, for example `io.StringIO`, are always parsed.
+
+    Parameters
+    ----------
+    directory : typing.Optional[str], optional
+        The directory in which the cache entries are to be stored. It will be
+        created if it does not exist. Defaults to None, in which case the
+        entries are stored as "sidecar" files next to the source files.
+    verify_hash : bool, optional
+        Whether to verify the hash of the source file contents before using
+        a cache entry. This requires reading the source file, which is still
+        much faster than parsing it. Defaults to True.
+    """
+
+    _version = 1
+
+    def __init__(self, directory: Optional[str]=None, verify_hash: bool=True) -> None:
+        self.directory = directory
+        self.verify_hash = verify_hash
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _get_source_path(f: TextIO) -> Optional[str]:
+        path = getattr(f, "name", None)
+        if not isinstance(path, str) or not os.path.isfile(path):
+            return None
+        return os.path.abspath(path)
+
+    @staticmethod
+    def _hash_file(path: str) -> str:
+        hasher = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024**2), b""):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def _get_entry_base(self, source_path: str, kind: str) -> str:
+        if self.directory is None:
+            return f"{source_path}.{kind}"
+        path_hash = hashlib.sha256(source_path.encode()).hexdigest()
+        return os.path.join(self.directory, f"{path_hash}.{kind}")
+
+    @staticmethod
+    def _describe_source(source_path: str) -> Dict[str, Any]:
+        stat = os.stat(source_path)
+        return {
+            "path": source_path,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+
+    def load(self, f: TextIO, kind: str) -> Optional[CachedData]:
+        """Retrieve the cached data for the given file
+
+        Parameters
+        ----------
+        f : TextIO
+            The file object of the source file.
+        kind : str
+            Identifier of the parser which created the entry.
+
+        Returns
+        -------
+        typing.Optional[CachedData]
+            The cached data or None if there is no valid entry for the file.
+        """
+        source_path = self._get_source_path(f)
+        if source_path is None:
+            return None
+
+        base = self._get_entry_base(source_path, kind)
+        try:
+            with open(base + ".json") as header_file:
+                entry = json.load(header_file)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if entry["version"] != self._version or entry["kind"] != kind:
+            return None
+        if any(entry["source"][key] != value for key, value in self._describe_source(source_path).items()):
+            return None
+        if self.verify_hash and entry["source"]["sha256"] != self._hash_file(source_path):
+            return None
+
+        try:
+            values = np.load(base + ".npy", mmap_mode="r")
+        except (FileNotFoundError, ValueError):
+            return None
+
+        return CachedData(entry["header"], values)
+
+    def store(self, f: TextIO, kind: str, data: CachedData) -> None:
+        """Store the parsed data for the given file
+
+        Nothing is stored if the file was not opened from a path on disk.
+
+        Parameters
+        ----------
+        f : TextIO
+            The file object of the source file.
+        kind : str
+            Identifier of the parser which created the entry.
+        data : CachedData
+            The parsed data to be stored.
+        """
+        source_path = self._get_source_path(f)
+        if source_path is None:
+            return
+
+        base = self._get_entry_base(source_path, kind)
+        entry = {
+            "version": self._version,
+            "kind": kind,
+            "source": {
+                **self._describe_source(source_path),
+                "sha256": self._hash_file(source_path),
+            },
+            "header": data.header,
+        }
+
+        # The header is written last, so that it is never valid before the
+        # values. Both are replaced atomically.
+        self._write_atomically(base + ".npy", lambda out: np.save(out, np.ascontiguousarray(data.values)))
+        self._write_atomically(base + ".json", lambda out: out.write(json.dumps(entry).encode()))
+
+    @staticmethod
+    def _write_atomically(path: str, write: Callable[[BinaryIO], Any]) -> None:
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                write(out)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
@@ -1,6 +1,12 @@
 """Constants and convenience functions for interacting with the library"""
 
-from typing import Dict, List, TypeVar, Union
+import bz2
+from functools import partial
+import gzip
+import io
+import lzma
+import os
+from typing import Any, BinaryIO, Callable, cast, Dict, List, Optional, TextIO, TypeVar, Union
 
 """
 Attributes
@@ -139,3 +145,113 @@ def mask_from_list(
     """
     offset = 1 if one_indexed else 0
     return [value_if_present if i+offset in list_ else value_if_absent for i in range(length)]
+
+
+FileOrPath = Union[TextIO, str, "os.PathLike[str]"]
+"""Type of the file arguments of the parsers and writers
+
+The file may be given either as a file object or as a path, in which case the
+file is opened with `open_file`.
+"""
+
+
+_BUFFER_SIZE = 1024**2
+"""int : Size in bytes of the buffers of files opened with `open_file`"""
+
+
+_COMPRESSED_FILE_OPENERS: Dict[str, Callable[..., Any]] = {
+    # The default gzip compression level of 9 is much slower to write than
+    # the zlib default of 6, for a marginally better compression ratio.
+    ".gz": partial(gzip.GzipFile, compresslevel=6),
+    ".bz2": bz2.BZ2File,
+    ".xz": lzma.LZMAFile,
+}
+
+
+class _CompressedFileReader(io.BufferedReader):
+    # The codec file objects of the bz2 and lzma modules do not have a `name`,
+    # which is needed e.g. by `SidecarCache` to identify the source file.
+
+    def __init__(self, raw: Any, path: str) -> None:
+        super().__init__(raw, _BUFFER_SIZE)
+        self._path = path
+
+    @property
+    def name(self) -> str:
+        return self._path
+
+
+class _CompressedFileWriter(io.BufferedWriter):
+
+    def __init__(self, raw: Any, path: str) -> None:
+        super().__init__(raw, _BUFFER_SIZE)
+        self._path = path
+
+    @property
+    def name(self) -> str:
+        return self._path
+
+
+def _strip_compressed_extension(path: str) -> str:
+    # The path without the extension of a supported compression format, which
+    # reveals the type of the compressed file, e.g. ".log" for "test.log.gz".
+    root, extension = os.path.splitext(path)
+    return root if extension.lower() in _COMPRESSED_FILE_OPENERS else path
+
+
+def _open_binary_file(path: str, mode: str) -> BinaryIO:
+    # Opens the file in binary mode, given a mode without the "b" character.
+    opener = _COMPRESSED_FILE_OPENERS.get(os.path.splitext(path)[1].lower())
+    if opener is None:
+        return cast(BinaryIO, open(path, mode + "b", buffering=_BUFFER_SIZE))
+
+    raw = opener(path, mode)
+    if mode == "r":
+        return cast(BinaryIO, _CompressedFileReader(raw, path))
+    return cast(BinaryIO, _CompressedFileWriter(raw, path))
+
+
+def open_file(path: Union[str, "os.PathLike[str]"], mode: str="r", encoding: Optional[str]=None) -> TextIO:
+    """Open a text file, transparently decompressing or compressing its contents
+
+    Files with the extensions .gz, .bz2 and .xz are streamed through the gzip,
+    bz2 and lzma modules of the standard library, respectively, so that they
+    can be used like uncompressed files. All files are opened with a large
+    buffer, which speeds up reading and writing large files such as cubes.
+
+    Example
+    -------
+    >>> with open_file("methane_esp.cub.gz") as f:
+    ...     cube = parse_esp_cube(f)
+
+    Note that the parsers and writers of this library also accept paths,
+    which are opened with this function.
+
+    Parameters
+    ----------
+    path : Union[str, os.PathLike[str]]
+        The path of the file.
+    mode : str, optional
+        The mode in which the file is to be opened: ``"r"`` (default),
+        ``"w"``, ``"a"`` or ``"x"``, as in the built-in `open` function.
+    encoding : str, optional
+        The encoding of the file. Defaults to None, meaning the
+        platform-dependent default encoding, as in the built-in `open`.
+
+    Raises
+    ------
+    ValueError
+        Raised when the mode is not supported.
+
+    Returns
+    -------
+    TextIO
+        The file object opened in text mode.
+    """
+    path = os.fspath(path)
+    if mode not in ["r", "w", "a", "x"]:
+        raise ValueError(f"Unsupported file mode: {mode}.")
+
+    if os.path.splitext(path)[1].lower() not in _COMPRESSED_FILE_OPENERS:
+        return cast(TextIO, open(path, mode, buffering=_BUFFER_SIZE, encoding=encoding))
+    return io.TextIOWrapper(_open_binary_file(path, mode), encoding=encoding)
@@ -0,0 +1,108 @@
+"""Molecular wavefunctions expressed in Gaussian primitives"""
+
+from repESP.types import AtomWithCoords, Molecule
+
+from dataclasses import dataclass
+import numpy as np
+
+
+@dataclass(eq=False)
+class Wavefunction:
+    """Dataclass representing a wavefunction in a basis of Gaussian primitives
+
+    The molecular orbitals are linear combinations of Cartesian Gaussian
+    primitives of the form::
+
+        (x - X)^l (y - Y)^m (z - Z)^n exp(-a ((x - X)^2 + (y - Y)^2 + (z - Z)^2))
+
+    where (X, Y, Z) are the coordinates of the atom on which the primitive is
+    centered, (l, m, n) are the powers of the primitive and a is its
+    exponent. Normalization and contraction coefficients are included in the
+    orbital coefficients. This is the representation used by the AIMAll
+    .wfx file format.
+
+    Parameters
+    ----------
+    molecule : Molecule[AtomWithCoords]
+        The molecule described by the wavefunction.
+    primitive_centers : np.ndarray
+        Array of shape (P,) containing the zero-based indices of the atoms on
+        which the P primitives are centered.
+    primitive_powers : np.ndarray
+        Array of shape (P, 3) containing the powers (l, m, n) of the primitives.
+    primitive_exponents : np.ndarray
+        Array of shape (P,) containing the exponents of the primitives.
+    occupations : np.ndarray
+        Array of shape (M,) containing the occupation numbers of the M
+        molecular orbitals.
+    coefficients : np.ndarray
+        Array of shape (M, P) containing the coefficients of the primitives
+        in the molecular orbitals.
+
+    Raises
+    ------
+    ValueError
+        Raised when the shapes of the arrays are inconsistent or the primitive
+        centers do not refer to atoms of the molecule.
+
+    Attributes
+    ----------
+    molecule
+        See initialization parameter
+    primitive_centers
+        See initialization parameter
+    primitive_powers
+        See initialization parameter
+    primitive_exponents
+        See initialization parameter
+    occupations
+        See initialization parameter
+    coefficients
+        See initialization parameter
+    """
+    molecule: Molecule[AtomWithCoords]
+    primitive_centers: np.ndarray
+    primitive_powers: np.ndarray
+    primitive_exponents: np.ndarray
+    occupations: np.ndarray
+    coefficients: np.ndarray
+
+    def __post_init__(self) -> None:
+        self.primitive_centers = np.asarray(self.primitive_centers, dtype=int)
+        self.primitive_powers = np.asarray(self.primitive_powers, dtype=int)
+        self.primitive_exponents = np.asarray(self.primitive_exponents, dtype=float)
+        self.occupations = np.asarray(self.occupations, dtype=float)
+        self.coefficients = np.asarray(self.coefficients, dtype=float)
+
+        primitive_count = len(self.primitive_exponents)
+        orbital_count = len(self.occupations)
+
+        if self.primitive_centers.shape != (primitive_count,):
+            raise ValueError(
+                f"Expected primitive centers of shape ({primitive_count},) but "
+                f"got {self.primitive_centers.shape}."
+            )
+        if self.primitive_powers.shape != (primitive_count, 3):
+            raise ValueError(
+                f"Expected primitive powers of shape ({primitive_count}, 3) but "
+                f"got {self.primitive_powers.shape}."
+            )
+        if self.coefficients.shape != (orbital_count, primitive_count):
+            raise ValueError(
+                f"Expected coefficients of shape ({orbital_count}, {primitive_count}) "
+                f"but got {self.coefficients.shape}."
+            )
+        if primitive_count and (
+            self.primitive_centers.min() < 0 or
+            self.primitive_centers.max() >= len(self.molecule.atoms)
+        ):
+            raise ValueError("Primitive centers do not refer to atoms of the molecule.")
+
+    @property
+    def primitive_coordinates(self) -> np.ndarray:
+        """Array of shape (P, 3) containing the coordinates of the primitive centers"""
+        atoms_coords = np.array(
+            [tuple(atom.coords) for atom in self.molecule.atoms], dtype=float
+        ).reshape(-1, 3)
+        result: np.ndarray = atoms_coords[self.primitive_centers]
+        return result
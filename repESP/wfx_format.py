@@ -0,0 +1,122 @@
+"""Parsing the AIMAll wavefunction file format (.wfx)"""
+
+from repESP.exceptions import InputFormatError
+from repESP.types import AtomWithCoords, Coords, Molecule
+from repESP.wavefunction import Wavefunction
+from repESP._util import parse_float_array
+
+import numpy as np
+import re
+from typing import Dict, List, TextIO
+
+
+def _get_primitive_powers_by_type() -> List[List[int]]:
+    # Order of the Cartesian primitives defined by the .wfx format, up to G.
+    labels = (
+        ["", "x", "y", "z"] +
+        ["xx", "yy", "zz", "xy", "xz", "yz"] +
+        ["xxx", "yyy", "zzz", "xxy", "xxz", "yyz", "xyy", "xzz", "yzz", "xyz"] +
+        [
+            "xxxx", "yyyy", "zzzz", "xxxy", "xxxz", "xyyy", "yyyz", "xzzz",
+            "yzzz", "xxyy", "xxzz", "yyzz", "xxyz", "xyyz", "xyzz"
+        ]
+    )
+    return [[label.count(axis) for axis in "xyz"] for label in labels]
+
+
+_PRIMITIVE_POWERS_BY_TYPE = _get_primitive_powers_by_type()
+
+
+def _parse_sections(text: str) -> Dict[str, str]:
+    # Nested sections (e.g. <MO Number>) are left in the contents of the
+    # enclosing section.
+    return {
+        match.group(1): match.group(2)
+        for match in re.finditer(r"^<([^/>][^>]*)>\s*\n(.*?)^</\1>", text, re.MULTILINE | re.DOTALL)
+    }
+
+
+def parse_wfx(f: TextIO) -> Wavefunction:
+    """Parse a wavefunction file in the AIMAll .wfx format
+
+    The file can be produced by Gaussian with the ``output=wfx`` keyword.
+
+    Parameters
+    ----------
+    f : TextIO
+        File object opened in read mode containing the .wfx file.
+
+    Raises
+    ------
+    InputFormatError
+        Raised when the file does not follow the expected format.
+    NotImplementedError
+        Raised when the file describes an additional electron density function
+        (used with effective core potentials) or primitives of angular
+        momentum higher than G.
+
+    Returns
+    -------
+    Wavefunction
+        The wavefunction described by the file.
+    """
+    sections = _parse_sections(f.read())
+
+    def get_section(name: str) -> str:
+        try:
+            return sections[name]
+        except KeyError:
+            raise InputFormatError(f"Section <{name}> not found in .wfx file.")
+
+    def get_ints(name: str) -> np.ndarray:
+        try:
+            return np.array(get_section(name).split(), dtype=int)
+        except ValueError:
+            raise InputFormatError(f"Failed parsing integer values in section <{name}>.")
+
+    if "Additional Electron Density Function (EDF)" in sections:
+        raise NotImplementedError(
+            "Wavefunctions with additional electron density functions are not "
+            "currently supported."
+        )
+
+    atomic_numbers = get_ints("Atomic Numbers")
+    atoms_coords = parse_float_array(get_section("Nuclear Cartesian Coordinates"))
+    if len(atoms_coords) != 3*len(atomic_numbers):
+        raise InputFormatError(
+            "The number of nuclear coordinates does not match the number of atoms."
+        )
+    molecule = Molecule([
+        AtomWithCoords(int(atomic_number), Coords(coords))
+        for atomic_number, coords in zip(atomic_numbers, atoms_coords.reshape(-1, 3))
+    ])
+
+    primitive_count = int(get_ints("Number of Primitives")[0])
+    primitive_types = get_ints("Primitive Types")
+    if len(primitive_types) and (primitive_types.min() < 1 or primitive_types.max() > len(_PRIMITIVE_POWERS_BY_TYPE)):
+        raise NotImplementedError(
+            f"Only primitives of types 1 to {len(_PRIMITIVE_POWERS_BY_TYPE)} "
+            f"(up to G) are currently supported."
+        )
+
+    occupations = parse_float_array(get_section("Molecular Orbital Occupation Numbers"))
+    coefficients = parse_float_array(
+        re.sub(r"<MO Number>.*?</MO Number>", "", get_section("Molecular Orbital Primitive Coefficients"), flags=re.DOTALL)
+    )
+    if len(coefficients) != len(occupations)*primitive_count:
+        raise InputFormatError(
+            f"Expected {len(occupations)*primitive_count} primitive coefficients "
+            f"but found {len(coefficients)}."
+        )
+
+    try:
+        return Wavefunction(
+            molecule,
+            get_ints("Primitive Centers") - 1,
+            np.array(_PRIMITIVE_POWERS_BY_TYPE, dtype=int)[primitive_types - 1].reshape(-1, 3),
+            parse_float_array(get_section("Primitive Exponents")),
+            occupations,
+            coefficients.reshape(len(occupations), primitive_count)
+        )
+    except ValueError as e:
+        raise InputFormatError(f"Inconsistent data in .wfx file: {e}")
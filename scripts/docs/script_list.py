@@ -8,6 +8,7 @@ scripts_to_hooks = {
     'fit_dependence': 'scripts.fit_dependence:main',
     'fit_points': 'scripts.fit_points:main',
     'flexibility': 'scripts.flexibility:main',
+    'ingest_charges': 'scripts.ingest_charges:main',
     'plot_fit_dependence1': 'scripts.plot_fit_dependence1:main',
     'plot_fit_dependence2': 'scripts.plot_fit_dependence2:main',
     'rep_esp': 'scripts.rep_esp:main',
@@ -0,0 +1,76 @@
+from repESP.log_ingestion import charge_type_parsers, find_log_files, get_charges_table_from_logs
+
+import argparse
+import sys
+
+
+def main():
+
+    help_description = """
+        Extract charges from all Gaussian output files in a directory tree and
+        save them as a single CSV table with one row per file, charge type and
+        atom. The files are parsed in parallel. Files which could not be read
+        or parsed are listed in a separate CSV file together with the errors.
+        """
+
+    parser = argparse.ArgumentParser(
+        description=help_description,
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+
+    parser.add_argument("directory",
+                        help="directory to be searched recursively for Gaussian "
+                        "output files",
+                        metavar="DIRECTORY")
+
+    parser.add_argument("-c", "--charge_types",
+                        help="types of charges to be extracted",
+                        nargs="+",
+                        choices=list(charge_type_parsers),
+                        default=list(charge_type_parsers),
+                        metavar="CHARGE_TYPE")
+
+    parser.add_argument("--extensions",
+                        help="extensions of the Gaussian output files",
+                        nargs="+",
+                        default=[".log", ".out"],
+                        metavar="EXTENSION")
+
+    parser.add_argument("--occurrence",
+                        help="""which occurrence of the charges to extract from
+                        each file. The default of -1 denotes the last occurrence,
+                        0 the first one etc.""",
+                        type=int,
+                        default=-1)
+
+    parser.add_argument("-j", "--jobs",
+                        help="""number of worker processes. All available
+                        processors are used if not specified.""",
+                        type=int)
+
+    parser.add_argument("-o", "--output",
+                        help="output file name",
+                        default="charges.csv")
+
+    parser.add_argument("--errors_output",
+                        help="output file name for the list of files which "
+                        "could not be parsed",
+                        default="charges_errors.csv")
+
+    args = parser.parse_args()
+
+    paths = find_log_files(args.directory, args.extensions)
+    charges_table = get_charges_table_from_logs(
+        paths,
+        args.charge_types,
+        occurrence=args.occurrence,
+        max_workers=args.jobs
+    )
+
+    charges_table.charges.to_csv(args.output)
+    print(f"Charges from {len(paths) - len(charges_table.errors)} files written "
+          f"to '{args.output}'")
+
+    if len(charges_table.errors):
+        charges_table.errors.to_csv(args.errors_output)
+        print(f"Failed to parse {len(charges_table.errors)} files, see "
+              f"'{args.errors_output}'", file=sys.stderr)
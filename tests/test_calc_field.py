@@ -1,12 +1,20 @@
-from repESP.calc_fields import esp_from_charges, voronoi, calc_rms_error, calc_relative_rms_error
+from repESP.calc_fields import esp_from_charges, ed_from_wavefunction, esp_from_wavefunction, voronoi
+from repESP.calc_fields import group_close_points, merge_close_points, merge_close_field_points
+from repESP.calc_fields import _boys
+from repESP.calc_fields import calc_rms_error, calc_relative_rms_error
+from repESP.cube_format import parse_ed_cube
 from repESP.charges import *
 from repESP.esp_util import parse_gaussian_esp
 from repESP.fields import *
 from repESP.types import *
 from repESP.gaussian_format import get_charges_from_log, MkChargeSectionParser
+from repESP.wfx_format import parse_wfx
 
 from my_unittest import TestCase
 
+import numpy as np
+from scipy.integrate import quad  # type: ignore
+
 
 class SmallTestCase(TestCase):
 
@@ -138,6 +146,107 @@ class TestVoronoi(SmallTestCase):
         self.assertAlmostEqualRecursive(expected, result)
 
 
+class TestEdFromWavefunction(TestCase):
+
+    def setUp(self) -> None:
+        with open("data/methane/prep/methane.wfx") as f:
+            self.wavefunction = parse_wfx(f)
+        with open("data/methane/methane_den.cub") as f:
+            self.cube = parse_ed_cube(f)
+
+    def test_against_cube(self) -> None:
+        # The reference cube describes the valence density, i.e. it does not
+        # include the contribution of the carbon 1s orbital.
+        self.wavefunction.occupations[0] = 0
+        result = ed_from_wavefunction(self.cube.field.mesh, self.wavefunction)
+        expected = np.array(self.cube.field.values, dtype=float)
+        self.assertTrue(np.allclose(result.values, expected, rtol=2e-4, atol=1e-8))
+
+    def test_screening(self) -> None:
+        screened = ed_from_wavefunction(self.cube.field.mesh, self.wavefunction, chunk_size=100)
+        unscreened = ed_from_wavefunction(self.cube.field.mesh, self.wavefunction, cutoff=0)
+        self.assertTrue(np.allclose(screened.values, unscreened.values, rtol=0, atol=1e-10))
+
+    def test_electron_count(self) -> None:
+        origin = self.wavefunction.primitive_coordinates.min(axis=0) - 6
+        mesh = GridMesh(
+            Coords(origin),
+            GridMesh.Axes([GridMesh.Axis(Coords(vector), 60) for vector in 0.25*np.eye(3)])
+        )
+        result = ed_from_wavefunction(mesh, self.wavefunction)
+        self.assertAlmostEqual(np.sum(result.values)*0.25**3, 10, delta=0.5)
+
+
+class TestBoys(TestCase):
+
+    def test_against_quadrature(self) -> None:
+        x = np.array([0, 1e-14, 1e-6, 0.3, 5, 30, 45, 60, 1e3])
+        result = _boys(6, x)
+        for n in range(7):
+            for i, x_value in enumerate(x):
+                expected = quad(lambda s: s**(2*n)*np.exp(-x_value*s**2), 0, 1, epsabs=0, epsrel=1e-12)[0]
+                self.assertAlmostEqual(result[n][i]/expected, 1, places=12)
+
+
+class TestEspFromWavefunction(TestCase):
+
+    def setUp(self) -> None:
+        with open("data/methane/prep/methane.wfx") as f:
+            self.wavefunction = parse_wfx(f)
+        with open("data/methane/methane_mk.esp") as f:
+            self.gaussian_esp = parse_gaussian_esp(f)
+
+    def test_against_gaussian(self) -> None:
+        result = esp_from_wavefunction(self.gaussian_esp.field.mesh, self.wavefunction)
+        expected = np.array(self.gaussian_esp.field.values, dtype=float)
+        self.assertTrue(np.allclose(result.values, expected, rtol=0, atol=5e-7))
+
+    def test_screening(self) -> None:
+        screened = esp_from_wavefunction(self.gaussian_esp.field.mesh, self.wavefunction, chunk_size=100)
+        unscreened = esp_from_wavefunction(self.gaussian_esp.field.mesh, self.wavefunction, cutoff=0)
+        self.assertTrue(np.allclose(screened.values, unscreened.values, rtol=0, atol=1e-9))
+
+
+class TestMergeClosePoints(TestCase):
+
+    def setUp(self) -> None:
+        self.mesh = Mesh([
+            Coords((0, 0, 0)),
+            Coords((1, 0, 0)),
+            Coords((0, 0, 0.001)),
+            Coords((2, 0, 0)),
+            Coords((1, 0.002, 0)),
+            Coords((0, 0, 0.002)),
+        ])
+        self.field = Field(self.mesh, [Esp(value) for value in [1, 2, 3, 4, 5, 6]])
+
+    def test_groups(self) -> None:
+        self.assertListEqual(list(group_close_points(self.mesh, 0.0015)), [0, 1, 0, 2, 3, 0])
+        self.assertListEqual(list(group_close_points(self.mesh, 0.003)), [0, 1, 0, 2, 1, 0])
+        self.assertListEqual(list(group_close_points(self.mesh, 0.0001)), [0, 1, 2, 3, 4, 5])
+
+    def test_mesh_keeping_first(self) -> None:
+        self.assertAlmostEqualRecursive(
+            list(merge_close_points(self.mesh, 0.003).points),
+            [Coords((0, 0, 0)), Coords((1, 0, 0)), Coords((2, 0, 0))]
+        )
+
+    def test_mesh_averaging(self) -> None:
+        self.assertAlmostEqualRecursive(
+            list(merge_close_points(self.mesh, 0.003, average=True).points),
+            [Coords((0, 0, 0.001)), Coords((1, 0.001, 0)), Coords((2, 0, 0))]
+        )
+
+    def test_field_keeping_first(self) -> None:
+        result = merge_close_field_points(self.field, 0.003)
+        self.assertEqual(len(result.mesh), 3)
+        self.assertListEqual(list(result.values), [1, 2, 4])
+
+    def test_field_averaging(self) -> None:
+        result = merge_close_field_points(self.field, 0.003, average=True)
+        self.assertListsAlmostEqual(list(result.values), [10/3, 3.5, 4])
+
+
 class TestCalcStats(TestCase):
 
     def setUp(self) -> None:
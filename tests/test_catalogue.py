@@ -0,0 +1,201 @@
+from repESP.catalogue import Catalogue
+from repESP.esp_util import parse_gaussian_esp
+from repESP.exceptions import InputFormatError
+from repESP.gaussian_format import get_charges_from_log, get_charges_sections_from_log
+from repESP.gaussian_format import get_esp_fit_stats_from_log, MkChargeSectionParser
+from repESP.gaussian_format import MullikenChargeSectionParser
+from repESP.respin_format import get_equivalence_from_two_stage_resp_ivary, parse_respin
+from repESP.util import open_file
+
+from my_unittest import TestCase
+
+import os
+import shutil
+import sqlite3
+import tempfile
+
+
+class TestCatalogue(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        self.data_dir = os.path.join(self.temp_dir, "data")
+        shutil.copytree("data/methane", self.data_dir, ignore=shutil.ignore_patterns("bader", "prep", "*.cub"))
+        self.log_path = os.path.join(self.data_dir, "methane_mk.log")
+        self.esp_path = os.path.join(self.data_dir, "methane_mk.esp")
+        self.respin1_path = os.path.join(self.data_dir, "methane.respin1")
+        self.respin2_path = os.path.join(self.data_dir, "methane.respin2")
+        self.catalogue = Catalogue(os.path.join(self.temp_dir, "catalogue.sqlite"))
+
+    def tearDown(self) -> None:
+        self.catalogue.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_queries(self) -> None:
+        self.catalogue.update_directory(self.data_dir)
+
+        with open(self.log_path) as f:
+            self.assertListEqual(
+                self.catalogue.get_charges(self.log_path, "mk"),
+                get_charges_from_log(f, MkChargeSectionParser())
+            )
+        with open(self.log_path) as f:
+            self.assertEqual(
+                self.catalogue.get_esp_fit_stats(self.log_path, "mk"),
+                get_esp_fit_stats_from_log(f, MkChargeSectionParser())
+            )
+        with open(self.log_path) as f:
+            parser = MullikenChargeSectionParser()
+            self.assertListEqual(
+                self.catalogue.get_charges_sections(self.log_path, "mulliken"),
+                get_charges_sections_from_log(f, [parser])[parser]
+            )
+        self.assertListEqual(self.catalogue.get_charges_sections(self.log_path, "nbo"), [])
+
+        with open(self.esp_path) as f:
+            self.assertEqual(self.catalogue.get_molecule(self.esp_path), parse_gaussian_esp(f).molecule)
+
+        with open(self.respin1_path) as f1, open(self.respin2_path) as f2:
+            respin1 = parse_respin(f1)
+            respin2 = parse_respin(f2)
+        self.assertEqual(self.catalogue.get_respin(self.respin1_path), respin1)
+        self.assertEqual(self.catalogue.get_molecule(self.respin1_path), respin1.molecule)
+        self.assertEqual(
+            self.catalogue.get_equivalence(self.respin1_path, self.respin2_path),
+            get_equivalence_from_two_stage_resp_ivary(respin1.ivary, respin2.ivary)
+        )
+
+    def test_incremental_update(self) -> None:
+        self.assertIn(self.log_path, self.catalogue.update_directory(self.data_dir))
+        self.assertListEqual(self.catalogue.update_directory(self.data_dir), [])
+
+        # Modification time changed but the contents did not.
+        stat = os.stat(self.log_path)
+        os.utime(self.log_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertListEqual(self.catalogue.update([self.log_path]), [])
+
+        with open(self.log_path, "a") as f, open("data/methane/methane_mk.log") as mk_log:
+            f.write(mk_log.read())
+        self.assertListEqual(self.catalogue.update_directory(self.data_dir), [self.log_path])
+        self.assertEqual(len(self.catalogue.get_charges_sections(self.log_path, "mk")), 2)
+
+    def test_persistence(self) -> None:
+        self.catalogue.update([self.log_path])
+        charges = self.catalogue.get_charges(self.log_path, "mk")
+        self.catalogue.close()
+
+        self.catalogue = Catalogue(os.path.join(self.temp_dir, "catalogue.sqlite"))
+        self.assertListEqual(self.catalogue.get_paths(), [self.log_path])
+        self.assertListEqual(self.catalogue.update([self.log_path]), [])
+        self.assertListEqual(self.catalogue.get_charges(self.log_path, "mk"), charges)
+
+    def test_errors(self) -> None:
+        malformed_path = os.path.join(self.temp_dir, "malformed.esp")
+        with open(malformed_path, "w") as f:
+            f.write("malformed")
+        self.catalogue.update([malformed_path, self.log_path])
+
+        self.assertListEqual(list(self.catalogue.get_errors()), [malformed_path])
+        with self.assertRaises(InputFormatError):
+            self.catalogue.get_molecule(malformed_path)
+
+        with self.assertRaises(KeyError):
+            self.catalogue.get_charges(self.esp_path, "mk")
+        with self.assertRaises(ValueError):
+            self.catalogue.get_molecule(self.log_path)
+        with self.assertRaises(ValueError):
+            self.catalogue.get_esp_fit_stats(self.log_path, "mulliken")
+        with self.assertRaises(IndexError):
+            self.catalogue.get_charges(self.log_path, "mk", occurrence=1)
+
+    def test_compressed_files(self) -> None:
+        paths = [self.log_path, self.esp_path, self.respin1_path]
+        compressed_paths = []
+        for path, extension in zip(paths, [".gz", ".bz2", ".xz"]):
+            compressed_paths.append(path + extension)
+            with open(path) as f, open_file(path + extension, "w") as compressed:
+                compressed.write(f.read())
+
+        self.assertListEqual(
+            sorted(self.catalogue.update_directory(self.data_dir)),
+            sorted(self.catalogue.get_paths())
+        )
+        self.assertTrue(set(compressed_paths) <= set(self.catalogue.get_paths()))
+        self.assertDictEqual(self.catalogue.get_errors(), {})
+
+        self.assertListEqual(
+            self.catalogue.get_charges(compressed_paths[0], "mk"),
+            self.catalogue.get_charges(self.log_path, "mk")
+        )
+        self.assertEqual(
+            self.catalogue.get_molecule(compressed_paths[1]),
+            self.catalogue.get_molecule(self.esp_path)
+        )
+        self.assertEqual(
+            self.catalogue.get_respin(compressed_paths[2]),
+            self.catalogue.get_respin(self.respin1_path)
+        )
+
+    def test_truncated_file(self) -> None:
+        truncated_path = os.path.join(self.temp_dir, "truncated.esp")
+        with open(self.esp_path) as f, open(truncated_path, "w") as truncated:
+            truncated.write(f.read()[:114])
+
+        self.assertListEqual(
+            self.catalogue.update([truncated_path, self.log_path]),
+            [truncated_path, self.log_path]
+        )
+        self.assertListEqual(list(self.catalogue.get_errors()), [truncated_path])
+        self.assertTrue(self.catalogue.get_errors()[truncated_path].startswith("IndexError"))
+        with self.assertRaises(InputFormatError):
+            self.catalogue.get_molecule(truncated_path)
+        self.assertEqual(len(self.catalogue.get_charges(self.log_path, "mk")), 5)
+
+    def test_incompatible_version(self) -> None:
+        self.catalogue.update([self.log_path])
+        self.catalogue.close()
+        connection = sqlite3.connect(self.catalogue.path)
+        connection.execute("PRAGMA user_version = 99")
+        connection.close()
+
+        self.catalogue = Catalogue(self.catalogue.path)
+        self.assertListEqual(self.catalogue.get_paths(), [])
+        self.assertListEqual(self.catalogue.update([self.log_path]), [self.log_path])
+
+    def test_unrelated_database(self) -> None:
+        path = os.path.join(self.temp_dir, "unrelated.sqlite")
+        for user_version in [0, 1]:
+            with self.subTest(user_version=user_version):
+                connection = sqlite3.connect(path)
+                with connection:
+                    connection.execute("DROP TABLE IF EXISTS data")
+                    connection.execute("CREATE TABLE data (value INTEGER)")
+                    connection.execute("INSERT INTO data VALUES (42)")
+                connection.execute(f"PRAGMA user_version = {user_version}")
+                connection.close()
+
+                with self.assertRaises(ValueError):
+                    Catalogue(path)
+
+                connection = sqlite3.connect(path)
+                self.assertListEqual(connection.execute("SELECT value FROM data").fetchall(), [(42,)])
+                connection.close()
+
+    def test_not_a_database(self) -> None:
+        with open(self.log_path, "rb") as f:
+            content = f.read()
+        with self.assertRaises(ValueError):
+            Catalogue(self.log_path)
+        with open(self.log_path, "rb") as f:
+            self.assertEqual(f.read(), content)
+
+    def test_unsupported_file(self) -> None:
+        with self.assertRaises(ValueError):
+            self.catalogue.update([self.log_path, os.path.join(self.data_dir, "methane.fchk")])
+        self.assertListEqual(self.catalogue.get_paths(), [])
+
+    def test_prune(self) -> None:
+        self.catalogue.update([self.log_path, self.esp_path])
+        os.remove(self.esp_path)
+        self.assertListEqual(self.catalogue.prune(), [self.esp_path])
+        self.assertListEqual(self.catalogue.get_paths(), [self.log_path])
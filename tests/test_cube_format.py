@@ -1,9 +1,18 @@
 from repESP.charges import Charge
 from repESP.types import *
-from repESP.cube_format import parse_ed_cube, write_cube
+from repESP import cube_format
+from repESP.cube_format import Cube, RandomAccessCube, parse_cube_slabs, parse_ed_cube, parse_esp_cube
+from repESP.cube_format import write_cube, write_cube_slabs
+from repESP.exceptions import InputFormatError
 from repESP.fields import *
+from repESP.util import open_file
 
 from io import StringIO
+from typing import Tuple
+import numpy as np
+import os
+import shutil
+import tempfile
 from my_unittest import TestCase
 
 class TestCubeParser(TestCase):
@@ -72,6 +81,39 @@ class TestCubeParser(TestCase):
             self.cube.field.values
         )
 
+
+class TestArrayBackedCubeParser(TestCase):
+
+    def setUp(self) -> None:
+        with open("tests/test_mol_den.cub", 'r') as f:
+            self.cube = parse_ed_cube(f)
+            f.seek(0)
+            self.array_cube = parse_ed_cube(f, array_backed=True)
+
+    def test_header(self) -> None:
+        self.assertEqual(self.array_cube.info, self.cube.info)
+        self.assertEqual(self.array_cube.molecule, self.cube.molecule)
+        self.assertEqual(self.array_cube.field.mesh, self.cube.field.mesh)
+
+    def test_field_values(self) -> None:
+        self.assertIsInstance(self.array_cube.field.values, np.ndarray)
+        self.assertListEqual(list(self.array_cube.field.values), list(self.cube.field.values))
+
+    def test_title_verification(self) -> None:
+        for array_backed in [False, True]:
+            with self.subTest(array_backed=array_backed):
+                with open("tests/test_mol_den.cub", 'r') as f:
+                    with self.assertRaises(InputFormatError):
+                        parse_esp_cube(f, array_backed=array_backed)
+
+    def test_malformed_value(self) -> None:
+        with open("tests/test_mol_den.cub", 'r') as f:
+            content = f.read()
+
+        with self.assertRaises(InputFormatError):
+            parse_ed_cube(StringIO(content.replace("9.18219E-08", "9.18219X-08")), array_backed=True)
+
+
 class TestCubeWriter(TestCase):
 
     def setUp(self) -> None:
@@ -86,3 +128,298 @@ class TestCubeWriter(TestCase):
         stringIO.seek(0)
         output = stringIO.readlines()
         self.assertListEqual(self.input, output)
+
+    def test_compare_input_to_written_array_backed_cube(self) -> None:
+        with open("tests/test_mol_den.cub", 'r') as f:
+            cube = parse_ed_cube(f, array_backed=True)
+
+        stringIO = StringIO()
+        write_cube(stringIO, cube)
+        stringIO.seek(0)
+        output = stringIO.readlines()
+        self.assertListEqual(self.input, output)
+
+
+class TestCompressedCube(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        with open("tests/test_mol_den.cub", 'r') as f:
+            self.cube = parse_ed_cube(f)
+            f.seek(0)
+            self.input = f.read()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def test_round_trip(self) -> None:
+        for extension in [".gz", ".bz2", ".xz"]:
+            for array_backed in [False, True]:
+                with self.subTest(extension=extension, array_backed=array_backed):
+                    path = os.path.join(self.temp_dir, "test.cub" + extension)
+                    write_cube(path, self.cube)
+
+                    with open_file(path) as f:
+                        self.assertEqual(f.read(), self.input)
+
+                    cube = parse_ed_cube(path, array_backed=array_backed)
+                    self.assertEqual(cube.info, self.cube.info)
+                    self.assertEqual(cube.molecule, self.cube.molecule)
+                    self.assertEqual(cube.field.mesh, self.cube.field.mesh)
+                    self.assertListEqual(list(cube.field.values), list(self.cube.field.values))
+
+    def test_slabs(self) -> None:
+        path = os.path.join(self.temp_dir, "test.cub.gz")
+        mesh = self.cube.field.mesh
+        assert isinstance(mesh, GridMesh)
+        values = np.array(self.cube.field.values).reshape(
+            [axis.point_count for axis in mesh.axes]
+        )
+        write_cube_slabs(path, self.cube.info, self.cube.molecule, mesh, values)
+
+        with open_file(path) as f:
+            self.assertEqual(f.read(), self.input)
+
+
+def make_cube(point_counts: Tuple[int, int, int], values: np.ndarray) -> Cube[float]:
+    mesh = GridMesh(
+        Coords((0, 0, 0)),
+        GridMesh.Axes(
+            GridMesh.Axis(Coords(vector), point_count)
+            for vector, point_count in zip(
+                [(0.1, 0, 0), (0, 0.1, 0), (0, 0, 0.1)],
+                point_counts
+            )
+        )
+    )
+    return Cube(Cube.Info("input", "title"), Molecule([]), Field(mesh, values))
+
+
+class TestValuesLayout(TestCase):
+
+    @staticmethod
+    def write_reference(cube: Cube[float]) -> str:
+        # The original per-value implementation of the values layout
+        f = StringIO()
+        i = 1
+        for value in cube.field.values:
+            f.write(' {0: .5E}'.format(value))
+            if not i % 6:
+                f.write('\n')
+            if not i % cube.field.mesh.axes[2].point_count:  # type: ignore # (accessing subclass attribute)
+                f.write('\n')
+                i = 1
+            else:
+                i += 1
+        return f.getvalue()
+
+    def test_layout(self) -> None:
+        rng = np.random.default_rng(0)
+        for point_counts in [(2, 3, 1), (3, 2, 5), (2, 2, 6), (4, 3, 12), (2, 5, 13)]:
+            with self.subTest(point_counts=point_counts):
+                values = rng.normal(size=np.prod(point_counts))*10.0**rng.integers(-12, 12)
+                values[0] = -0.0
+                cube = make_cube(point_counts, values)
+
+                written = StringIO()
+                write_cube(written, cube)
+                values_block = "".join(written.getvalue().splitlines(keepends=True)[6:])
+
+                self.assertEqual(values_block, self.write_reference(cube))
+
+    def test_multiple_blocks(self) -> None:
+        values = np.random.default_rng(0).normal(size=60*60*60)
+        cube = make_cube((60, 60, 60), values)
+
+        written = StringIO()
+        write_cube(written, cube)
+        values_block = "".join(written.getvalue().splitlines(keepends=True)[6:])
+
+        self.assertEqual(values_block, self.write_reference(cube))
+
+
+class TestCubeSlabs(TestCase):
+
+    def setUp(self) -> None:
+        with open("tests/test_mol_den.cub", 'r') as f:
+            self.cube = parse_ed_cube(f)
+            f.seek(0)
+            self.input = f.read()
+
+    def test_parsing(self) -> None:
+        cube_slabs = parse_cube_slabs(StringIO(self.input))
+
+        self.assertEqual(cube_slabs.info, self.cube.info)
+        self.assertEqual(cube_slabs.molecule, self.cube.molecule)
+        self.assertEqual(cube_slabs.mesh, self.cube.field.mesh)
+
+        slabs = list(cube_slabs.slabs)
+        self.assertEqual(len(slabs), 3)
+        for slab in slabs:
+            self.assertEqual(slab.shape, (3, 3))
+        self.assertListEqual(np.concatenate(slabs, axis=None).tolist(), list(self.cube.field.values))
+
+    def test_parsing_in_small_chunks(self) -> None:
+        original_chunk_size = cube_format._READ_CHUNK_SIZE
+        cube_format._READ_CHUNK_SIZE = 7
+        try:
+            # The chunk size is also bounded by the slab size. A large grid
+            # along x allows testing with slabs spanning multiple chunks.
+            values = np.random.default_rng(0).normal(size=(40, 2, 3))
+            cube = make_cube((40, 2, 3), values.ravel())
+            written = StringIO()
+            write_cube(written, cube)
+            written.seek(0)
+
+            slabs = list(parse_cube_slabs(written).slabs)
+        finally:
+            cube_format._READ_CHUNK_SIZE = original_chunk_size
+
+        self.assertListsAlmostEqual(np.ravel(slabs), values.ravel(), places=5)
+
+    def test_too_few_values(self) -> None:
+        cube_slabs = parse_cube_slabs(StringIO(self.input.rstrip().rsplit(" ", 1)[0]))
+        with self.assertRaises(InputFormatError):
+            list(cube_slabs.slabs)
+
+    def test_too_many_values(self) -> None:
+        cube_slabs = parse_cube_slabs(StringIO(self.input + " 1.00000E-08\n"))
+        with self.assertRaises(InputFormatError):
+            list(cube_slabs.slabs)
+
+    def test_writing(self) -> None:
+        cube_slabs = parse_cube_slabs(StringIO(self.input))
+
+        written = StringIO()
+        write_cube_slabs(written, cube_slabs.info, cube_slabs.molecule, cube_slabs.mesh, cube_slabs.slabs)
+
+        self.assertEqual(written.getvalue(), self.input)
+
+    def test_writing_fails_with_wrong_slabs(self) -> None:
+        mesh = self.cube.field.mesh
+        assert isinstance(mesh, GridMesh)
+        for slabs in [[np.zeros((3, 3))]*2, [np.zeros((3, 2))]*3]:
+            with self.subTest(slabs=slabs):
+                with self.assertRaises(ValueError):
+                    write_cube_slabs(StringIO(), self.cube.info, self.cube.molecule, mesh, slabs)
+
+
+class TestRandomAccessCube(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def write_cube_file(self, cube: Cube[float], newline: str="\n") -> str:
+        path = os.path.join(self.temp_dir, "test.cub")
+        with open(path, "w", newline=newline) as f:
+            write_cube(f, cube)
+        return path
+
+    def test_values(self) -> None:
+        for point_counts in [(2, 3, 4), (3, 2, 6), (2, 2, 13)]:
+            for newline in ["\n", "\r\n"]:
+                with self.subTest(point_counts=point_counts, newline=newline):
+                    values = np.random.default_rng(0).normal(size=point_counts)
+                    cube = make_cube(point_counts, values.ravel())
+                    path = self.write_cube_file(cube, newline)
+
+                    with open(path, "rb") as f:
+                        random_access_cube = RandomAccessCube(f)
+
+                        self.assertEqual(random_access_cube.info, cube.info)
+                        self.assertEqual(random_access_cube.mesh, cube.field.mesh)
+
+                        for index in np.ndindex(*point_counts):
+                            self.assertAlmostEqual(
+                                float(random_access_cube.get_value(index)),
+                                float(values[index]),
+                                places=5
+                            )
+
+                        indices = [(1, 1, 3), (0, 1, 2), (1, 0, 0)]
+                        self.assertListsAlmostEqual(
+                            random_access_cube.get_values(indices),
+                            [values[index] for index in indices],
+                            places=5
+                        )
+
+    def test_box(self) -> None:
+        values = np.random.default_rng(0).normal(size=(4, 5, 14))
+        cube = make_cube((4, 5, 14), values.ravel())
+        path = self.write_cube_file(cube)
+
+        with open(path, "rb") as f:
+            random_access_cube = RandomAccessCube(f)
+            box = random_access_cube.get_box((1, 2, 5), (3, 5, 13))
+            field = random_access_cube.crop((1, 2, 5), (3, 5, 13))
+
+        expected = values[1:3, 2:5, 5:13]
+        self.assertEqual(box.shape, expected.shape)
+        self.assertListsAlmostEqual(box.ravel(), expected.ravel(), places=5)
+
+        self.assertListsAlmostEqual(field.values, expected.ravel(), places=5)
+        self.assertListsAlmostEqual(next(field.mesh.points), Coords((0.1, 0.2, 0.5)))
+        self.assertEqual(len(field.mesh), expected.size)
+
+    def test_index_out_of_range(self) -> None:
+        with open("tests/test_mol_den.cub", "rb") as f:
+            random_access_cube = RandomAccessCube(f)
+            with self.assertRaises(IndexError):
+                random_access_cube.get_value((0, 3, 0))
+            with self.assertRaises(IndexError):
+                random_access_cube.get_box((0, 0, 0), (1, 4, 1))
+            with self.assertRaises(IndexError):
+                random_access_cube.get_box((1, 0, 0), (1, 1, 1))
+
+    def test_nearest_index(self) -> None:
+        with open("tests/test_mol_den.cub", "rb") as f:
+            random_access_cube = RandomAccessCube(f)
+
+        self.assertEqual(random_access_cube.get_nearest_index(Coords((0.31, 0.45, -5))), (1, 1, 0))
+
+    def test_rows_without_empty_line(self) -> None:
+        # Gaussian does not follow rows filling their last line with an empty
+        # line, unlike `write_cube`.
+        for point_counts in [(2, 3, 12), (1, 1, 6), (3, 2, 6)]:
+            for newline in ["\n", "\r\n"]:
+                with self.subTest(point_counts=point_counts, newline=newline):
+                    values = np.random.default_rng(0).normal(size=point_counts)
+                    path = self.write_cube_file(make_cube(point_counts, values.ravel()), newline)
+                    with open(path, "rb") as f:
+                        content = f.read()
+                    with open(path, "wb") as f:
+                        f.write(content.replace(2*newline.encode(), newline.encode()))
+
+                    with open(path, "rb") as f:
+                        box = RandomAccessCube(f).get_box((0, 0, 0), point_counts)
+                    self.assertTrue(np.allclose(box, values, rtol=1e-5))
+
+    def test_gaussian_cube(self) -> None:
+        cube = parse_esp_cube("data/methane/methane_esp.cub", array_backed=True)
+        with open("data/methane/methane_esp.cub", "rb") as f:
+            random_access_cube = RandomAccessCube(f)
+            self.assertEqual(random_access_cube.mesh, cube.field.mesh)
+            nx, ny, nz = (axis.point_count for axis in random_access_cube.mesh.axes)
+            self.assertTrue(np.array_equal(
+                random_access_cube.get_box((0, 0, 0), (nx, ny, nz)).ravel(),
+                cube.field.values
+            ))
+
+    def test_layout_validation(self) -> None:
+        with open("tests/test_mol_den.cub") as f:
+            content = f.read()
+
+        path = os.path.join(self.temp_dir, "test.cub")
+        for modified in [
+            content + " 1.00000E-08\n",
+            content.replace(" 1.36229E-08", "  1.36229E-08"),
+        ]:
+            with self.subTest(modified=modified):
+                with open(path, "w") as f:
+                    f.write(modified)
+                with open(path, "rb") as f:
+                    with self.assertRaises(InputFormatError):
+                        RandomAccessCube(f)
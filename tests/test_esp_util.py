@@ -2,11 +2,19 @@ from repESP.types import *
 from repESP.charges import *
 from repESP.esp_util import GaussianEspData, parse_gaussian_esp
 from repESP.esp_util import EspData, parse_resp_esp, write_resp_esp
+from repESP.esp_util import _write_e16_7_rows
 from repESP.fields import *
+from repESP.exceptions import InputFormatError
+from repESP.util import open_file
 
 from my_unittest import TestCase
 
+from fortranformat import FortranRecordWriter as FW
 from io import StringIO
+import numpy as np
+import os
+import shutil
+import tempfile
 
 
 gaussian_esp_data = GaussianEspData(
@@ -92,3 +100,142 @@ class TestRespEsp(TestCase):
             expected_esp_data,
             places=6
         )
+
+
+class TestCompressedEsp(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def compress(self, path: str, extension: str) -> str:
+        compressed_path = os.path.join(self.temp_dir, os.path.basename(path) + extension)
+        with open(path) as f, open_file(compressed_path, "w") as compressed:
+            compressed.write(f.read())
+        return compressed_path
+
+    def test_gaussian_esp(self) -> None:
+        for extension in [".gz", ".bz2", ".xz"]:
+            with self.subTest(extension=extension):
+                path = self.compress("tests/test_gaussian.esp", extension)
+                self.assertAlmostEqualRecursive(gaussian_esp_data, parse_gaussian_esp(path))
+
+    def test_resp_esp_round_trip(self) -> None:
+        esp_data = EspData.from_gaussian(gaussian_esp_data)
+
+        for extension in [".gz", ".bz2", ".xz"]:
+            with self.subTest(extension=extension):
+                path = os.path.join(self.temp_dir, "test.esp" + extension)
+                write_resp_esp(path, esp_data)
+
+                with open_file(path) as written, open("tests/test_resp.esp") as f:
+                    self.assertListEqual(f.readlines(), written.readlines())
+
+                self.assertAlmostEqualRecursive(esp_data, parse_resp_esp(path), places=6)
+
+
+class TestBulkE16_7Writing(TestCase):
+
+    def assertMatchesFortranRecordWriter(self, fortran_format: str, values: np.ndarray) -> None:
+        written = StringIO()
+        _write_e16_7_rows(written, fortran_format, values)
+
+        writer = FW(fortran_format)
+        expected = [writer.write(row.tolist()) + "\n" for row in values]
+
+        self.assertListEqual(expected, written.getvalue().splitlines(keepends=True))
+
+    def test_random_values(self) -> None:
+        rng = np.random.default_rng(0)
+        values = rng.normal(size=(2000, 4))*10.0**rng.integers(-110, 110, size=(2000, 4))
+        self.assertMatchesFortranRecordWriter("1X,4E16.7", values)
+
+    def test_rounding_ties(self) -> None:
+        rng = np.random.default_rng(0)
+        mantissas = rng.integers(10**6, 10**7, size=(1000, 3)) + 0.5
+        values = mantissas*10.0**rng.integers(-20, 20, size=(1000, 3))/1e7
+        self.assertMatchesFortranRecordWriter("17X,3E16.7", values)
+
+    def test_edge_cases(self) -> None:
+        values = np.array([
+            [0.0, -0.0, 1.0, -1.0],
+            [9.99999995, 0.99999995, 0.099999995, 1e6],
+            [1e-99, 1e-100, 9.9999999e98, 1.5e99],
+            [5e-324, 1.7976931348623157e308, np.nan, 0.5],
+            [np.inf, -np.inf, -1.23456785e-5, 10.0],
+        ])
+        self.assertMatchesFortranRecordWriter("1X,4E16.7", values)
+
+    def test_multiple_blocks(self) -> None:
+        values = np.random.default_rng(0).normal(size=(25000, 4))
+        self.assertMatchesFortranRecordWriter("1X,4E16.7", values)
+
+    def test_unsupported_format(self) -> None:
+        with self.assertRaises(ValueError):
+            _write_e16_7_rows(StringIO(), "1X,4E16.8", np.zeros((1, 4)))
+
+
+class TestArrayBackedParsing(TestCase):
+
+    def test_gaussian_esp(self) -> None:
+
+        with open("tests/test_gaussian.esp") as f:
+            parsed = parse_gaussian_esp(f, array_backed=True)
+
+        self.assertIsInstance(parsed.field.mesh, ArrayMesh)
+        self.assertIsInstance(parsed.field.values, np.ndarray)
+        self.assertListsAlmostEqual(parsed.field.values, gaussian_esp_data.field.values)
+        self.assertListEqual(
+            [tuple(point) for point in parsed.field.mesh.points],
+            [tuple(point) for point in gaussian_esp_data.field.mesh.points]
+        )
+
+    def test_resp_esp(self) -> None:
+
+        with open("tests/test_resp.esp") as f:
+            parsed = parse_resp_esp(f, array_backed=True)
+
+        with open("tests/test_resp.esp") as f:
+            expected = parse_resp_esp(f)
+
+        self.assertListEqual(parsed.atoms_coords, expected.atoms_coords)
+        self.assertListEqual(list(parsed.field.values), list(expected.field.values))
+        self.assertListEqual(list(parsed.field.mesh.points), list(expected.field.mesh.points))
+
+    def test_writing_array_backed(self) -> None:
+
+        with open("tests/test_resp.esp") as f:
+            esp_data = parse_resp_esp(f, array_backed=True)
+
+        written = StringIO()
+        write_resp_esp(written, esp_data)
+        written.seek(0)
+
+        with open("tests/test_resp.esp") as f:
+            self.assertListEqual(f.readlines(), written.readlines())
+
+    def test_point_count_mismatch(self) -> None:
+
+        with open("tests/test_resp.esp") as f:
+            content = f.read()
+
+        with self.assertRaises(InputFormatError):
+            parse_resp_esp(StringIO(content.replace("    2    3", "    2    4", 1)), array_backed=True)
+
+    def test_incomplete_point(self) -> None:
+
+        with open("tests/test_resp.esp") as f:
+            content = f.read()
+
+        with self.assertRaises(InputFormatError):
+            parse_resp_esp(StringIO(content.rstrip().rsplit(" ", 1)[0]), array_backed=True)
+
+    def test_malformed_value(self) -> None:
+
+        with open("tests/test_gaussian.esp") as f:
+            content = f.read()
+
+        with self.assertRaises(InputFormatError):
+            parse_gaussian_esp(StringIO(content.replace("0.34367568D+01", "0.34367568X+01")), array_backed=True)
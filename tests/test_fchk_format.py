@@ -0,0 +1,118 @@
+from repESP.charges import Charge
+from repESP.exceptions import InputFormatError
+from repESP.fchk_format import FormattedCheckpoint
+from repESP.types import Molecule
+
+from my_unittest import TestCase
+
+from io import BytesIO
+import numpy as np
+from typing import cast
+
+
+def make_fchk(entries: str, newline: str="\n") -> BytesIO:
+    lines = ["Title", "SP        RB3LYP" + " "*54 + "STO-3G"] + entries.split("\n")
+    return BytesIO(newline.join(lines).encode())
+
+
+class TestFormattedCheckpoint(TestCase):
+
+    def setUp(self) -> None:
+        self.f = open("data/methane/methane.fchk", "rb")
+        self.fchk = FormattedCheckpoint(self.f)
+
+    def tearDown(self) -> None:
+        self.f.close()
+
+    def test_header(self) -> None:
+        self.assertEqual(self.fchk.title, "Methane")
+        self.assertEqual(self.fchk.job_type, "Freq")
+        self.assertEqual(self.fchk.method, "RB3LYP")
+        self.assertEqual(self.fchk.basis, "6-311G(d,p)")
+        self.assertEqual(self.fchk.charge, 0)
+        self.assertEqual(self.fchk.multiplicity, 1)
+
+    def test_entries(self) -> None:
+        self.assertIn("Total SCF Density", self.fchk)
+        self.assertNotIn("ESP Charges", self.fchk)
+        self.assertEqual(self.fchk.keys()[:3], ["Number of atoms", "Info1-9", "Charge"])
+        self.assertEqual(self.fchk.get("Number of basis functions"), 42)
+        self.assertAlmostEqual(cast(float, self.fchk.get("SCF Energy")), -4.053374842785375E+01)
+        self.assertListEqual(list(self.fchk.get_array("Info1-9")), [12, 12, 1002, 0, 0, 100, 6, 18, -502])
+        self.assertEqual(len(self.fchk.get_array("Alpha MO coefficients")), 1764)
+
+    def test_molecule(self) -> None:
+        molecule = self.fchk.get_molecule()
+        self.assertListEqual([atom.atomic_number for atom in molecule.atoms], [6, 1, 1, 1, 1])
+        self.assertListEqual(list(molecule.atoms[1].coords), [1.19005067]*3)
+        self.assertIsInstance(molecule, Molecule)
+
+    def test_charges(self) -> None:
+        self.assertListEqual(
+            self.fchk.get_charges("Mulliken Charges"),
+            [Charge(-0.437226035), *[Charge(0.109306509)]*4]
+        )
+        with self.assertRaises(KeyError):
+            self.fchk.get_charges()
+
+    def test_density_matrix(self) -> None:
+        density_matrix = self.fchk.get_density_matrix()
+        lower_triangle = self.fchk.get_array("Total SCF Density")
+        self.assertEqual(density_matrix.shape, (42, 42))
+        self.assertTrue(np.array_equal(density_matrix, density_matrix.T))
+        self.assertEqual(density_matrix[1, 0], lower_triangle[1])
+        self.assertEqual(density_matrix[2, 2], lower_triangle[5])
+
+    def test_get_array_of_scalar(self) -> None:
+        with self.assertRaises(ValueError):
+            self.fchk.get_array("Charge")
+
+    def test_missing_entry(self) -> None:
+        with self.assertRaises(KeyError):
+            self.fchk.get("Missing")
+        self.assertNotIn(0, self.fchk)
+
+
+class TestFormattedCheckpointFormat(TestCase):
+
+    entries = "\n".join([
+        "Number of atoms                            I                2",
+        "Flag                                       L                T",
+        "Label                                      C   N=           2",
+        "FirstLabel  SecondLabel",
+        "Flags                                      L   N=           3",
+        "TFT",
+        "Small values                               R   N=           2",
+        "  1.00000000-100 -2.50000000E+00",
+        "Last                                       I   N=           1",
+        "           7",
+    ])
+
+    def check_entries(self, fchk: FormattedCheckpoint) -> None:
+        self.assertEqual(fchk.get("Number of atoms"), 2)
+        self.assertEqual(fchk.get("Flag"), True)
+        self.assertEqual(fchk.get("Label"), "FirstLabel  SecondLabel")
+        self.assertListEqual(list(fchk.get_array("Flags")), [True, False, True])
+        self.assertListEqual(list(fchk.get_array("Small values")), [1e-100, -2.5])
+        self.assertListEqual(list(fchk.get_array("Last")), [7])
+
+    def test_data_types(self) -> None:
+        self.check_entries(FormattedCheckpoint(make_fchk(self.entries)))
+
+    def test_crlf(self) -> None:
+        self.check_entries(FormattedCheckpoint(make_fchk(self.entries, "\r\n")))
+
+    def test_values_not_fixed_width(self) -> None:
+        entries = self.entries.replace("           7", "7")
+        entries = entries.replace("  1.00000000-100 -2.50000000E+00", "1e-100 -2.5")
+        self.check_entries(FormattedCheckpoint(make_fchk(entries)))
+
+    def test_value_count_mismatch(self) -> None:
+        entries = self.entries.replace("TFT", "TF")
+        fchk = FormattedCheckpoint(make_fchk(entries))
+        with self.assertRaises(InputFormatError):
+            fchk.get("Flags")
+
+    def test_malformed_entry(self) -> None:
+        with self.assertRaises(InputFormatError):
+            FormattedCheckpoint(make_fchk(self.entries.replace("Flag      ", "Flag", 1)))
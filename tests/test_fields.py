@@ -5,6 +5,7 @@ from repESP.types import *
 from my_unittest import TestCase
 
 from copy import copy
+import numpy as np
 
 
 class TestMesh(TestCase):
@@ -22,6 +23,34 @@ class TestMesh(TestCase):
         self.assertListsAlmostEqual(next(points), Coords((1, 1, 1)))
         self.assertListsAlmostEqual(next(points), Coords((-1, 0, -0.9)))
 
+    def test_as_array(self) -> None:
+        self.assertTrue(np.array_equal(self.mesh.as_array(), np.array([[1, 1, 1], [-1, 0, -0.9]])))
+
+
+class TestArrayMesh(TestCase):
+
+    def setUp(self) -> None:
+        self.mesh = ArrayMesh(np.array([[1, 1, 1], [-1, 0, -0.9]]))
+
+    def test_points(self) -> None:
+
+        points = self.mesh.points
+        self.assertListsAlmostEqual(next(points), Coords((1, 1, 1)))
+        self.assertListsAlmostEqual(next(points), Coords((-1, 0, -0.9)))
+        self.assertEqual(len(self.mesh), 2)
+
+    def test_as_array(self) -> None:
+        self.assertIs(self.mesh.as_array(), self.mesh.coordinates)
+
+    def test_construction_fails_with_wrong_shape(self) -> None:
+        with self.assertRaises(ValueError):
+            ArrayMesh(np.zeros((2, 2)))
+
+    def test_equality(self) -> None:
+        self.assertEqual(self.mesh, ArrayMesh(np.array([[1, 1, 1], [-1, 0, -0.9]])))
+        self.assertNotEqual(self.mesh, ArrayMesh(np.array([[1, 1, 1], [-1, 0, 0.9]])))
+        self.assertNotEqual(self.mesh, ArrayMesh(np.array([[1, 1, 1]])))
+
 
 class TestGridMesh(TestCase):
 
@@ -92,6 +121,71 @@ class TestGridMesh(TestCase):
 
         self.assertAlmostEqualRecursive(list(self.mesh.points), points)
 
+    def test_as_array(self) -> None:
+        self.assertTrue(np.allclose(
+            self.mesh.as_array(),
+            [tuple(point) for point in self.mesh.points]
+        ))
+
+
+class TestSpatialIndex(TestCase):
+
+    def setUp(self) -> None:
+        self.coordinates = np.random.default_rng(0).uniform(-3, 3, (500, 3))
+        self.mesh = ArrayMesh(self.coordinates)
+        self.centers = np.array([[0, 0, 0], [1.5, 0, 0]])
+
+    def distances(self, centers: np.ndarray) -> np.ndarray:
+        result: np.ndarray = np.linalg.norm(self.coordinates[:, np.newaxis, :] - centers[np.newaxis, :, :], axis=2)
+        return result
+
+    def test_cached(self) -> None:
+        self.assertIs(self.mesh.spatial_index, self.mesh.spatial_index)
+
+    def test_ball(self) -> None:
+        expected = np.flatnonzero((self.distances(self.centers) <= [1, 0.5]).any(axis=1))
+        self.assertListEqual(list(self.mesh.spatial_index.ball(self.centers, [1, 0.5])), list(expected))
+
+        expected = np.flatnonzero(self.distances(self.centers[:1])[:, 0] <= 1)
+        self.assertListEqual(list(self.mesh.spatial_index.ball(Coords((0, 0, 0)), 1)), list(expected))
+
+    def test_shell(self) -> None:
+        distances = self.distances(self.centers)
+        expected = np.flatnonzero((distances > 1).all(axis=1) & (distances <= 2).any(axis=1))
+        self.assertListEqual(list(self.mesh.spatial_index.shell(self.centers, 1, 2)), list(expected))
+
+    def test_slab(self) -> None:
+        expected = np.flatnonzero(np.abs(self.coordinates[:, 0] + self.coordinates[:, 1] - 1)/np.sqrt(2) <= 0.2)
+        self.assertListEqual(list(self.mesh.spatial_index.slab((1, 1, 0, -1), 0.2)), list(expected))
+
+        with self.assertRaises(ValueError):
+            self.mesh.spatial_index.slab((0, 0, 0, 1), 0.2)
+
+    def test_pairs(self) -> None:
+        distances = self.distances(self.coordinates)
+        expected = [(i, j) for i, j in zip(*np.nonzero(distances <= 0.3)) if i < j]
+        self.assertListEqual([tuple(pair) for pair in self.mesh.spatial_index.pairs(0.3)], expected)
+
+    def test_nearest(self) -> None:
+        distances, indices = self.mesh.spatial_index.nearest(self.centers, k=3)
+        expected = self.distances(self.centers)
+        self.assertEqual(indices.shape, (2, 3))
+        for i in range(2):
+            self.assertListEqual(list(indices[i]), list(np.argsort(expected[:, i])[:3]))
+            self.assertTrue(np.allclose(distances[i], np.sort(expected[:, i])[:3]))
+
+        with self.assertRaises(ValueError):
+            self.mesh.spatial_index.nearest(self.centers, k=0)
+
+    def test_grid_mesh(self) -> None:
+        mesh = GridMesh(
+            Coords((0, 0, 0)),
+            GridMesh.Axes([GridMesh.Axis(Coords(vector), 3) for vector in np.eye(3)])
+        )
+        # The six neighbours of the central point and the point itself
+        self.assertEqual(len(mesh.spatial_index.ball(Coords((1, 1, 1)), 1)), 7)
+        self.assertListEqual(list(mesh.spatial_index.nearest(Coords((0, 0, 2.1)))[1][0]), [2])
+
 
 class TestField(TestCase):
 
@@ -142,3 +236,32 @@ class TestField(TestCase):
 
         self.assertEqual(field1.mesh, field3.mesh)
         self.assertListsAlmostEqual(field3.values, [Esp(0.4), Esp(-1.7)])
+
+
+class TestArrayBackedField(TestCase):
+
+    def setUp(self) -> None:
+
+        self.mesh = ArrayMesh(np.array([[1, 1, 1], [-1, 0, -0.9]]))
+        self.values = np.array([0.5, -0.7])
+
+    def test_construction_keeps_array(self) -> None:
+        field = Field(self.mesh, self.values)
+        self.assertIs(field.values, self.values)
+
+    def test_construction_fails_when_lengths_mismatched(self) -> None:
+        with self.assertRaises(ValueError):
+            Field(self.mesh, np.array([0.5]))
+
+    def test_subtraction(self) -> None:
+
+        field1 = Field(self.mesh, self.values)
+        field2 = Field(self.mesh, [Esp(0.1), Esp(1)])
+        field3 = field1 - field2
+
+        self.assertIsInstance(field3.values, np.ndarray)
+        self.assertListsAlmostEqual(field3.values, [Esp(0.4), Esp(-1.7)])
+
+    def test_equality(self) -> None:
+        self.assertEqual(Field(self.mesh, self.values), Field(self.mesh, self.values.copy()))
+        self.assertNotEqual(Field(self.mesh, self.values), Field(self.mesh, -self.values))
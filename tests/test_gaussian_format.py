@@ -3,14 +3,23 @@ from repESP.fields import *
 from repESP.types import *
 from repESP.cube_format import parse_esp_cube
 from repESP.gaussian_format import get_charges_from_log, get_esp_fit_stats_from_log
+from repESP.gaussian_format import get_charges_sections_from_log, EspChargesSectionData
+from repESP.gaussian_format import LogSectionIndex
 from repESP.gaussian_format import ChargesSectionParser, EspChargesSectionParser
 from repESP.gaussian_format import MullikenChargeSectionParser, MkChargeSectionParser
 from repESP.gaussian_format import ChelpgChargeSectionParser, NpaChargeSectionParser
 
+from repESP import gaussian_format
+from repESP.exceptions import InputFormatError
+from repESP.util import open_file
+
 from my_unittest import TestCase
 
 from io import StringIO
 from typing import TextIO
+import os
+import shutil
+import tempfile
 
 
 class TestFromLog(TestCase):
@@ -224,3 +233,252 @@ class TestGetEspFitStatsFromLog(TestFromLog):
             (0.00069, 0.35027),
             occurrence=1
         )
+
+
+class TestGetChargesSectionsFromLog(TestFromLog):
+
+    def test_multiple_charge_types(self) -> None:
+        f = self.concatenate([
+            "data/methane/methane_mk.log",
+            "data/methane/methane_chelpg.log",
+            "data/methane/methane_nbo.log",
+            "data/methane/methane_mk.log",
+        ])
+
+        parsers = [
+            MullikenChargeSectionParser(),
+            MkChargeSectionParser(),
+            ChelpgChargeSectionParser(),
+            NpaChargeSectionParser(),
+        ]
+
+        sections = get_charges_sections_from_log(f, parsers, verify_against=self.molecule)
+
+        for parser in parsers:
+            with self.subTest(parser=type(parser).__name__):
+                f.seek(0)
+                expected_charges = get_charges_from_log(f, parser, occurrence=0)
+                self.assertListsAlmostEqual(sections[parser][0].charges, expected_charges)
+
+        self.assertEqual(len(sections[parsers[1]]), 2)
+        self.assertEqual(len(sections[parsers[2]]), 1)
+        self.assertEqual(len(sections[parsers[3]]), 1)
+
+        mk_section = sections[parsers[1]][1]
+        assert isinstance(mk_section, EspChargesSectionData)
+        self.assertAlmostEqual(mk_section.rms, Esp(0.00069))
+        self.assertAlmostEqual(mk_section.rrms, 0.35027)
+
+    def test_missing_charge_type(self) -> None:
+        parser = NpaChargeSectionParser()
+        with open("data/methane/methane_mk.log") as f:
+            self.assertListEqual(get_charges_sections_from_log(f, [parser])[parser], [])
+
+
+class TestBackwardScan(TestFromLog):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.original_block_size = gaussian_format._BACKWARD_SCAN_BLOCK_SIZE
+
+        # Three MK sections with distinguishable charges and an NPA section.
+        f: StringIO = StringIO(self.concatenate([
+            "data/methane/methane_mk.log",
+            "data/methane/methane_mk.log",
+            "data/methane/methane_nbo.log",
+            "data/methane/methane_mk.log",
+        ]).read())
+        for charge in ["0.111111", "0.222222"]:
+            f = self.replace_first_occurrence(
+                f,
+                "     1  C   -0.500314\n",
+                f"     1  C    {charge}\n"
+            )
+        self.content = f.getvalue()
+
+    def tearDown(self) -> None:
+        gaussian_format._BACKWARD_SCAN_BLOCK_SIZE = self.original_block_size
+        shutil.rmtree(self.temp_dir)
+
+    def write_log(self, content: str, newline: str="\n") -> str:
+        path = os.path.join(self.temp_dir, "test.log")
+        with open(path, "w", newline=newline) as f:
+            f.write(content)
+        return path
+
+    def assertSameAsForwardScan(self, path: str, occurrence: int) -> None:
+        with open(path) as f:
+            self.assertTrue(gaussian_format._can_scan_backwards(f))
+            charges = get_charges_from_log(f, MkChargeSectionParser(), occurrence=occurrence)
+            self.assertEqual(f.read(), "")
+
+        with open(path) as f:
+            expected = get_charges_from_log(StringIO(f.read()), MkChargeSectionParser(), occurrence=occurrence)
+
+        self.assertListEqual(charges, expected)
+
+    def test_occurrences(self) -> None:
+        for block_size in [self.original_block_size, 100, 1]:
+            for newline in ["\n", "\r\n"]:
+                gaussian_format._BACKWARD_SCAN_BLOCK_SIZE = block_size
+                path = self.write_log(self.content, newline)
+                for occurrence in [-1, -2, -3]:
+                    with self.subTest(block_size=block_size, newline=newline, occurrence=occurrence):
+                        self.assertSameAsForwardScan(path, occurrence)
+
+        with open(path) as f:
+            self.assertAlmostEqual(get_charges_from_log(f, MkChargeSectionParser(), occurrence=-3)[0], 0.111111)
+
+    def test_incomplete_last_section(self) -> None:
+        truncated = self.content[:self.content.rindex("     5  H    0.125323")]
+        path = self.write_log(truncated)
+        self.assertSameAsForwardScan(path, -1)
+
+        with open(path) as f:
+            self.assertAlmostEqual(get_charges_from_log(f, MkChargeSectionParser())[0], 0.222222)
+
+    def test_occurrence_not_found(self) -> None:
+        path = self.write_log(self.content)
+        with open(path) as f:
+            with self.assertRaises(IndexError):
+                get_charges_from_log(f, MkChargeSectionParser(), occurrence=-4)
+
+    def test_nested_sections(self) -> None:
+        index = self.content.rindex("     5  H    0.125323")
+        nested = self.content[:index] + " Merz-Kollman atomic radii used.\n" + self.content[index:]
+        path = self.write_log(nested)
+        with open(path) as f:
+            with self.assertRaises(InputFormatError):
+                get_charges_from_log(f, MkChargeSectionParser())
+
+
+class TestLogSectionIndex(TestFromLog):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "test.log")
+
+        f = self.concatenate([
+            "data/methane/methane_mk.log",
+            "data/methane/methane_nbo.log",
+            "data/methane/methane_mk.log",
+        ])
+        f = self.replace_first_occurrence(f, "     1  C   -0.500314\n", "     1  C    0.111111\n")
+        with open(self.path, "w") as log:
+            log.write(f.getvalue())
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def test_index(self) -> None:
+        parsers: List[ChargesSectionParser] = [MkChargeSectionParser(), NpaChargeSectionParser()]
+        index = LogSectionIndex(self.path, parsers)
+
+        self.assertTrue(os.path.isfile(index.index_path))
+        self.assertEqual(len(index.get_section_positions(parsers[0])), 2)
+        self.assertEqual(len(index.get_section_positions(parsers[1])), 1)
+
+        with open(self.path, "rb") as f:
+            content = f.read()
+        start, end = index.get_section_positions(parsers[1])[0]
+        self.assertTrue(content[start:].startswith(b" Summary of Natural Population Analysis:"))
+        self.assertTrue(content[end:].startswith(b" ======="))
+
+        for parser in parsers:
+            for occurrence in [0, -1]:
+                with self.subTest(parser=type(parser).__name__, occurrence=occurrence):
+                    with open(self.path) as f:
+                        expected = get_charges_from_log(StringIO(f.read()), parser, occurrence=occurrence)
+                    with open(self.path) as f:
+                        charges = get_charges_from_log(f, parser, occurrence=occurrence, index=index)
+                    self.assertListEqual(charges, expected)
+
+        with open(self.path) as f:
+            rms, rrms = get_esp_fit_stats_from_log(f, MkChargeSectionParser(), index=index)
+        self.assertAlmostEqual(rms, Esp(0.00069))
+
+    def test_reuse_and_invalidation(self) -> None:
+        LogSectionIndex(self.path, [MkChargeSectionParser()])
+        index_path = self.path + ".sections.json"
+        index_mtime = os.stat(index_path).st_mtime_ns
+
+        index = LogSectionIndex(self.path, [MkChargeSectionParser()])
+        self.assertEqual(os.stat(index_path).st_mtime_ns, index_mtime)
+
+        with open(self.path, "a") as log, open("data/methane/methane_mk.log") as mk_log:
+            log.write(mk_log.read())
+
+        self.assertEqual(len(index.get_section_positions(MkChargeSectionParser())), 3)
+        self.assertEqual(len(LogSectionIndex(self.path, [MkChargeSectionParser()]).get_section_positions(MkChargeSectionParser())), 3)
+
+    def test_charge_type_added(self) -> None:
+        index = LogSectionIndex(self.path, [MkChargeSectionParser()])
+        self.assertEqual(len(index.get_section_positions(MullikenChargeSectionParser())), 3)
+
+        index = LogSectionIndex(self.path, [MkChargeSectionParser(), MullikenChargeSectionParser()])
+        with open(self.path) as f:
+            charges = get_charges_from_log(f, MullikenChargeSectionParser(), occurrence=0, index=index)
+        self.assertAlmostEqual(charges[0], -0.437226)
+
+    def test_occurrence_not_found(self) -> None:
+        index = LogSectionIndex(self.path, [NpaChargeSectionParser()])
+        with open(self.path) as f:
+            with self.assertRaises(IndexError):
+                get_charges_from_log(f, NpaChargeSectionParser(), occurrence=1, index=index)
+
+    def test_wrong_file(self) -> None:
+        index = LogSectionIndex(self.path, [MkChargeSectionParser()])
+        with self.assertRaises(ValueError):
+            get_charges_from_log(StringIO(""), MkChargeSectionParser(), index=index)
+        with open("data/methane/methane_mk.log") as f:
+            with self.assertRaises(ValueError):
+                get_charges_from_log(f, MkChargeSectionParser(), index=index)
+
+
+class TestCompressedLog(TestFromLog):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        with open("data/methane/methane_mk.log") as f:
+            self.content = f.read()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def write_log(self, extension: str) -> str:
+        path = os.path.join(self.temp_dir, "test.log" + extension)
+        with open_file(path, "w") as f:
+            f.write(self.content)
+        return path
+
+    def test_charges(self) -> None:
+        parser = MkChargeSectionParser()
+        expected = get_charges_from_log(StringIO(self.content), parser)
+        for extension in ["", ".gz", ".bz2", ".xz"]:
+            with self.subTest(extension=extension):
+                path = self.write_log(extension)
+                self.assertListEqual(get_charges_from_log(path, parser), expected)
+                sections = get_charges_sections_from_log(path, [parser])
+                self.assertListEqual(sections[parser][0].charges, expected)
+                rms, _ = get_esp_fit_stats_from_log(path, parser)
+                self.assertAlmostEqual(rms, Esp(0.00069))
+
+    def test_backward_scan(self) -> None:
+        with open_file(self.write_log("")) as f:
+            self.assertTrue(gaussian_format._can_scan_backwards(f))
+        for extension in [".gz", ".bz2", ".xz"]:
+            with self.subTest(extension=extension):
+                with open_file(self.write_log(extension)) as f:
+                    self.assertFalse(gaussian_format._can_scan_backwards(f))
+
+    def test_index(self) -> None:
+        expected = get_charges_from_log(StringIO(self.content), MullikenChargeSectionParser(), occurrence=0)
+        path = self.write_log(".gz")
+        index = LogSectionIndex(path, [MullikenChargeSectionParser()])
+        self.assertListEqual(
+            get_charges_from_log(path, MullikenChargeSectionParser(), occurrence=0, index=index),
+            expected
+        )
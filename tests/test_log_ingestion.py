@@ -0,0 +1,129 @@
+from repESP.charges import Charge
+from repESP.gaussian_format import ChargesSectionParser, get_charges_from_log, MkChargeSectionParser
+from repESP.gaussian_format import MullikenChargeSectionParser, NpaChargeSectionParser
+from repESP.log_ingestion import find_log_files, get_charges_table_from_logs
+from repESP.util import open_file
+
+from my_unittest import TestCase
+
+import os
+import shutil
+import tempfile
+from typing import List
+
+
+class TestLogIngestion(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.temp_dir, "nested", "deeper"))
+        self.mk_path = os.path.join(self.temp_dir, "mk.log")
+        self.nbo_path = os.path.join(self.temp_dir, "nested", "deeper", "nbo.out")
+        self.malformed_path = os.path.join(self.temp_dir, "nested", "malformed.log")
+        shutil.copy("data/methane/methane_mk.log", self.mk_path)
+        shutil.copy("data/methane/methane_nbo.log", self.nbo_path)
+        with open(self.malformed_path, "w") as f:
+            f.write(" Mulliken charges:\n               1\n     1  C\n Sum of Mulliken charges\n")
+        with open(os.path.join(self.temp_dir, "nested", "other.txt"), "w") as f:
+            f.write("")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def get_charges_from_log(self, path: str, parser: ChargesSectionParser) -> List[Charge]:
+        with open(path) as f:
+            return get_charges_from_log(f, parser, occurrence=-1)
+
+    def test_find_log_files(self) -> None:
+        self.assertListEqual(
+            find_log_files(self.temp_dir),
+            [self.mk_path, self.nbo_path, self.malformed_path]
+        )
+        self.assertListEqual(find_log_files(self.temp_dir, [".out"]), [self.nbo_path])
+
+    def check_table(self, max_workers: int) -> None:
+        table = get_charges_table_from_logs(
+            find_log_files(self.temp_dir),
+            ["mulliken", "mk", "nbo"],
+            max_workers=max_workers
+        )
+
+        self.assertListEqual(list(table.errors.index), [self.malformed_path])
+        self.assertTrue(table.errors.loc[self.malformed_path, "error"])
+
+        self.assertListEqual(
+            list(table.charges.index.names),
+            ["file", "charge_type", "atom_index"]
+        )
+        self.assertListEqual(
+            sorted(set(table.charges.index.droplevel("atom_index"))),
+            sorted([
+                (self.mk_path, "mulliken"),
+                (self.mk_path, "mk"),
+                (self.nbo_path, "mulliken"),
+                (self.nbo_path, "nbo"),
+            ])
+        )
+
+        for path, charge_type, parser in [
+            (self.mk_path, "mulliken", MullikenChargeSectionParser()),
+            (self.mk_path, "mk", MkChargeSectionParser()),
+            (self.nbo_path, "nbo", NpaChargeSectionParser()),
+        ]:
+            with self.subTest(path=path, charge_type=charge_type):
+                self.assertListEqual(
+                    list(table.charges.loc[(path, charge_type), "charge"]),
+                    [float(charge) for charge in self.get_charges_from_log(path, parser)]
+                )
+
+    def test_serial(self) -> None:
+        self.check_table(max_workers=1)
+
+    def test_parallel(self) -> None:
+        self.check_table(max_workers=2)
+
+    def test_occurrence_not_found(self) -> None:
+        table = get_charges_table_from_logs([self.mk_path], ["mk"], occurrence=1, max_workers=1)
+        self.assertEqual(len(table.charges), 0)
+        self.assertListEqual(list(table.errors.index), [self.mk_path])
+
+    def test_missing_file(self) -> None:
+        path = os.path.join(self.temp_dir, "missing.log")
+        table = get_charges_table_from_logs([path, self.mk_path], ["mk"], max_workers=1)
+        self.assertListEqual(list(table.errors.index), [path])
+        self.assertEqual(len(table.charges), 5)
+
+    def test_compressed(self) -> None:
+        compressed_path = os.path.join(self.temp_dir, "nested", "mk.log.gz")
+        with open(self.mk_path) as f, open_file(compressed_path, "w") as compressed:
+            compressed.write(f.read())
+
+        self.assertIn(compressed_path, find_log_files(self.temp_dir))
+        self.assertNotIn(compressed_path, find_log_files(self.temp_dir, [".out"]))
+
+        table = get_charges_table_from_logs([self.mk_path, compressed_path], ["mk"], max_workers=1)
+        self.assertEqual(len(table.errors), 0)
+        self.assertListEqual(
+            list(table.charges.loc[(compressed_path, "mk"), "charge"]),
+            list(table.charges.loc[(self.mk_path, "mk"), "charge"])
+        )
+
+    def test_truncated_section(self) -> None:
+        truncated_path = os.path.join(self.temp_dir, "truncated.log")
+        with open(self.mk_path) as f, open(truncated_path, "w") as truncated:
+            for line in f:
+                if not line.startswith(" Charges from ESP fit"):
+                    truncated.write(line)
+
+        for max_workers in [1, 2]:
+            with self.subTest(max_workers=max_workers):
+                table = get_charges_table_from_logs(
+                    [truncated_path, self.mk_path], ["mk"], max_workers=max_workers
+                )
+                self.assertListEqual(list(table.errors.index), [truncated_path])
+                self.assertTrue(table.errors.loc[truncated_path, "error"].startswith("InputFormatError"))
+                self.assertEqual(len(table.charges), 5)
+
+    def test_unsupported_charge_type(self) -> None:
+        with self.assertRaises(ValueError):
+            get_charges_table_from_logs([self.mk_path], ["aim"])
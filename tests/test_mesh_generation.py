@@ -0,0 +1,61 @@
+from repESP.esp_util import parse_gaussian_esp
+from repESP.mesh_generation import generate_chelpg_mesh, generate_mk_mesh
+from repESP.types import AtomWithCoords, Coords, Molecule
+
+from my_unittest import TestCase
+
+import numpy as np
+
+
+class TestGenerateMkMesh(TestCase):
+
+    def check_against_gaussian(self, path: str) -> None:
+        with open(path) as f:
+            gaussian_esp = parse_gaussian_esp(f)
+        result = generate_mk_mesh(gaussian_esp.molecule)
+        self.assertTrue(np.allclose(result.as_array(), gaussian_esp.field.mesh.as_array(), rtol=0, atol=1e-6))
+
+    def test_methane(self) -> None:
+        self.check_against_gaussian("data/methane/methane_mk.esp")
+
+    def test_NMe3H_plus(self) -> None:
+        self.check_against_gaussian("data/NMe3H_plus/NMe3H_plus_mk.esp")
+
+    def test_parameters(self) -> None:
+        molecule = Molecule([AtomWithCoords(1, Coords((0, 0, 0)))])
+        result = generate_mk_mesh(molecule, scale_factors=[1, 2], density=3, radii={1: 1})
+        distances = np.linalg.norm(result.as_array(), axis=1)*0.5291772086
+        self.assertGreater(len(result), 2*len(generate_mk_mesh(molecule, [1, 2], density=1, radii={1: 1})))
+        self.assertListEqual(sorted(set(np.round(distances, 6))), [1, 2])
+
+    def test_missing_radius(self) -> None:
+        molecule = Molecule([AtomWithCoords(2, Coords((0, 0, 0)))])
+        with self.assertRaises(ValueError):
+            generate_mk_mesh(molecule)
+
+
+class TestGenerateChelpgMesh(TestCase):
+
+    def check_against_gaussian(self, path: str) -> None:
+        with open(path) as f:
+            gaussian_esp = parse_gaussian_esp(f)
+        result = generate_chelpg_mesh(gaussian_esp.molecule)
+        self.assertTrue(np.allclose(result.as_array(), gaussian_esp.field.mesh.as_array(), rtol=0, atol=1e-6))
+
+    def test_methane(self) -> None:
+        self.check_against_gaussian("data/methane/methane_chelpg.esp")
+
+    def test_NMe3H_plus(self) -> None:
+        self.check_against_gaussian("data/NMe3H_plus/NMe3H_plus_chelpg.esp")
+
+    def test_parameters(self) -> None:
+        molecule = Molecule([AtomWithCoords(1, Coords((0, 0, 0)))])
+        result = generate_chelpg_mesh(molecule, spacing=0.5, box_extension=2, radii={1: 1})
+        distances = np.linalg.norm(result.as_array(), axis=1)*0.5291772086
+        self.assertGreater(len(result), 0)
+        self.assertTrue(np.all((distances >= 1) & (distances <= 2)))
+
+    def test_missing_radius(self) -> None:
+        molecule = Molecule([AtomWithCoords(11, Coords((0, 0, 0)))])
+        with self.assertRaises(ValueError):
+            generate_chelpg_mesh(molecule)
@@ -0,0 +1,201 @@
+from repESP.calc_fields import calc_relative_rms_error, esp_from_charges
+from repESP.charges import AtomWithCoordsAndCharge, Charge
+from repESP.equivalence import Equivalence
+from repESP.esp_util import EspData, parse_gaussian_esp
+from repESP.fields import ArrayMesh, Field
+from repESP.resp_native import decimate_esp_data, fit_charges, fit_restraint_path
+from repESP.respin_format import Respin
+from repESP.respin_generation import prepare_respin, EquivalenceOnlyRespinGenerator
+from repESP.respin_generation import FrozenAtomsRespinGenerator
+from repESP.types import *
+
+from my_unittest import TestCase
+
+from dataclasses import replace
+import numpy as np
+
+
+class NativeFittingSetup(TestCase):
+
+    def setUp(self) -> None:
+        with open("data/methane/methane_mk.esp", 'r') as f:
+            self.esp_data = EspData.from_gaussian(parse_gaussian_esp(f))
+
+        self.molecule = Molecule([Atom(atomic_number) for atomic_number in [6, 1, 1, 1, 1]])
+        self.equivalence = Equivalence([None, None, 1, 1, 1])
+
+        # First stage RESP, as in the tests of the `resp` wrapper
+        self.respin = Respin(
+            title="File generated for unit tests only (can been removed).",
+            cntrl=Respin.Cntrl(
+                ihfree=1,
+                ioutopt=1,
+                qwt=0.0005,
+            ),
+            subtitle="Resp charges for organic molecule",
+            charge=0,
+            molecule=self.molecule,
+            ivary=Respin.Ivary([0, 0, 0, 0, 0])
+        )
+
+
+class TestNativeFitting(NativeFittingSetup):
+
+    # Expected values are the results of the `resp` program, see test_resp_wrapper.py
+
+    def test_restrained_fit(self) -> None:
+        self.assertListsAlmostEqual(
+            fit_charges(self.esp_data, self.respin),
+            [-0.407205, 0.101907, 0.101695, 0.101695, 0.101907],
+            places=5
+        )
+
+    def test_two_stage_resp(self) -> None:
+        respin2 = Respin(
+            title="File generated for unit tests only (can been removed).",
+            cntrl=Respin.Cntrl(
+                iqopt=2,
+                qwt=0.001,
+            ),
+            subtitle="Resp charges for organic molecule",
+            charge=0,
+            molecule=self.molecule,
+            ivary=Respin.Ivary([0, 0, 2, 2, 2])
+        )
+
+        charges = fit_charges(
+            self.esp_data,
+            respin2,
+            fit_charges(self.esp_data, self.respin)
+        )
+
+        self.assertListsAlmostEqual(
+            charges,
+            [-0.317454, 0.079364, 0.079364, 0.079364, 0.079364],
+            places=5
+        )
+
+    def test_equivalencing(self) -> None:
+        respin = prepare_respin(EquivalenceOnlyRespinGenerator(self.equivalence), 0, self.molecule)
+        self.assertListsAlmostEqual(
+            fit_charges(self.esp_data, respin),
+            [-0.500040, 0.125010, 0.125010, 0.125010, 0.125010],
+            places=5
+        )
+
+    def test_frozen_atoms(self) -> None:
+        respin = prepare_respin(FrozenAtomsRespinGenerator(self.equivalence, [0, 2, 4]), 0, self.molecule)
+        self.assertListsAlmostEqual(
+            fit_charges(self.esp_data, respin, [Charge(x) for x in [-0.5, 0, 0, 0, 0]]),
+            [-0.5, 0.25, 0.0, 0.25, 0.0],
+            places=5
+        )
+
+    def test_initial_charges_required(self) -> None:
+        with self.assertRaises(ValueError):
+            fit_charges(self.esp_data, replace(self.respin, cntrl=Respin.Cntrl(iqopt=2)))
+
+
+class TestRestraintPath(NativeFittingSetup):
+
+    def test_path_matches_individual_fits(self) -> None:
+        qwts = [0, 0.0005, 0.001, 0.01]
+        path = fit_restraint_path(self.esp_data, self.respin, qwts)
+
+        self.assertListEqual(path.qwts, qwts)
+        for qwt, charges in zip(qwts, path.charges):
+            respin = replace(self.respin, cntrl=replace(self.respin.cntrl, qwt=qwt))
+            self.assertListsAlmostEqual(charges, fit_charges(self.esp_data, respin), places=5)
+
+        # Fit quality deteriorates with increasing restraint weight.
+        self.assertListEqual(path.rrms, sorted(path.rrms))
+
+    def test_fit_quality(self) -> None:
+        path = fit_restraint_path(self.esp_data, self.respin, [0.0005])
+
+        molecule = Molecule([
+            AtomWithCoordsAndCharge(atom.atomic_number, coords, charge)
+            for atom, coords, charge in zip(self.molecule.atoms, self.esp_data.atoms_coords, path.charges[0])
+        ])
+        reproduced = esp_from_charges(self.esp_data.field.mesh, molecule)
+
+        self.assertAlmostEqual(
+            path.rrms[0],
+            calc_relative_rms_error(self.esp_data.field.values, reproduced.values)
+        )
+
+    def test_negative_qwt(self) -> None:
+        with self.assertRaises(ValueError):
+            fit_restraint_path(self.esp_data, self.respin, [0.0005, -0.1])
+
+
+class TestDecimation(NativeFittingSetup):
+
+    def test_decimated_points(self) -> None:
+        for method in ["stratified", "leverage"]:
+            with self.subTest(method=method):
+                decimation = decimate_esp_data(self.esp_data, self.respin, 100, method, seed=1)
+                self.assertEqual(len(decimation.esp_data.field.mesh), 100)
+                self.assertEqual(len(set(decimation.indices)), 100)
+                self.assertListEqual(list(decimation.indices), sorted(decimation.indices))
+                self.assertListEqual(
+                    list(decimation.esp_data.field.values),
+                    [self.esp_data.field.values[i] for i in decimation.indices]
+                )
+                self.assertTrue(np.allclose(
+                    decimation.esp_data.field.mesh.as_array(),
+                    self.esp_data.field.mesh.as_array()[decimation.indices]
+                ))
+
+    def test_report(self) -> None:
+        decimation = decimate_esp_data(self.esp_data, self.respin, 100, seed=1)
+        self.assertAlmostEqual(decimation.qwt, 0.0005*100/379)
+
+        respin = replace(self.respin, cntrl=replace(self.respin.cntrl, qwt=decimation.qwt))
+        self.assertListsAlmostEqual(decimation.charges, fit_charges(decimation.esp_data, respin))
+        self.assertListsAlmostEqual(decimation.reference_charges, fit_charges(self.esp_data, self.respin))
+        self.assertAlmostEqual(
+            decimation.reference_rrms,
+            fit_restraint_path(self.esp_data, self.respin, [0.0005]).rrms[0]
+        )
+        self.assertAlmostEqual(
+            decimation.max_charge_deviation,
+            max(abs(q1 - q2) for q1, q2 in zip(decimation.charges, decimation.reference_charges))
+        )
+
+    def test_all_points(self) -> None:
+        decimation = decimate_esp_data(self.esp_data, self.respin, 379, seed=1)
+        self.assertListEqual(list(decimation.indices), list(range(379)))
+        self.assertListsAlmostEqual(decimation.charges, decimation.reference_charges)
+        self.assertAlmostEqual(decimation.rrms, decimation.reference_rrms)
+
+    def test_duplicate_points(self) -> None:
+        points_coords = self.esp_data.field.mesh.as_array()
+        values = np.asarray(self.esp_data.field.values, dtype=float)
+        esp_data = EspData(
+            self.esp_data.atoms_coords,
+            Field(
+                ArrayMesh(np.concatenate([points_coords, points_coords[:10]])),
+                np.concatenate([values, values[:10]])
+            )
+        )
+        for point_count in [100, 379, 385, 389]:
+            with self.subTest(point_count=point_count):
+                decimation = decimate_esp_data(esp_data, self.respin, point_count, seed=1)
+                self.assertEqual(len(set(decimation.indices)), point_count)
+
+    def test_reproducible(self) -> None:
+        for method in ["stratified", "leverage"]:
+            with self.subTest(method=method):
+                self.assertListEqual(
+                    list(decimate_esp_data(self.esp_data, self.respin, 50, method, seed=3).indices),
+                    list(decimate_esp_data(self.esp_data, self.respin, 50, method, seed=3).indices)
+                )
+
+    def test_invalid_arguments(self) -> None:
+        with self.assertRaises(ValueError):
+            decimate_esp_data(self.esp_data, self.respin, 0)
+        with self.assertRaises(ValueError):
+            decimate_esp_data(self.esp_data, self.respin, 380)
+        with self.assertRaises(ValueError):
+            decimate_esp_data(self.esp_data, self.respin, 100, "unknown")
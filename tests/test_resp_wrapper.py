@@ -4,12 +4,16 @@ from repESP.equivalence import Equivalence
 from repESP.types import *
 from repESP.resp_wrapper import run_resp, run_two_stage_resp, fit_hydrogens_only
 from repESP.resp_wrapper import fit_with_frozen_atoms, fit_with_equivalencing
+from repESP.resp_wrapper import RespResultCache, ScratchDirectoryPool
+from repESP.resp_wrapper import run_resp_qwt_scan
+from repESP.resp_wrapper import _CachedRespResult
 from repESP.respin_format import Respin
 
 from my_unittest import TestCase
 
 from copy import deepcopy
-from io import StringIO
+from dataclasses import replace
+import tempfile
 
 
 class TestResp(TestCase):
@@ -44,6 +48,37 @@ class TestResp(TestCase):
             [-0.407205, 0.101907, 0.101695, 0.101695, 0.101907]
         )
 
+    def test_run_resp_with_scratch_pool(self) -> None:
+        with ScratchDirectoryPool() as pool:
+            for _ in range(2):
+                charges = run_resp(self.esp_data, self.respin, scratch_pool=pool)
+                self.assertListsAlmostEqual(charges, self.result_charges)
+
+    def test_run_resp_with_cache(self) -> None:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = RespResultCache(cache_dir)
+            charges = run_resp(self.esp_data, self.respin, cache=cache)
+            self.assertListsAlmostEqual(charges, self.result_charges)
+            self.assertGreater(cache.size, 0)
+
+            # Tamper with the entry to check that it's used instead of `resp`.
+            key = cache._make_key(self.esp_data, self.respin, None)
+            cache._put(key, _CachedRespResult([Charge(1)]*5, None))
+            self.assertListsAlmostEqual(
+                run_resp(self.esp_data, self.respin, cache=cache),
+                [1]*5
+            )
+
+    def test_qwt_scan(self) -> None:
+        all_charges = run_resp_qwt_scan(self.esp_data, self.respin, [0.0005, 0.0005, 0])
+        self.assertEqual(len(all_charges), 3)
+        self.assertListsAlmostEqual(all_charges[0], self.result_charges)
+        self.assertListsAlmostEqual(all_charges[1], self.result_charges)
+        self.assertListsAlmostEqual(
+            all_charges[2],
+            run_resp(self.esp_data, replace(self.respin, cntrl=Respin.Cntrl(ihfree=1)))
+        )
+
     def test_two_stage_resp(self) -> None:
 
         respin2 = Respin(
@@ -0,0 +1,146 @@
+from repESP.charges import Charge
+from repESP.esp_util import EspData
+from repESP.fields import Esp, Field, Mesh
+from repESP.types import *
+from repESP.resp_wrapper import RespResultCache, ScratchDirectoryPool
+from repESP.resp_wrapper import _CachedRespResult, _parse_respout_charges
+from repESP.respin_format import Respin
+
+from my_unittest import TestCase
+
+from copy import deepcopy
+from io import StringIO
+import os
+import tempfile
+
+
+class TestScratchDirectoryPool(TestCase):
+
+    def setUp(self) -> None:
+        self.base_dir = tempfile.TemporaryDirectory()
+        self.pool = ScratchDirectoryPool(size=2, base_dir=self.base_dir.name)
+
+    def tearDown(self) -> None:
+        self.pool.close()
+        self.base_dir.cleanup()
+
+    def test_directories_are_emptied_and_reused(self) -> None:
+        with self.pool.acquire() as calc_dir:
+            self.assertTrue(calc_dir.startswith(self.pool.root))
+            self.assertListEqual(os.listdir(calc_dir), [])
+            with open(os.path.join(calc_dir, "charges.qout"), "w") as f:
+                f.write("test")
+            os.mkdir(os.path.join(calc_dir, "subdir"))
+
+        with self.pool.acquire() as calc_dir1:
+            with self.pool.acquire() as calc_dir2:
+                self.assertNotEqual(calc_dir1, calc_dir2)
+                self.assertSetEqual({calc_dir1, calc_dir2} & {calc_dir}, {calc_dir})
+                self.assertListEqual(os.listdir(calc_dir), [])
+
+    def test_close(self) -> None:
+        root = self.pool.root
+        self.pool.close()
+        self.assertFalse(os.path.exists(root))
+        with self.assertRaises(ValueError):
+            with self.pool.acquire():
+                pass
+
+    def test_invalid_size(self) -> None:
+        with self.assertRaises(ValueError):
+            ScratchDirectoryPool(size=0, base_dir=self.base_dir.name)
+
+
+class TestRespResultCache(TestCase):
+
+    def setUp(self) -> None:
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.cache = RespResultCache(self.cache_dir.name)
+
+        self.esp_data = EspData(
+            [Coords((0, 0, 0))],
+            Field(Mesh([Coords((1, 0, 0)), Coords((0, 2, 0))]), [Esp(0.1), Esp(0.05)])
+        )
+        self.respin = Respin(
+            title="Test",
+            cntrl=Respin.Cntrl(qwt=0.0005),
+            subtitle="Test",
+            charge=0,
+            molecule=Molecule([Atom(1)]),
+            ivary=Respin.Ivary([0])
+        )
+        self.result = _CachedRespResult([Charge(0.123456)], "esout contents")
+
+    def tearDown(self) -> None:
+        self.cache_dir.cleanup()
+
+    def test_key_depends_on_input(self) -> None:
+        key = self.cache._make_key(self.esp_data, self.respin, None)
+        self.assertEqual(key, self.cache._make_key(deepcopy(self.esp_data), deepcopy(self.respin), None))
+
+        other_respin = deepcopy(self.respin)
+        other_respin.cntrl.qwt = 0.001
+        self.assertNotEqual(key, self.cache._make_key(self.esp_data, other_respin, None))
+
+        other_esp_data = deepcopy(self.esp_data)
+        other_esp_data.field.values[0] = Esp(0.2)
+        self.assertNotEqual(key, self.cache._make_key(other_esp_data, self.respin, None))
+
+        self.assertNotEqual(key, self.cache._make_key(self.esp_data, self.respin, [Charge(0)]))
+
+    def test_put_and_get(self) -> None:
+        self.assertIsNone(self.cache._get("key", require_esout=False))
+        self.cache._put("key", self.result)
+        self.assertEqual(self.cache._get("key", require_esout=True), self.result)
+
+    def test_esout_required(self) -> None:
+        self.cache._put("key", _CachedRespResult(self.result.charges, None))
+        self.assertIsNone(self.cache._get("key", require_esout=True))
+        self.assertIsNotNone(self.cache._get("key", require_esout=False))
+
+    def test_lru_eviction(self) -> None:
+        self.cache._put("key1", self.result)
+        entry_size = self.cache.size
+        self.cache.max_size = 2*entry_size
+
+        self.cache._put("key2", self.result)
+        os.utime(self.cache._get_path("key1"), (0, 0))
+        os.utime(self.cache._get_path("key2"), (1, 1))
+        # Using key1 makes key2 the least recently used entry.
+        self.cache._get("key1", require_esout=False)
+        self.cache._put("key3", self.result)
+
+        self.assertIsNotNone(self.cache._get("key1", require_esout=False))
+        self.assertIsNone(self.cache._get("key2", require_esout=False))
+        self.assertIsNotNone(self.cache._get("key3", require_esout=False))
+        self.assertLessEqual(self.cache.size, self.cache.max_size)
+
+    def test_clear(self) -> None:
+        self.cache._put("key", self.result)
+        self.cache.clear()
+        self.assertEqual(self.cache.size, 0)
+
+
+class TestRespoutParsing(TestCase):
+
+    def test_parsing_multiple_optimizations(self) -> None:
+        charges_table = """
+                    Point Charges Before & After Optimization
+
+    no.  At.no.    q(init)       q(opt)     ivary    d(rstr)/dq
+     1     6   -0.500314   {}        0     0.000977
+     2     1    0.125323   {}        0     0.000000
+
+        Sum over the calculated charges:     0.000
+"""
+        respout = StringIO(
+            " Some header\n" +
+            charges_table.format("-0.407205", " 0.407205") +
+            " qwt =  0.00100\n" +
+            charges_table.format("-0.317454", " 0.317454")
+        )
+
+        self.assertAlmostEqualRecursive(
+            _parse_respout_charges(respout),
+            [[-0.407205, 0.407205], [-0.317454, 0.317454]]
+        )
@@ -1,4 +1,5 @@
 from repESP.equivalence import Equivalence
+from repESP.exceptions import InputFormatError
 from repESP.fields import *
 from repESP.types import *
 from repESP.respin_format import Respin, parse_respin, write_respin
@@ -142,3 +143,137 @@ class TestRespinAndEquivalence(TestCase):
 
         with self.assertRaises(ValueError):
             _get_equivalence_from_ivary(Respin.Ivary([6, 0, 2, 2, 2]))
+
+
+class TestMultipleStructures(TestCase):
+
+    def setUp(self) -> None:
+
+        methane = Molecule([Atom(atomic_number) for atomic_number in [6, 1, 1, 1, 1]])
+
+        self.respin = Respin(
+            title="Multiple structure fit",
+            cntrl=Respin.Cntrl(
+                qwt=0.0005,
+                nmol=2
+            ),
+            subtitle="Conformer 1",
+            charge=0,
+            molecule=methane,
+            ivary=Respin.Ivary([0, 0, 2, 2, 2]),
+            wtmol=0.25,
+            additional_structures=[
+                Respin.Structure(
+                    subtitle="Conformer 2",
+                    charge=0,
+                    molecule=methane,
+                    ivary=Respin.Ivary([0, 0, 2, 2, 2]),
+                    wtmol=0.75
+                )
+            ],
+            structure_equivalence=[
+                [(0, 0), (1, 0)],
+                [(0, 1), (1, 1)],
+            ]
+        )
+
+        self.expected_lines = [
+            "Multiple structure fit",
+            "",
+            " &cntrl",
+            "",
+            " qwt = 0.00050,",
+            " nmol = 2,",
+            "",
+            " &end",
+            "   0.25000",
+            "Conformer 1",
+            "    0    5",
+            "    6    0",
+            "    1    0",
+            "    1    2",
+            "    1    2",
+            "    1    2",
+            "   0.75000",
+            "Conformer 2",
+            "    0    5",
+            "    6    0",
+            "    1    0",
+            "    1    2",
+            "    1    2",
+            "    1    2",
+            "",
+            "    2",
+            "    1    1    2    1",
+            "    2",
+            "    1    2    2    2",
+            "",
+        ]
+
+    def test_attrs(self) -> None:
+        self.assertEqual(len(self.respin.structures), 2)
+        self.assertAlmostEqual(self.respin.structures[0].wtmol, 0.25)
+        self.assertEqual(self.respin.structures[1].subtitle, "Conformer 2")
+
+    def test_writing(self) -> None:
+        written = StringIO()
+        write_respin(written, self.respin)
+        self.assertListEqual(written.getvalue().splitlines(), self.expected_lines)
+
+    def test_parsing(self) -> None:
+        parsed_respin = parse_respin(StringIO("\n".join(self.expected_lines) + "\n"))
+        self.assertAlmostEqualRecursive(self.respin, parsed_respin)
+
+    def test_nmol_validation(self) -> None:
+        with self.assertRaises(ValueError):
+            Respin(
+                title=self.respin.title,
+                cntrl=Respin.Cntrl(nmol=1),
+                subtitle=self.respin.subtitle,
+                charge=self.respin.charge,
+                molecule=self.respin.molecule,
+                ivary=self.respin.ivary,
+                additional_structures=self.respin.additional_structures
+            )
+
+    def test_structure_equivalence_validation(self) -> None:
+        for invalid_pair in [(2, 0), (1, 5), (-1, 0)]:
+            with self.assertRaises(ValueError):
+                Respin(
+                    title=self.respin.title,
+                    cntrl=self.respin.cntrl,
+                    subtitle=self.respin.subtitle,
+                    charge=self.respin.charge,
+                    molecule=self.respin.molecule,
+                    ivary=self.respin.ivary,
+                    additional_structures=self.respin.additional_structures,
+                    structure_equivalence=[[(0, 0), invalid_pair]]
+                )
+
+    def test_structure_equivalence_group_size_validation(self) -> None:
+        for invalid_group in [[], [(1, 0)]]:
+            with self.assertRaises(ValueError):
+                Respin(
+                    title=self.respin.title,
+                    cntrl=self.respin.cntrl,
+                    subtitle=self.respin.subtitle,
+                    charge=self.respin.charge,
+                    molecule=self.respin.molecule,
+                    ivary=self.respin.ivary,
+                    additional_structures=self.respin.additional_structures,
+                    structure_equivalence=[[(0, 0), (1, 0)], invalid_group]
+                )
+
+    def test_parsing_invalid_structure_equivalence(self) -> None:
+        for invalid_lines in [
+            ["    1", "    1    1"],
+            ["    2", "    1    1    3    1"],
+            ["    2", "    1    1    2    6"],
+            ["    2", "    1    1    2    1    2    2"],
+            ["    2", "    1    1    2"],
+            ["    x", "    1    1    2    1"],
+        ]:
+            with self.subTest(invalid_lines=invalid_lines):
+                lines = self.expected_lines[:-5] + invalid_lines + [""]
+                with self.assertRaises(InputFormatError):
+                    parse_respin(StringIO("\n".join(lines) + "\n"))
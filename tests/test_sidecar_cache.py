@@ -0,0 +1,140 @@
+from repESP.cube_format import parse_ed_cube, parse_esp_cube
+from repESP.esp_util import parse_gaussian_esp
+from repESP.exceptions import InputFormatError
+from repESP.sidecar_cache import CachedData, SidecarCache
+
+from my_unittest import TestCase
+
+from io import StringIO
+import numpy as np
+import os
+import shutil
+import tempfile
+
+
+class TestSidecarCache(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "source.txt")
+        with open(self.path, "w") as f:
+            f.write("source")
+        self.data = CachedData({"key": [1, 2.5]}, np.arange(6.0).reshape(2, 3))
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def test_store_and_load(self) -> None:
+        cache = SidecarCache()
+        with open(self.path) as f:
+            self.assertIsNone(cache.load(f, "kind"))
+            cache.store(f, "kind", self.data)
+            loaded = cache.load(f, "kind")
+
+        assert loaded is not None
+        self.assertEqual(loaded.header, self.data.header)
+        self.assertIsInstance(loaded.values, np.memmap)
+        self.assertTrue(np.array_equal(loaded.values, self.data.values))
+        self.assertTrue(os.path.isfile(self.path + ".kind.json"))
+
+    def test_kind_mismatch(self) -> None:
+        cache = SidecarCache()
+        with open(self.path) as f:
+            cache.store(f, "kind", self.data)
+            self.assertIsNone(cache.load(f, "other_kind"))
+
+    def test_invalidated_by_modification(self) -> None:
+        cache = SidecarCache()
+        with open(self.path) as f:
+            cache.store(f, "kind", self.data)
+
+        with open(self.path, "w") as f:
+            f.write("modified")
+
+        with open(self.path) as f:
+            self.assertIsNone(cache.load(f, "kind"))
+
+    def test_invalidated_by_hash(self) -> None:
+        cache = SidecarCache()
+        with open(self.path) as f:
+            cache.store(f, "kind", self.data)
+
+        # Same size and modification time but different contents
+        stat = os.stat(self.path)
+        with open(self.path, "w") as f:
+            f.write("SOURCE")
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        with open(self.path) as f:
+            self.assertIsNone(cache.load(f, "kind"))
+            self.assertIsNotNone(SidecarCache(verify_hash=False).load(f, "kind"))
+
+    def test_directory(self) -> None:
+        cache_dir = os.path.join(self.temp_dir, "cache")
+        cache = SidecarCache(cache_dir)
+        with open(self.path) as f:
+            cache.store(f, "kind", self.data)
+            self.assertIsNotNone(cache.load(f, "kind"))
+
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+        self.assertFalse(os.path.exists(self.path + ".kind.json"))
+
+    def test_file_without_path(self) -> None:
+        cache = SidecarCache()
+        f = StringIO("source")
+        cache.store(f, "kind", self.data)
+        self.assertIsNone(cache.load(f, "kind"))
+
+
+class TestParsingWithCache(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = SidecarCache(self.temp_dir)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def test_cube(self) -> None:
+        with open("tests/test_mol_den.cub") as f:
+            expected = parse_ed_cube(f)
+
+        for array_backed in [False, True, False, True]:
+            with self.subTest(array_backed=array_backed):
+                with open("tests/test_mol_den.cub") as f:
+                    cube = parse_ed_cube(f, array_backed=array_backed, cache=self.cache)
+
+                self.assertEqual(cube.info, expected.info)
+                self.assertEqual(cube.molecule, expected.molecule)
+                self.assertEqual(cube.field.mesh, expected.field.mesh)
+                self.assertListEqual(list(cube.field.values), list(expected.field.values))
+                self.assertEqual(isinstance(cube.field.values, np.ndarray), array_backed)
+
+        with open("tests/test_mol_den.cub") as f:
+            cube = parse_ed_cube(f, array_backed=True, cache=self.cache)
+        self.assertIsInstance(cube.field.values, np.memmap)
+
+    def test_cube_title_verified_when_cached(self) -> None:
+        with open("tests/test_mol_den.cub") as f:
+            parse_ed_cube(f, cache=self.cache)
+
+        with open("tests/test_mol_den.cub") as f:
+            with self.assertRaises(InputFormatError):
+                parse_esp_cube(f, cache=self.cache)
+
+    def test_gaussian_esp(self) -> None:
+        with open("tests/test_gaussian.esp") as f:
+            expected = parse_gaussian_esp(f)
+
+        for array_backed in [False, True, False, True]:
+            with self.subTest(array_backed=array_backed):
+                with open("tests/test_gaussian.esp") as f:
+                    esp_data = parse_gaussian_esp(f, array_backed=array_backed, cache=self.cache)
+
+                self.assertEqual(esp_data.charge, expected.charge)
+                self.assertEqual(esp_data.multiplicity, expected.multiplicity)
+                self.assertEqual(esp_data.molecule, expected.molecule)
+                self.assertEqual(esp_data.dipole_moment, expected.dipole_moment)
+                self.assertEqual(esp_data.quadrupole_moment, expected.quadrupole_moment)
+                self.assertListEqual(list(esp_data.field.values), list(expected.field.values))
+                self.assertListEqual(list(esp_data.field.mesh.points), list(expected.field.mesh.points))
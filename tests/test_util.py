@@ -1,5 +1,11 @@
-from repESP.util import list_from_dict, mask_from_list
+from repESP.util import list_from_dict, mask_from_list, open_file
 
+import bz2
+import gzip
+import lzma
+import os
+import shutil
+import tempfile
 from typing import Dict, List, Mapping
 
 from my_unittest import TestCase
@@ -54,3 +60,38 @@ class TestMaskFromList(TestCase):
         expected = [True, False, True, False]
         result: List[bool] = mask_from_list([1, 3], 4, one_indexed=True)
         self.assertListEqual(expected, result)
+
+
+class TestOpenFile(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.mkdtemp()
+        self.content = "".join(f"line {i}\n" for i in range(10000))
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_dir)
+
+    def test_round_trip(self) -> None:
+        for extension in ["", ".gz", ".bz2", ".xz"]:
+            with self.subTest(extension=extension):
+                path = os.path.join(self.temp_dir, "test.txt" + extension)
+                with open_file(path, "w") as f:
+                    f.write(self.content)
+                with open_file(path) as f:
+                    self.assertEqual(f.name, path)
+                    self.assertEqual(f.readline(), "line 0\n")
+                    self.assertEqual(f.read(), self.content[len("line 0\n"):])
+
+    def test_compression(self) -> None:
+        for extension, module in [(".gz", gzip), (".bz2", bz2), (".xz", lzma)]:
+            with self.subTest(extension=extension):
+                path = os.path.join(self.temp_dir, "test.txt" + extension)
+                with open_file(path, "w") as f:
+                    f.write(self.content)
+                self.assertLess(os.path.getsize(path), len(self.content))
+                with module.open(path, "rt") as f:
+                    self.assertEqual(f.read(), self.content)
+
+    def test_unsupported_mode(self) -> None:
+        with self.assertRaises(ValueError):
+            open_file(os.path.join(self.temp_dir, "test.txt.gz"), "rb")
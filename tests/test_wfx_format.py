@@ -0,0 +1,68 @@
+from repESP.exceptions import InputFormatError
+from repESP.types import Coords
+from repESP.wavefunction import Wavefunction
+from repESP.wfx_format import parse_wfx
+
+from my_unittest import TestCase
+
+from io import StringIO
+import numpy as np
+
+
+class TestParseWfx(TestCase):
+
+    def setUp(self) -> None:
+        with open("data/methane/prep/methane.wfx") as f:
+            self.text = f.read()
+        self.wavefunction = parse_wfx(StringIO(self.text))
+
+    def test_molecule(self) -> None:
+        atoms = self.wavefunction.molecule.atoms
+        self.assertListEqual([atom.atomic_number for atom in atoms], [6, 1, 1, 1, 1])
+        self.assertListsAlmostEqual(atoms[2].coords, Coords((-1.190050669431, -1.190050669431, 1.190050669431)))
+
+    def test_primitives(self) -> None:
+        self.assertEqual(len(self.wavefunction.primitive_exponents), 64)
+        self.assertListEqual(list(self.wavefunction.primitive_centers[31:33]), [0, 1])
+        self.assertAlmostEqual(self.wavefunction.primitive_exponents[0], 4563.24)
+        # Primitives 27 to 32 are the d primitives of carbon.
+        self.assertListEqual(
+            self.wavefunction.primitive_powers[26:32].tolist(),
+            [[2, 0, 0], [0, 2, 0], [0, 0, 2], [1, 1, 0], [1, 0, 1], [0, 1, 1]]
+        )
+        self.assertListEqual(self.wavefunction.primitive_powers[9].tolist(), [1, 0, 0])
+
+    def test_orbitals(self) -> None:
+        self.assertListEqual(list(self.wavefunction.occupations), [2]*5)
+        self.assertEqual(self.wavefunction.coefficients.shape, (5, 64))
+
+    def test_missing_section(self) -> None:
+        text = self.text.replace("<Primitive Types>", "<Types>").replace("</Primitive Types>", "</Types>")
+        with self.assertRaises(InputFormatError):
+            parse_wfx(StringIO(text))
+
+    def test_inconsistent_sections(self) -> None:
+        text = self.text.replace(" 64\n</Number of Primitives>", " 63\n</Number of Primitives>")
+        with self.assertRaises(InputFormatError):
+            parse_wfx(StringIO(text))
+
+    def test_edf_not_supported(self) -> None:
+        text = self.text + "<Additional Electron Density Function (EDF)>\n</Additional Electron Density Function (EDF)>\n"
+        with self.assertRaises(NotImplementedError):
+            parse_wfx(StringIO(text))
+
+
+class TestWavefunction(TestCase):
+
+    def test_construction_fails_with_wrong_shapes(self) -> None:
+        with open("data/methane/prep/methane.wfx") as f:
+            wavefunction = parse_wfx(f)
+        with self.assertRaises(ValueError):
+            Wavefunction(
+                wavefunction.molecule,
+                wavefunction.primitive_centers,
+                wavefunction.primitive_powers,
+                wavefunction.primitive_exponents,
+                wavefunction.occupations,
+                wavefunction.coefficients[:, 1:]
+            )